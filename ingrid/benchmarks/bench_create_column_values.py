@@ -0,0 +1,132 @@
+"""
+Copyright (C) 2020 by the Georgia Tech Research Institute (GTRI)
+This software may be modified and distributed under the terms of
+the BSD 3-Clause license. See the LICENSE file for details.
+"""
+
+import argparse
+import timeit
+
+import pandas as pd
+
+from model_processing.utils import (
+    create_column_values_singleton,
+    create_column_values_space,
+    create_column_values_under,
+)
+
+
+def row_by_row_under(prefix, first_node_data, second_node_data, suffix=""):
+    """
+    Row by row reference for `create_column_values_under`.
+    """
+    column_values = []
+    for count, first_data in enumerate(first_node_data):
+        column_values.append(
+            prefix
+            + "_"
+            + first_data.lower()
+            + "_"
+            + second_node_data[count].lower()
+            + suffix
+        )
+    return column_values
+
+
+def row_by_row_space(first_node_data, second_node_data):
+    """
+    Row by row reference for `create_column_values_space`.
+    """
+    column_values = []
+    for count, first_data in enumerate(first_node_data):
+        column_values.append(
+            first_data.lower()
+            + " qua "
+            + second_node_data[count].lower()
+            + " context"
+        )
+    return column_values
+
+
+def row_by_row_singleton(first_node_data, second_node_data):
+    """
+    Row by row reference for `create_column_values_singleton`.
+    """
+    column_values = []
+    for count, first_data in enumerate(first_node_data):
+        column_values.append(
+            first_data.lower() + " " + second_node_data[count].lower()
+        )
+    return column_values
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the derived column values at a given row count."
+    )
+    parser.add_argument("-n", "--rows", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.DataFrame(
+        data={
+            "composite owner": [
+                "Owner {0}".format(i) for i in range(args.rows)
+            ],
+            "component": ["Part {0}".format(i) for i in range(args.rows)],
+        }
+    )
+    owner = df.loc[:, "composite owner"]
+    component = df.loc[:, "component"]
+
+    cases = [
+        (
+            "under",
+            lambda: row_by_row_under("A", owner, component, "-end1"),
+            lambda: create_column_values_under(
+                prefix="A",
+                first_node_data=owner,
+                second_node_data=component,
+                suffix="-end1",
+            ),
+        ),
+        (
+            "space",
+            lambda: row_by_row_space(owner, component),
+            lambda: create_column_values_space(
+                first_node_data=owner, second_node_data=component
+            ),
+        ),
+        (
+            "singleton",
+            # the repeated name list was built by add_missing_columns, the
+            # rule only appends a constant so it runs about as fast as the
+            # loop, the gain is not building that list.
+            lambda: row_by_row_singleton(
+                owner, ["context1" for count in range(len(owner))]
+            ),
+            lambda: create_column_values_singleton(
+                first_node_data=owner, second_node_data="context1"
+            ),
+        ),
+    ]
+
+    print("{0} rows, best of {1}".format(args.rows, args.repeat))
+    for name, row_by_row, vectorized in cases:
+        assert row_by_row() == vectorized()
+        loop_time = min(
+            timeit.repeat(row_by_row, number=1, repeat=args.repeat)
+        )
+        vec_time = min(
+            timeit.repeat(vectorized, number=1, repeat=args.repeat)
+        )
+        print(
+            "{0:>10}: row by row {1:.3f}s vectorized {2:.3f}s"
+            " speedup {3:.1f}x".format(
+                name, loop_time, vec_time, loop_time / vec_time
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
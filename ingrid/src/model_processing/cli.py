@@ -7,6 +7,7 @@ the BSD 3-Clause license. See the LICENSE file for details.
 import argparse
 
 from .commands import compare_md_model, create_md_model
+from .utils import REPORTER_FORMATS
 from ._version import __version__
 
 
@@ -80,6 +81,78 @@ def main():
         type=str,
     )
 
+    parser.add_argument(
+        "--cache",
+        help=(
+            "Directory for caching parsed Excel files."
+            + " Unchanged workbooks are loaded from the cache on later runs"
+        ),
+        type=str,
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help=(
+            "Number of worker processes used to create or compare"
+            + " several Excel files. Defaults to 1"
+        ),
+        type=int,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--graph-backend",
+        help=(
+            "Graph representation used while building the model graph."
+            + " csr uses less memory on very large workbooks."
+            + " Defaults to networkx"
+        ),
+        choices=["networkx", "csr"],
+        default="networkx",
+    )
+
+    parser.add_argument(
+        "--compact",
+        help=(
+            "Write the JSON files without indentation,"
+            + " they are much smaller for large models"
+        ),
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        help=(
+            "Split each JSON file into chunk files of at most this many"
+            + " modification targets, applied by the Player Piano in"
+            + " separate sessions"
+        ),
+        type=int,
+    )
+
+    parser.add_argument(
+        "--reporter",
+        help=(
+            "Format of the reporter files written next to the JSON."
+            + " csv and none are faster for large batch runs."
+            + " Defaults to xlsx"
+        ),
+        choices=REPORTER_FORMATS,
+        default="xlsx",
+    )
+
+    parser.add_argument(
+        "--deterministic-ids",
+        help=(
+            "Derive the ids of new elements from the workbook name and the"
+            + " element names, so repeated runs write identical ids. Create"
+            + " also writes the operations in a fixed order, compare does"
+            + " not"
+        ),
+        action="store_true",
+    )
+
     parser.add_argument(
         "-v", "--version", help="version information", action="store_true"
     )
@@ -88,11 +161,33 @@ def main():
     if args.version:
         return __version__
     elif args.create:
-        return create_md_model(args.input, args.pattern, args.output)
+        return create_md_model(
+            args.input,
+            args.pattern,
+            args.output,
+            cache_dir=args.cache,
+            jobs=args.jobs,
+            graph_backend=args.graph_backend,
+            compact=args.compact,
+            chunk_size=args.chunk_size,
+            reporter=args.reporter,
+            deterministic_ids=args.deterministic_ids,
+        )
     elif args.compare:
         inputs = [args.original]
         inputs.extend(args.updated)
-        return compare_md_model(inputs, args.pattern, args.output)
+        return compare_md_model(
+            inputs,
+            args.pattern,
+            args.output,
+            cache_dir=args.cache,
+            jobs=args.jobs,
+            graph_backend=args.graph_backend,
+            compact=args.compact,
+            chunk_size=args.chunk_size,
+            reporter=args.reporter,
+            deterministic_ids=args.deterministic_ids,
+        )
     else:
         return "Not a valid input argument. Choose from create or compare"
 
@@ -5,20 +5,37 @@ the BSD 3-Clause license. See the LICENSE file for details.
 """
 
 
-import json
 import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import pandas as pd
-
-from model_processing.graph_creation import Evaluator, Manager, MDTranslator
-from model_processing.utils import json_reporter_to_excel, remove_duplicates
+from model_processing.graph_creation import (
+    Evaluator,
+    Manager,
+    MDTranslator,
+    workbook_namespace,
+)
+from model_processing.json_output import player_piano_writer
+from model_processing.pattern_registry import find_patterns, load_pattern
+from model_processing.utils import ReporterWriter, remove_duplicates
+from model_processing.workbook import is_sheet_bundle, open_workbook
 
 from . import PATTERNS
 
 
-def create_md_model(input_paths, input_patterns="", output_path=""):
+def create_md_model(
+    input_paths,
+    input_patterns="",
+    output_path="",
+    cache_dir="",
+    jobs=1,
+    graph_backend="networkx",
+    compact=False,
+    chunk_size=None,
+    reporter="xlsx",
+    deterministic_ids=False,
+):
     """
     For each Excel file in input_paths create a JSON file that creates
     the desired model in MagicDraw, as long as it corresponds to a valid
@@ -27,7 +44,9 @@ def create_md_model(input_paths, input_patterns="", output_path=""):
     Parameters
     ----------
     input_paths : list of str
-        List of strings parsed from the command line.
+        List of strings parsed from the command line. Each may be an
+        Excel file, a sheet bundle directory with one CSV or Parquet file
+        per sheet, or a directory of Excel files and sheet bundles.
 
     input_patterns : list of str
         List of paths to pattern file provided by the user.
@@ -37,6 +56,36 @@ def create_md_model(input_paths, input_patterns="", output_path=""):
         and if omitted then the output files will be placed in the same
         directory as the input files.
 
+    cache_dir : str
+        Optional directory for caching the parsed workbooks. Workbooks
+        found in the cache are not parsed again.
+
+    jobs : int
+        Number of worker processes. With more than one the workbooks are
+        spread across a process pool and a failing workbook does not stop
+        the others. Either way a per file summary is printed.
+
+    graph_backend : str
+        Graph backend of the Evaluators, 'networkx' or 'csr'.
+
+    compact : bool
+        Write the JSON files without indentation, which makes them
+        considerably smaller for large models.
+
+    chunk_size : int
+        Split each JSON file into chunk files of at most chunk_size
+        modification targets that the Player Piano applies in separate
+        sessions, see `json_output.ChunkedPlayerPianoWriter`.
+
+    reporter : str
+        Format of the reporter files, 'xlsx', 'csv' for one CSV file per
+        sheet or 'none' to skip them.
+
+    deterministic_ids : bool
+        Give new elements ids derived from the pattern, the element name
+        and the workbook name, so every run over a workbook writes the same
+        ids. Random ids are used by default.
+
     Returns
     -------
     output : JSON file
@@ -49,8 +98,20 @@ def create_md_model(input_paths, input_patterns="", output_path=""):
 
     See Also
     --------
+    create_from_workbook
     json_reporter_to_excel
     """
+    json_patterns = find_patterns(PATTERNS)
+    if not isinstance(input_patterns, list) and input_patterns:
+        input_patterns = [input_patterns]
+    if input_patterns:
+        for in_pat in map(Path, input_patterns):
+            if in_pat.is_dir():
+                new_pats = find_patterns(in_pat)
+            else:
+                new_pats = {in_pat.name.split(".")[0].lower(): in_pat}
+            json_patterns.update(new_pats)
+
     wkbk_paths = []
     here = Path(os.getcwd())
 
@@ -58,128 +119,284 @@ def create_md_model(input_paths, input_patterns="", output_path=""):
         p = Path(path)
         if not p.is_absolute():
             p = here / p
-        if p.is_dir():
-            p = list(p.glob("*.xlsx"))
+        if is_sheet_bundle(p, patterns=json_patterns):
+            p = [p]
+        elif p.is_dir():
+            bundles = [
+                d
+                for d in sorted(p.iterdir())
+                if is_sheet_bundle(d, patterns=json_patterns)
+            ]
+            p = list(p.glob("*.xlsx")) + bundles
         else:
             p = [p]
 
         wkbk_paths.extend(p)
 
-    json_patterns = {
-        pattern_path.name.split(".")[0].lower(): pattern_path
-        for pattern_path in PATTERNS.glob("*.json")
-    }
-    if not isinstance(input_patterns, list) and input_patterns:
-        input_patterns = [input_patterns]
-    if input_patterns:
-        for in_pat in map(Path, input_patterns):
-            if in_pat.is_dir():
-                new_pats = {
-                    inp.name.split(".")[0].lower(): inp
-                    for inp in in_pat.glob("*.json")
-                }
-            else:
-                new_pats = {in_pat.name.split(".")[0].lower(): in_pat}
-            json_patterns.update(new_pats)
+    create_args = [
+        (
+            wkbk,
+            json_patterns,
+            output_path,
+            cache_dir,
+            graph_backend,
+            compact,
+            chunk_size,
+            reporter,
+            deterministic_ids,
+        )
+        for wkbk in wkbk_paths
+    ]
+    if jobs and jobs > 1 and len(wkbk_paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(create_worker, create_args))
+    else:
+        results = []
+        for args in create_args:
+            status = "created" if create_from_workbook(*args) else "skipped"
+            results.append((args[0], status))
+    print_create_summary(results)
+
+
+def create_from_workbook(
+    wkbk,
+    json_patterns,
+    output_path="",
+    cache_dir="",
+    graph_backend="networkx",
+    compact=False,
+    chunk_size=None,
+    reporter="xlsx",
+    deterministic_ids=False,
+):
+    """
+    Create the JSON file and reporter for a single workbook.
 
-    for wkbk in wkbk_paths:
-        if wkbk.parts[-1].split(".")[-1] != "xlsx":
-            msg = (
-                "\n"
-                + "This program only supports Excel Files."
-                + ' "{0}" was skipped, not an Excel File'
-            ).format(wkbk.parts[-1])
-            warnings.warn(msg)
-            continue
-        xl = pd.ExcelFile(wkbk, engine="openpyxl")
-        not_found = 0
-        pattern_sheet = ""
-        for sheet in xl.sheet_names:
-            if sheet.lower() not in json_patterns.keys():
-                not_found += 1
-                if not_found == len(xl.sheet_names):
-                    warn_msg = (
-                        'The Excel File "{0}" cannot be processed as none of the worksheets match a '
-                        + "supported pattern type."
-                    ).format(wkbk.parts[-1])
-                    patterns_msg = (
-                        "The currently supported "
-                        + "patterns are: {0}".format([*json_patterns])
-                    )
-                    patts = (
-                        "New patterns may be added in the"
-                        + " ingrid/src/model_processing/patterns directory"
-                    )
-                    warnings.warn(
-                        "\n" + warn_msg + "\n" + patterns_msg + "\n" + patts
-                    )
-                    break
-                else:
-                    continue
-            else:
-                pattern_sheet = sheet.lower()
-                break
+    Parameters
+    ----------
+    wkbk : Path
+        Path to the Excel file or sheet bundle.
+
+    json_patterns : dict
+        Lower case pattern names mapped to the pattern file paths.
+
+    output_path : str
+        Desired output location, see `create_md_model`.
+
+    cache_dir : str
+        Optional directory for caching the parsed workbooks.
+
+    graph_backend : str
+        Graph backend of the Evaluator, 'networkx' or 'csr'.
+
+    compact : bool
+        Write the JSON file without indentation.
+
+    chunk_size : int
+        Split the JSON file into chunks of at most chunk_size targets.
+
+    reporter : str
+        Format of the reporter, 'xlsx', 'csv' or 'none'.
+
+    deterministic_ids : bool
+        Derive the ids of new elements from the workbook name.
+
+    Returns
+    -------
+    created : bool
+        True if the JSON file was written, False if the workbook was
+        skipped because it is not an Excel file or matches no pattern.
 
-        if pattern_sheet:
-            data = (json_patterns[pattern_sheet]).read_text()
-            data = json.loads(data)
+    See Also
+    --------
+    create_md_model
+    """
+    here = Path(os.getcwd())
+
+    if wkbk.parts[-1].split(".")[-1] != "xlsx" and not is_sheet_bundle(
+        wkbk, patterns=json_patterns
+    ):
+        msg = (
+            "\n"
+            + "This program only supports Excel Files and sheet bundles."
+            + ' "{0}" was skipped, not an Excel File'
+        ).format(wkbk.parts[-1])
+        warnings.warn(msg)
+        return False
+    xl = open_workbook(wkbk)
+    not_found = 0
+    pattern_sheet = ""
+    for sheet in xl.sheet_names:
+        if sheet.lower() not in json_patterns.keys():
+            not_found += 1
+            if not_found == len(xl.sheet_names):
+                warn_msg = (
+                    'The Excel File "{0}" cannot be processed as none of the worksheets match a '
+                    + "supported pattern type."
+                ).format(wkbk.parts[-1])
+                patterns_msg = (
+                    "The currently supported "
+                    + "patterns are: {0}".format([*json_patterns])
+                )
+                patts = (
+                    "New patterns may be added in the"
+                    + " ingrid/src/model_processing/patterns directory"
+                )
+                warnings.warn(
+                    "\n" + warn_msg + "\n" + patterns_msg + "\n" + patts
+                )
+                break
+            else:
+                continue
         else:
-            continue
-        translator = MDTranslator(
-            json_path=json_patterns[pattern_sheet], json_data=data
+            pattern_sheet = sheet.lower()
+            break
+
+    if pattern_sheet:
+        # compiled patterns are kept alongside the workbook cache
+        pattern = load_pattern(
+            json_patterns[pattern_sheet], cache_dir=cache_dir or None
         )
-        evaluator = Evaluator(excel_file=wkbk, translator=translator)
-        evaluator.rename_df_columns()
-        evaluator.add_missing_columns()
-        evaluator.to_property_di_graph()
-        property_di_graph = evaluator.prop_di_graph
-        vert_set = property_di_graph.vertex_set
-        json_out = {
-            "modification targets": [],
-            "filepath": str(wkbk.resolve()),
-        }
-        decs_json = []
-        edge_json = []
-        model_commands = {"create": [], "edges": [], "decorations": []}
-        for vertex in vert_set:
-            vert_uml, decs_uml, edge_uml = vertex.create_node_to_uml(
-                translator=translator
-            )
-            json_out["modification targets"].extend(vert_uml)
-            decs_json.extend(decs_uml)
-            edge_json.extend(edge_uml)
-            model_commands["create"].extend(vert_uml)
-            model_commands["edges"].extend(edge_uml)
-            model_commands["decorations"].extend(decs_uml)
-
-        json_out["modification targets"].extend(decs_json)
-        json_out["modification targets"].extend(edge_json)
-
-        if not output_path:
-            outfile = wkbk.parent.joinpath(wkbk.parts[-1]).with_suffix(
-                ".json"
-            )
-        else:
-            outpath = Path(output_path)
-            if not outpath.is_absolute():
-                if outpath.parts[-1] == here.parts[-1]:
-                    outpath = here
-                else:
-                    outpath = here / outpath
-            outfile = (
-                Path(outpath).joinpath(wkbk.parts[-1]).with_suffix(".json")
-            )
-
-        (outfile).write_text(json.dumps(json_out, indent=4, sort_keys=True))
-        reporter_path = Path(outfile.stem + "-reporter.xlsx")
-        json_reporter_to_excel(
-            model_commands, (outfile.parent / reporter_path)
+    else:
+        xl.close()
+        return False
+    id_namespace = None
+    if deterministic_ids:
+        id_namespace = workbook_namespace(wkbk)
+    translator = MDTranslator(
+        json_path=json_patterns[pattern_sheet],
+        json_data=pattern.data,
+        pattern=pattern,
+        id_namespace=id_namespace,
+    )
+    with xl:
+        evaluator = Evaluator(
+            excel_file=xl,
+            translator=translator,
+            cache_dir=cache_dir,
+            graph_backend=graph_backend,
+        )
+    evaluator.rename_df_columns()
+    evaluator.add_missing_columns()
+    evaluator.to_property_di_graph()
+    property_di_graph = evaluator.prop_di_graph
+    vert_set = property_di_graph.vertex_set
+    if deterministic_ids:
+        # set order varies between runs, the names are unique in the graph
+        # but integer cells give int names next to the str ones.
+        vert_set = sorted(
+            vert_set,
+            key=lambda vertex: (type(vertex.name).__name__, str(vertex.name)),
         )
 
-        print("Creation Complete")
+    if not output_path:
+        outfile = wkbk.parent.joinpath(wkbk.parts[-1]).with_suffix(".json")
+    else:
+        outpath = Path(output_path)
+        if not outpath.is_absolute():
+            if outpath.parts[-1] == here.parts[-1]:
+                outpath = here
+            else:
+                outpath = here / outpath
+        outfile = Path(outpath).joinpath(wkbk.parts[-1]).with_suffix(".json")
+
+    reporter_path = Path(outfile.stem + "-reporter.xlsx")
+    with player_piano_writer(
+        outfile,
+        header={"filepath": str(wkbk.resolve())},
+        compact=compact,
+        chunk_size=chunk_size,
+    ) as writer, ReporterWriter(
+        (outfile.parent / reporter_path), file_format=reporter
+    ) as reporter_writer:
+        for category, target in create_operations(vert_set, translator):
+            writer.write(target)
+            reporter_writer.write(category, target)
+
+    print("Creation Complete")
+    return True
+
+
+def create_operations(vertices, translator):
+    """
+    Yields the category and the modification target of every operation
+    creating the model, in the order the Player Piano applies them.
 
+    The node creations are yielded as each vertex is converted, the
+    decorations and then the edges, which refer to the created nodes,
+    follow once every node is created. Only those two categories are held
+    until then.
 
-def compare_md_model(inputs, input_patterns="", output_path=""):
+    Parameters
+    ----------
+    vertices : iterable
+        The Vertex objects of the `PropertyDiGraph`.
+
+    translator : MDTranslator
+
+    Yields
+    ------
+    category : str
+        'create', 'decorations' or 'edges'.
+
+    target : dict
+        The modification target from `Vertex.create_node_to_uml`.
+    """
+    decorations = []
+    edges = []
+    for vertex in vertices:
+        vert_uml, decs_uml, edge_uml = vertex.create_node_to_uml(
+            translator=translator
+        )
+        decorations.extend(decs_uml)
+        edges.extend(edge_uml)
+        for target in vert_uml:
+            yield "create", target
+    for target in decorations:
+        yield "decorations", target
+    for target in edges:
+        yield "edges", target
+
+
+def create_worker(args):
+    """
+    Process pool entry point for `create_from_workbook`.
+
+    Returns the workbook path and its status, one of 'created', 'skipped'
+    or 'failed: <reason>', so one bad workbook does not stop the others.
+    """
+    wkbk = args[0]
+    try:
+        if create_from_workbook(*args):
+            return wkbk, "created"
+        else:
+            return wkbk, "skipped"
+    except Exception as e:
+        return wkbk, "failed: {0!r}".format(e)
+
+
+def print_create_summary(results):
+    """
+    Print the status of each workbook from a create run.
+    """
+    created = sum(1 for _, status in results if status == "created")
+    print("Created {0} of {1} workbooks".format(created, len(results)))
+    for wkbk, status in results:
+        print("    {0}: {1}".format(Path(wkbk).name, status))
+
+
+def compare_md_model(
+    inputs,
+    input_patterns="",
+    output_path="",
+    cache_dir="",
+    jobs=1,
+    graph_backend="networkx",
+    compact=False,
+    chunk_size=None,
+    reporter="xlsx",
+    deterministic_ids=False,
+):
     """
     Produces difference files (JSON and Excel) for the original file to
     each change file provided and write model changes for created and
@@ -189,8 +406,8 @@ def compare_md_model(inputs, input_patterns="", output_path=""):
     ----------
     inputs : list of strs
         List of one or more file paths parsed from the command line.
-        This can be a path to one or more Excel files or a path to a
-        directory of Excel files.
+        This can be a path to one or more Excel files or sheet bundle
+        directories, or a path to a directory of Excel files.
 
     input_patterns : list of str
         List of paths to pattern file provided by the user.
@@ -200,6 +417,31 @@ def compare_md_model(inputs, input_patterns="", output_path=""):
         and if omitted then the output files will be placed in the same
         directory as the input files.
 
+    cache_dir : str
+        Optional directory for caching the parsed workbooks, most useful
+        for a baseline that is compared against repeatedly.
+
+    jobs : int
+        Number of worker processes. With more than one the baseline graph
+        is built once and each change file is parsed and compared to it
+        in a process pool.
+
+    graph_backend : str
+        Graph backend of the Evaluators, 'networkx' or 'csr'.
+
+    compact : bool
+        Write the JSON files without indentation.
+
+    chunk_size : int
+        Split the JSON files into chunks of at most chunk_size targets.
+
+    reporter : str
+        Format of the reporter and Model Diffs files, 'xlsx', 'csv' or
+        'none' to skip them.
+
+    deterministic_ids : bool
+        Derive the ids of new elements from the original workbook name.
+
     Returns
     -------
     output_json : JSON file
@@ -217,6 +459,17 @@ def compare_md_model(inputs, input_patterns="", output_path=""):
     json_reporter_to_excel
     changes_to_excel
     """
+    json_patterns = find_patterns(PATTERNS)
+    if not isinstance(input_patterns, list) and input_patterns:
+        input_patterns = [input_patterns]
+    if input_patterns:
+        for in_pat in map(Path, input_patterns):
+            if in_pat.is_dir():
+                new_pats = find_patterns(in_pat)
+            else:
+                new_pats = {in_pat.name.split(".")[0].lower(): in_pat}
+            json_patterns.update(new_pats)
+
     provided_paths = inputs
     wkbk_paths = []
     here = Path(os.getcwd())
@@ -225,7 +478,9 @@ def compare_md_model(inputs, input_patterns="", output_path=""):
         p = Path(path)
         if not p.is_absolute():
             p = here / p
-        if p.is_dir():
+        if is_sheet_bundle(p, patterns=json_patterns):
+            p = [p]
+        elif p.is_dir():
             p = list(p.glob("*.xlsx"))
             for path in p:
                 if counter != 0 and path.name == p[0].name:
@@ -249,33 +504,18 @@ def compare_md_model(inputs, input_patterns="", output_path=""):
         outpath = wkbk_paths[0].parent
 
     for wkbk in wkbk_paths:
-        if wkbk.parts[-1].split(".")[-1] != "xlsx":
+        if wkbk.parts[-1].split(".")[-1] != "xlsx" and not is_sheet_bundle(
+            wkbk, patterns=json_patterns
+        ):
             msg = (
                 "\n"
-                + "This program only supports Excel Files."
+                + "This program only supports Excel Files and sheet bundles."
                 + ' "{0}" was skipped, not an Excel File'
             ).format(wkbk.parts[-1])
             warnings.warn(msg)
             continue
 
-    json_patterns = {
-        pattern_path.name.split(".")[0].lower(): pattern_path
-        for pattern_path in PATTERNS.glob("*.json")
-    }
-    if not isinstance(input_patterns, list) and input_patterns:
-        input_patterns = [input_patterns]
-    if input_patterns:
-        for in_pat in map(Path, input_patterns):
-            if in_pat.is_dir():
-                new_pats = {
-                    inp.name.split(".")[0].lower(): inp
-                    for inp in in_pat.glob("*.json")
-                }
-            else:
-                new_pats = {in_pat.name.split(".")[0].lower(): in_pat}
-            json_patterns.update(new_pats)
-
-    xl = pd.ExcelFile(wkbk_paths[0], engine="openpyxl")
+    xl = open_workbook(wkbk_paths[0])
     not_found = 0
     pattern_sheet = ""
     for sheet in xl.sheet_names:
@@ -304,6 +544,7 @@ def compare_md_model(inputs, input_patterns="", output_path=""):
             pattern_sheet = sheet.lower()
             break
     if not pattern_sheet:
+        xl.close()
         raise RuntimeError(
             "No matching pattern found nor provided."
             + " Check the sheet names and try again."
@@ -311,7 +552,19 @@ def compare_md_model(inputs, input_patterns="", output_path=""):
 
     pattern = json_patterns[pattern_sheet]
 
-    manager = Manager(excel_path=wkbk_paths, json_path=[pattern])
+    # hand the baseline handle to the Manager so it is opened at most once
+    with xl:
+        manager = Manager(
+            excel_path=[xl] + wkbk_paths[1:],
+            json_path=[pattern],
+            cache_dir=cache_dir,
+            jobs=jobs,
+            graph_backend=graph_backend,
+            compact=compact,
+            chunk_size=chunk_size,
+            reporter=reporter,
+            deterministic_ids=deterministic_ids,
+        )
     for evaluator in manager.evaluators:
         evaluator.rename_df_columns()
         evaluator.add_missing_columns()
@@ -5,36 +5,54 @@ the BSD 3-Clause license. See the LICENSE file for details.
 """
 
 
-import json
 import uuid
-from copy import copy, deepcopy
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from functools import partial
-from itertools import combinations
+from itertools import zip_longest
 from pathlib import Path
 
-import networkx as nx
 import pandas as pd
 
 from . import OUTPUT_DIRECTORY, PATTERNS
-from .graph_objects import DiEdge, PropertyDiGraph, Vertex
+from .graph_objects import GRAPH_BACKENDS, Vertex
+from .json_output import player_piano_writer
+from .pattern_registry import Pattern, load_pattern
 from .utils import (
+    ReporterWriter,
     associate_node_id,
     associate_node_types_settings,
-    associate_predecessors,
     associate_renames,
-    associate_successors,
     build_dict,
+    build_rename_automaton,
+    build_value_index,
+    compose_renames,
     create_column_values_singleton,
     create_column_values_space,
     create_column_values_under,
-    json_reporter_to_excel,
     make_object,
     match_changes,
-    remove_duplicates,
+    replace_values,
     set_newname_as_rename_index,
+    setting_key,
     to_excel_df,
+    to_uml_id,
     truncate_microsec,
+    unique_operations,
+    write_csv,
+    write_xlsx,
+)
+from .workbook import (
+    ID_SHEET_NAMES,
+    RENAME_SHEET_NAMES,
+    WorkbookCache,
+    read_excel_sheets,
+)
+
+# namespace of the deterministic ids minted by the MDTranslator
+ID_NAMESPACE = uuid.uuid5(
+    uuid.NAMESPACE_URL, "https://github.com/gtri/rapid-modeling-tools"
 )
 
 
@@ -55,12 +73,42 @@ class Manager:
     Parameters
     ----------
     excel_path : list
-        list of paths to Excel Files, parsed from the command line.
+        list of paths to Excel Files, parsed from the command line, or
+        already opened `Workbook` handles.
 
     json_path : list
         string indicating which JSON file to load from the patterns
         directory.
 
+    cache_dir : str or Path
+        Optional directory for the `WorkbookCache` shared by the
+        Evaluators.
+
+    jobs : int
+        Number of worker processes used to compare the change files. With
+        more than one, only the baseline Evaluator is created up front and
+        each change file is parsed, turned into a graph and compared to
+        the baseline in a worker process by `get_pattern_graph_diff`.
+
+    graph_backend : str
+        Graph backend used by the Evaluators, see `Evaluator`.
+
+    compact : bool
+        Write the Player Piano JSON files without indentation.
+
+    chunk_size : int
+        Split the Player Piano JSON files into chunks of at most chunk_size
+        modification targets, see `json_output.ChunkedPlayerPianoWriter`.
+
+    reporter : str
+        Format of the reporter and Model Diffs files, 'xlsx', 'csv' or
+        'none' to skip them.
+
+    deterministic_ids : bool
+        Derive the ids of new nodes from the pattern, the node name and
+        the name of the first Excel file instead of minting random ones,
+        see `workbook_namespace`.
+
     Attributes
     ----------
     json_data : dict
@@ -71,14 +119,39 @@ class Manager:
 
     evaluators : Evaluator
         list of the Evaluators created for each Excel file in the excel_path.
-        len(evaluators) == len(excel_path)
+        len(evaluators) == len(excel_path) unless the change files are
+        left to the worker processes.
+
+    change_files : list
+        Change Excel files left to the worker processes, empty unless
+        jobs > 1.
     """
 
-    def __init__(self, excel_path=None, json_path=None):
+    def __init__(
+        self,
+        excel_path=None,
+        json_path=None,
+        cache_dir=None,
+        jobs=1,
+        graph_backend="networkx",
+        compact=False,
+        chunk_size=None,
+        reporter="xlsx",
+        deterministic_ids=False,
+    ):
         self.excel_path = excel_path
         self.json_path = json_path
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.graph_backend = graph_backend
+        self.compact = compact
+        self.chunk_size = chunk_size
+        self.reporter = reporter
+        self.deterministic_ids = deterministic_ids
         self.json_data = None
         self.translator = None
+        self.change_files = []
+        self.change_translator = None
         if self.json_path:
             self.get_json_data()
         self.evaluators = []
@@ -89,12 +162,20 @@ class Manager:
         """ Load the json data using the json_path"""
         self.json_data = []
         self.translator = []
+        id_namespace = None
+        if self.deterministic_ids and self.excel_path:
+            id_namespace = workbook_namespace(self.excel_path[0])
         if len(self.json_path) >= 1:
             for data_file in self.json_path:
-                data = json.loads(Path(data_file).read_text())
-                self.json_data.append(data)
+                pattern = load_pattern(data_file, cache_dir=self.cache_dir)
+                self.json_data.append(pattern.data)
                 self.translator.append(
-                    MDTranslator(json_path=Path(data_file), json_data=data)
+                    MDTranslator(
+                        json_path=Path(data_file),
+                        json_data=pattern.data,
+                        pattern=pattern,
+                        id_namespace=id_namespace,
+                    )
                 )
 
     def create_evaluators(self):
@@ -104,7 +185,12 @@ class Manager:
         if len(self.translator) > 1 and len(self.excel_path) == 1:
             for tr in self.translator:
                 self.evaluators.append(
-                    Evaluator(excel_file=self.excel_path[0], translator=tr)
+                    Evaluator(
+                        excel_file=self.excel_path[0],
+                        translator=tr,
+                        cache_dir=self.cache_dir,
+                        graph_backend=self.graph_backend,
+                    )
                 )
         elif len(self.translator) == 1 and len(self.excel_path) >= 1:
             # TODO: Include a flag from the commands to the manager to pass to
@@ -113,8 +199,23 @@ class Manager:
             # files if multiple create files in a create command. Issue?
             path_name = [excel_file.name for excel_file in self.excel_path]
 
-            # For compare each changed excel file gets a copy of the original
-            # translator.
+            # For compare each changed excel file gets an overlay of the
+            # original translator, see MDTranslator.overlay.
+            if self.jobs and self.jobs > 1 and len(self.excel_path) > 2:
+                self.evaluators.append(
+                    Evaluator(
+                        excel_file=self.excel_path[0],
+                        translator=self.translator[0].overlay(),
+                        cache_dir=self.cache_dir,
+                        graph_backend=self.graph_backend,
+                    )
+                )
+                # snapshot before the baseline graph adds its own uuids
+                self.change_translator = self.evaluators[
+                    0
+                ].translator.overlay()
+                self.change_files = list(self.excel_path[1:])
+                return
             for count, excel_file in enumerate(self.excel_path):
                 if count != 0:  # TODO: flag to indicate create or compare
                     translator = self.evaluators[0].translator
@@ -122,7 +223,10 @@ class Manager:
                     translator = self.translator[0]
                 self.evaluators.append(
                     Evaluator(
-                        excel_file=excel_file, translator=deepcopy(translator)
+                        excel_file=excel_file,
+                        translator=translator.overlay(),
+                        cache_dir=self.cache_dir,
+                        graph_backend=self.graph_backend,
                     )
                 )
         else:
@@ -183,127 +287,52 @@ class Manager:
         changes_to_excel
         graph_difference_to_json
         """
-        evaluator_dict = {
-            evaluator: index
-            for index, evaluator in enumerate(self.evaluators)
-        }
         self.evaluator_change_dict = {}
         orig_eval = self.evaluators[0]
-
-        for pair in combinations(self.evaluators, 2):
-            # Checking if Evaluator has a rename dataframe
-            if evaluator_dict[pair[0]] != 0 and evaluator_dict[pair[1]] != 0:
-                continue  # skip because this is comparing diff to diff
-
-            eval_1_e_dict = pair[0].prop_di_graph.edge_dict
-            eval_2_e_dict = pair[1].prop_di_graph.edge_dict
-
-            edge_set_one = pair[0].edge_set  # get baseline edge set
-            edge_set_two = pair[1].edge_set  # get the changed edge set
-
-            # remove common edges
-            # have to do this with named edges.
-            # TODO: implement __eq__ and __neq__ methods to the DiEdge then
-            # these set operations can be done without casting to str then
-            # casting back.
-            edge_set_one_set = {
-                edge.named_edge_triple for edge in edge_set_one
-            }
-            edge_set_two_set = {
-                edge.named_edge_triple for edge in edge_set_two
-            }
-
-            # Remove edges common to each but preserve set integrity for
-            # each evaluator
-            eval_one_unmatched_named = list(
-                edge_set_one_set.difference(edge_set_two_set)
-            )
-            eval_two_unmatched_named = list(
-                edge_set_two_set.difference(edge_set_one_set)
-            )
-
-            # Organize edges in dictionary based on type (this goes on for
-            # multiple lines)
-            eval_one_unmatched = [
-                eval_1_e_dict[edge] for edge in eval_one_unmatched_named
+        # each Change only needs comparing to the Original, when change
+        # files are left to the workers the baseline graph, the translator
+        # snapshot and the settings are shipped to each worker once, the
+        # tasks only carry the change file and the results come back in
+        # change file order.
+
+        if self.change_files:
+            change_args = [
+                (excel_file, "0-{0}".format(count))
+                for count, excel_file in enumerate(self.change_files, start=1)
             ]
-            eval_two_unmatched = [
-                eval_2_e_dict[edge] for edge in eval_two_unmatched_named
-            ]
-
-            eval_one_unmatch_map = dict(
-                (edge.edge_attribute, list()) for edge in eval_one_unmatched
-            )
-            eval_two_unmatch_map = dict(
-                (edge.edge_attribute, list()) for edge in eval_two_unmatched
-            )
-
-            for edge in eval_one_unmatched:
-                eval_one_unmatch_map[edge.edge_attribute].append(edge)
-            for edge in eval_two_unmatched:
-                eval_two_unmatch_map[edge.edge_attribute].append(edge)
-
-            eval_one_unmatch_pref = {}
-            eval_two_unmatch_pref = {}
-
-            ance_keys_not_in_base = set(
-                eval_two_unmatch_map.keys()
-            ).difference(set(eval_one_unmatch_map.keys()))
-
-            eval_one_unmatch_pref["Added"] = []
-            eval_one_unmatch_pref["Deleted"] = []
-            # TODO: Find new edges if the edge type is new but also
-            # if the edge is composed of new model elements.
-            for edge_type in ance_keys_not_in_base:
-                eval_one_unmatch_pref["Added"].extend(
-                    eval_two_unmatch_map[edge_type]
-                )
-            for edge in edge_set_two:
-                src, trg = edge.source, edge.target
-                if isinstance(src.id, type(uuid.uuid4())):
-                    eval_one_unmatch_pref["Added"].append(edge)
-                elif isinstance(trg.id, type(uuid.uuid4())):
-                    eval_one_unmatch_pref["Added"].append(edge)
-
-            # builds main dict used for matching and determines add/del edges
-            for edge in eval_one_unmatched:
-                if edge.edge_attribute not in eval_two_unmatch_map.keys():
-                    eval_one_unmatch_pref["Deleted"].append(edge)
-                else:
-                    eval_one_unmatch_pref[edge] = copy(
-                        eval_two_unmatch_map[edge.edge_attribute]
-                    )
-            for edge in eval_two_unmatched:
-                if edge.edge_attribute not in eval_one_unmatch_map.keys():
-                    eval_two_unmatch_pref[edge] = []
-                else:
-                    eval_two_unmatch_pref[edge] = copy(
-                        eval_one_unmatch_map[edge.edge_attribute]
-                    )
-
-            # Run the matching algorithm
-            # Always expect the input dict to be Original: Changes.
-            # Functions down the line hold this expectation.
-            eval_one_matches = match_changes(
-                change_dict=eval_one_unmatch_pref
-            )
-
-            changes_and_unstable = {
-                "Changes": eval_one_matches[0],
-                "Unstable Pairs": eval_one_matches[1],
+            settings = {
+                "cache_dir": self.cache_dir,
+                "graph_backend": self.graph_backend,
+                "compact": self.compact,
+                "chunk_size": self.chunk_size,
+                "reporter": self.reporter,
+                "out_directory": out_directory,
             }
-
-            key = "{0}-{1}".format(
-                evaluator_dict[pair[0]], evaluator_dict[pair[1]]
-            )
-
-            self.graph_difference_to_json(
-                change_dict=eval_one_matches[0],
-                translator=pair[1].translator,
-                evaluators=key,
-                out_directory=out_directory,
-            )
-            self.evaluator_change_dict.update({key: changes_and_unstable})
+            with ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=set_baseline_evaluator,
+                initargs=(orig_eval, self.change_translator, settings),
+            ) as executor:
+                # map preserves the order of the change files
+                for key, changes_and_unstable in executor.map(
+                    diff_change_file, change_args
+                ):
+                    self.evaluator_change_dict.update(
+                        {key: changes_and_unstable}
+                    )
+        else:
+            for count, change_eval in enumerate(self.evaluators[1:], start=1):
+                key = "0-{0}".format(count)
+                changes_and_unstable = diff_evaluators(
+                    orig_eval=orig_eval,
+                    change_eval=change_eval,
+                    key=key,
+                    out_directory=out_directory,
+                    compact=self.compact,
+                    chunk_size=self.chunk_size,
+                    reporter=self.reporter,
+                )
+                self.evaluator_change_dict.update({key: changes_and_unstable})
 
         return self.evaluator_change_dict
 
@@ -354,6 +383,8 @@ class Manager:
         """
         # TODO: When length of value > 1 put these changes into
         # Unstable Original: [key*len(value)] Unstable Change: [value]
+        if self.reporter == "none":
+            return
         for key in self.evaluator_change_dict:
             outfile = Path(
                 "Model Diffs {0}-{1}.xlsx".format(
@@ -384,13 +415,15 @@ class Manager:
                 data_dict=input_dict, column_keys=column_headers
             )
 
-            df_output = pd.DataFrame(
-                data=dict([(k, pd.Series(v)) for k, v in df_data.items()])
-            )
-
-            df_output.to_excel(
-                (outdir / outfile), sheet_name=key, index=False
-            )
+            # columns of different lengths are padded with empty cells
+            header = list(df_data)
+            rows = zip_longest(*df_data.values())
+            if self.reporter == "csv":
+                write_csv(
+                    (outdir / outfile.with_suffix(".csv")), header, rows
+                )
+            else:
+                write_xlsx((outdir / outfile), [(key, header, rows)])
 
     def graph_difference_to_json(
         self,
@@ -401,215 +434,480 @@ class Manager:
     ):
         """
         Produce MagicDraw JSON instruction for Player Piano from the
-        confidently identified changes.
-
-        This method returns a change list, Python list of dictionaries
-        containing MagicDraw instructions, and a JSON file in the
-        out_directory, if provided otherwise in the same directory as the
-        input files. JSON instructions created for Added edges, Deleted
-        edges and changed edges. For Added edges, if the source and target
-        nodes have already been created during this function call then
-        just provide instructions to create the new edges, otherwise
-        create the source and target nodes then link them with an edge. For
-        all Deleted edges, each edge in the list receives a delete operation
-        intentionally leaving the source and target nodes in the model in case
-        they fulfill other roles. Changed edges have two main categories with
-        three subcategories. First, a change edge can either involve a renamed
-        source or target node or a newly created source or target node. Once
-        identified as a rename (respectively newly created), the edge is
-        sorted into three scenarios, both the source and target node represent
-        renamed (respectively new) nodes, or the source or target node
-        corresponds to a rename (respectively new) node operation. After
-        identifying all of the changes and producing the associated
-        dictionaries, the operations are sorted to place created nodes and
-        their decorations first, followed by deleted edges, renamed nodes and
-        ending with added edges.
+        confidently identified changes, written with the output options
+        of the `Manager`.
 
-        Parameters
-        ----------
-        change_dict : dict
-            Dictionary of confident changes. Two static keys 'Added' and
-            'Deleted' with associated lists of added and deleted nodes
-            respectively. The remaining key value pairs in the change_dict
-            represent confident changes with the key being an edge from the
-            original Evaluator and the value being a list comprised of the
-            likely change edge.
+        See Also
+        --------
+        graph_difference_to_json
+        """
+        return graph_difference_to_json(
+            change_dict=change_dict,
+            translator=translator,
+            evaluators=evaluators,
+            out_directory=out_directory,
+            compact=self.compact,
+            chunk_size=self.chunk_size,
+            reporter=self.reporter,
+        )
 
-        translator : MDTranslator
-            MagicDraw Translator object associated with the current update
-            evaluator.
 
-        evaluators : str
-            Number of the two evaluators under consideration. The original
-            evaluator always receives the number 0 while each change evaluator
-            has a number 1-n with n being the nth evaluator.
+# state shared by the tasks of a compare worker process, see
+# set_baseline_evaluator
+BASELINE_EVALUATOR = None
+CHANGE_TRANSLATOR = None
+CHANGE_SETTINGS = {}
 
-        out_directory : str
-            String specifying the output directory
 
-        Returns
-        -------
-        change_list : list of dicts
-            The list of change instructions. NOTE: This function also
-            generates a JSON file and places it in the `out_directory`
-            if specified otherwise it places the JSON file in the same
-            directory as the input file.
+def workbook_namespace(workbook):
+    """
+    Returns the UUID namespace for the deterministic ids of the new nodes
+    of a workbook, derived from the workbook file name.
 
-        Notes
-        -----
-        Any edge not meeting one of the eight criteria defined will fall
-        through to the else case and become an edge replace operation.
-        The `get_pattern_graph_diff()` method automatically calls this method.
+    Parameters
+    ----------
+    workbook : str, Path or Workbook
+        The Excel file or an already opened `Workbook`.
 
-        See Also
-        --------
-        get_pattern_graph_diff
-        json_reporter_to_excel
-        """
-        # need to strip off the keys that are strings and use them to
-        # determine what kinds of ops I need to preform.
-        # Naked Key: Value pairs mean delete edge key and add value key.
-        # Purposefully excluding unstable pairs because the Human can make
-        # those changes so they are clear.
-        static_keys = ["Added", "Deleted"]
-        change_list = []
-        edge_del = []
-        edge_add = []
-        node_renames = []
-        create_node = []
-        node_dec = []
-
-        # initially populates with translator ids that are not uuid objs.
-        # TODO: This ignores renames
-        seen_ids = set()
-        for k, v in translator.uml_id.items():
-            if isinstance(v, str):
-                seen_ids.add(v)
-
-        for key, value in change_dict.items():
-            if key == "Added":
-                # Create added edges if have not been created yet
-                for edge in value:
-                    edge_source, edge_target = edge.source, edge.target
-                    if edge_source.id not in seen_ids:
-                        seen_ids.add(edge_source.id)
-                        s_cr, s_dec, s_edg = edge_source.create_node_to_uml(
-                            translator=translator
-                        )
-                        create_node.extend(s_cr)
-                        node_dec.extend(s_dec)
-                        edge_add.extend(s_edg)
-                    if edge_target.id not in seen_ids:
-                        seen_ids.add(edge_target.id)
-                        t_cr, t_dec, t_edg = edge_target.create_node_to_uml(
-                            translator=translator
-                        )
-                        create_node.extend(t_cr)
-                        node_dec.extend(t_dec)
-                        edge_add.extend(t_edg)
-                    edge_add.append(
-                        edge.edge_to_uml(op="replace", translator=translator)
-                    )
-            elif key == "Deleted":
-                # deleted edges, this is the only command to issue a delete op
-                for edge in value:
-                    edge_del.append(
-                        edge.edge_to_uml(op="delete", translator=translator)
+    Returns
+    -------
+    namespace : UUID
+    """
+    path = Path(getattr(workbook, "path", workbook))
+    return uuid.uuid5(ID_NAMESPACE, path.name)
+
+
+def set_baseline_evaluator(evaluator, translator=None, settings=None):
+    """
+    Process pool initializer storing the baseline Evaluator, with its
+    graph built, in the worker process.
+
+    Parameters
+    ----------
+    evaluator : Evaluator
+        The baseline Evaluator.
+
+    translator : MDTranslator
+        Snapshot of the baseline translator, each change file gets an
+        overlay of it, see `MDTranslator.overlay`.
+
+    settings : dict
+        The cache directory, graph backend, compact, chunk size, reporter
+        and output directory shared by every change file.
+    """
+    global BASELINE_EVALUATOR, CHANGE_TRANSLATOR, CHANGE_SETTINGS
+    BASELINE_EVALUATOR = evaluator
+    CHANGE_TRANSLATOR = translator
+    CHANGE_SETTINGS = dict(settings or {})
+
+
+def diff_evaluators(
+    orig_eval=None,
+    change_eval=None,
+    key="",
+    out_directory="",
+    compact=False,
+    chunk_size=None,
+    reporter="xlsx",
+):
+    """
+    Compares the graph of the Original Evaluator to the graph of a
+    single Change Evaluator and writes the resulting change JSON.
+
+    Parameters
+    ----------
+    orig_eval : Evaluator
+        Evaluator of the Original Excel file with its graph built.
+
+    change_eval : Evaluator
+        Evaluator of a Change Excel file with its graph built.
+
+    key : str
+        Numbers of the two evaluators, e.g. '0-1', used to name the
+        output files.
+
+    out_directory : str
+        Desired directory for the output files.
+
+    compact : bool
+        Write the JSON without indentation.
+
+    chunk_size : int
+        Optional number of operations per JSON file.
+
+    reporter : str
+        Reporter format, 'xlsx', 'csv' or 'none'.
+
+    Returns
+    -------
+    changes_and_unstable : dict
+        Changes and Unstable Pairs found by `match_changes`.
+
+    See Also
+    --------
+    Manager.get_pattern_graph_diff
+    graph_difference_to_json
+    """
+    edge_set_one = orig_eval.edge_set  # get baseline edge set
+    edge_set_two = change_eval.edge_set  # get the changed edge set
+
+    # Remove edges common to each but preserve set integrity for
+    # each evaluator, DiEdges compare by their named edge triple and
+    # the difference keeps the edge objects of the left hand set.
+    eval_one_unmatched = list(edge_set_one.difference(edge_set_two))
+    eval_two_unmatched = list(edge_set_two.difference(edge_set_one))
+
+    # Organize edges in dictionary based on type (this goes on for
+    # multiple lines)
+
+    eval_one_unmatch_map = dict(
+        (edge.edge_attribute, list()) for edge in eval_one_unmatched
+    )
+    eval_two_unmatch_map = dict(
+        (edge.edge_attribute, list()) for edge in eval_two_unmatched
+    )
+
+    for edge in eval_one_unmatched:
+        eval_one_unmatch_map[edge.edge_attribute].append(edge)
+    for edge in eval_two_unmatched:
+        eval_two_unmatch_map[edge.edge_attribute].append(edge)
+
+    eval_one_unmatch_pref = {}
+    eval_two_unmatch_pref = {}
+
+    ance_keys_not_in_base = set(eval_two_unmatch_map.keys()).difference(
+        set(eval_one_unmatch_map.keys())
+    )
+
+    eval_one_unmatch_pref["Added"] = []
+    eval_one_unmatch_pref["Deleted"] = []
+    # TODO: Find new edges if the edge type is new but also
+    # if the edge is composed of new model elements.
+    for edge_type in ance_keys_not_in_base:
+        eval_one_unmatch_pref["Added"].extend(eval_two_unmatch_map[edge_type])
+    for edge in edge_set_two:
+        src, trg = edge.source, edge.target
+        if isinstance(src.id, type(uuid.uuid4())):
+            eval_one_unmatch_pref["Added"].append(edge)
+        elif isinstance(trg.id, type(uuid.uuid4())):
+            eval_one_unmatch_pref["Added"].append(edge)
+
+    # builds main dict used for matching and determines add/del edges
+    # edges of one type share a single list of potential matches so
+    # match_changes indexes it once for the edge type.
+    for edge in eval_one_unmatched:
+        if edge.edge_attribute not in eval_two_unmatch_map.keys():
+            eval_one_unmatch_pref["Deleted"].append(edge)
+        else:
+            eval_one_unmatch_pref[edge] = eval_two_unmatch_map[
+                edge.edge_attribute
+            ]
+    for edge in eval_two_unmatched:
+        if edge.edge_attribute not in eval_one_unmatch_map.keys():
+            eval_two_unmatch_pref[edge] = []
+        else:
+            eval_two_unmatch_pref[edge] = eval_one_unmatch_map[
+                edge.edge_attribute
+            ]
+
+    # Run the matching algorithm
+    # Always expect the input dict to be Original: Changes.
+    # Functions down the line hold this expectation.
+    eval_one_matches = match_changes(change_dict=eval_one_unmatch_pref)
+    changes_and_unstable = {
+        "Changes": eval_one_matches[0],
+        "Unstable Pairs": eval_one_matches[1],
+    }
+
+    graph_difference_to_json(
+        change_dict=eval_one_matches[0],
+        translator=change_eval.translator,
+        evaluators=key,
+        out_directory=out_directory,
+        compact=compact,
+        chunk_size=chunk_size,
+        reporter=reporter,
+    )
+    return changes_and_unstable
+
+
+def graph_difference_to_json(
+    change_dict=None,
+    translator=None,
+    evaluators="",
+    out_directory="",
+    compact=False,
+    chunk_size=None,
+    reporter="xlsx",
+):
+    """
+    Produce MagicDraw JSON instruction for Player Piano from the
+    confidently identified changes.
+
+    This function returns a change list, Python list of dictionaries
+    containing MagicDraw instructions, and a JSON file in the
+    out_directory, if provided otherwise in the same directory as the
+    input files. JSON instructions created for Added edges, Deleted
+    edges and changed edges. For Added edges, if the source and target
+    nodes have already been created during this function call then
+    just provide instructions to create the new edges, otherwise
+    create the source and target nodes then link them with an edge. For
+    all Deleted edges, each edge in the list receives a delete operation
+    intentionally leaving the source and target nodes in the model in case
+    they fulfill other roles. Changed edges have two main categories with
+    three subcategories. First, a change edge can either involve a renamed
+    source or target node or a newly created source or target node. Once
+    identified as a rename (respectively newly created), the edge is
+    sorted into three scenarios, both the source and target node represent
+    renamed (respectively new) nodes, or the source or target node
+    corresponds to a rename (respectively new) node operation. After
+    identifying all of the changes and producing the associated
+    dictionaries, the operations are sorted to place created nodes and
+    their decorations first, followed by deleted edges, renamed nodes and
+    ending with added edges.
+
+    Parameters
+    ----------
+    change_dict : dict
+        Dictionary of confident changes. Two static keys 'Added' and
+        'Deleted' with associated lists of added and deleted nodes
+        respectively. The remaining key value pairs in the change_dict
+        represent confident changes with the key being an edge from the
+        original Evaluator and the value being a list comprised of the
+        likely change edge.
+
+    translator : MDTranslator
+        MagicDraw Translator object associated with the current update
+        evaluator.
+
+    evaluators : str
+        Number of the two evaluators under consideration. The original
+        evaluator always receives the number 0 while each change evaluator
+        has a number 1-n with n being the nth evaluator.
+
+    out_directory : str
+        String specifying the output directory
+
+    compact : bool
+        Write the JSON without indentation.
+
+    chunk_size : int
+        Optional number of operations per JSON file.
+
+    reporter : str
+        Reporter format, 'xlsx', 'csv' or 'none'.
+
+    Returns
+    -------
+    change_list : list of dicts
+        The list of change instructions. NOTE: This function also
+        generates a JSON file and places it in the `out_directory`
+        if specified otherwise it places the JSON file in the same
+        directory as the input file.
+
+    Notes
+    -----
+    Any edge not meeting one of the eight criteria defined will fall
+    through to the else case and become an edge replace operation.
+    `diff_evaluators` automatically calls this function.
+
+    See Also
+    --------
+    diff_evaluators
+    ReporterWriter
+    """
+    # need to strip off the keys that are strings and use them to
+    # determine what kinds of ops I need to preform.
+    # Naked Key: Value pairs mean delete edge key and add value key.
+    # Purposefully excluding unstable pairs because the Human can make
+    # those changes so they are clear.
+    static_keys = ["Added", "Deleted"]
+    change_list = []
+    edge_del = []
+    edge_add = []
+    node_renames = []
+    create_node = []
+    node_dec = []
+
+    # initially populates with translator ids that are not uuid objs.
+    # TODO: This ignores renames
+    seen_ids = set()
+    for k, v in translator.uml_id.items():
+        if isinstance(v, str):
+            seen_ids.add(v)
+
+    for key, value in change_dict.items():
+        if key == "Added":
+            # Create added edges if have not been created yet
+            for edge in value:
+                edge_source, edge_target = edge.source, edge.target
+                if edge_source.id not in seen_ids:
+                    seen_ids.add(edge_source.id)
+                    s_cr, s_dec, s_edg = edge_source.create_node_to_uml(
+                        translator=translator
                     )
-            else:  # All other keys are <DiEdge>: [<DiEdge>]
-                source_val, target_val = value[0].source, value[0].target
-                # Using filter as mathematical ~selective~ or.
-                # TODO: rewrite this to be more explicit, google style does
-                # not approve of this approach.
-                eligible = list(
-                    filter(
-                        lambda x: x.id not in seen_ids,
-                        [source_val, target_val],
+                    create_node.extend(s_cr)
+                    node_dec.extend(s_dec)
+                    edge_add.extend(s_edg)
+                if edge_target.id not in seen_ids:
+                    seen_ids.add(edge_target.id)
+                    t_cr, t_dec, t_edg = edge_target.create_node_to_uml(
+                        translator=translator
                     )
+                    create_node.extend(t_cr)
+                    node_dec.extend(t_dec)
+                    edge_add.extend(t_edg)
+                edge_add.append(
+                    edge.edge_to_uml(op="replace", translator=translator)
                 )
-                # List consisting of at most 2 items s.t. has_rename returns T
-                has_rename = list(
-                    filter(lambda x: x.has_rename, [source_val, target_val])
+        elif key == "Deleted":
+            # deleted edges, this is the only command to issue a delete op
+            for edge in value:
+                edge_del.append(
+                    edge.edge_to_uml(op="delete", translator=translator)
                 )
-                # List consisting of at most 2 items s.t. id is type uuid
-                is_new = list(
-                    filter(
-                        lambda x: isinstance(x.id, type(uuid.uuid4())),
-                        [source_val, target_val],
-                    )
+        else:  # All other keys are <DiEdge>: [<DiEdge>]
+            source_val, target_val = value[0].source, value[0].target
+            # Using filter as mathematical ~selective~ or.
+            # TODO: rewrite this to be more explicit, google style does
+            # not approve of this approach.
+            eligible = list(
+                filter(
+                    lambda x: x.id not in seen_ids, [source_val, target_val],
                 )
+            )
+            # List consisting of at most 2 items s.t. has_rename returns T
+            has_rename = list(
+                filter(lambda x: x.has_rename, [source_val, target_val])
+            )
+            # List consisting of at most 2 items s.t. id is type uuid
+            is_new = list(
+                filter(
+                    lambda x: isinstance(x.id, type(uuid.uuid4())),
+                    [source_val, target_val],
+                )
+            )
 
-                if has_rename:
-                    for node in has_rename:
-                        seen_ids.add(node.id)
-                        node_renames.append(
-                            node.change_node_to_uml(translator=translator)
-                        )
-                    else:  # Create edge since the change node uml does not
-                        edge_add.append(
-                            value[0].edge_to_uml(
-                                op="replace", translator=translator
-                            )
-                        )
-                if is_new:
-                    for node in is_new:
-                        seen_ids.add(node.id)
-                        n_cr, n_dec, n_edg = node.create_node_to_uml(
-                            translator=translator
-                        )
-                        create_node.extend(n_cr)
-                        node_dec.extend(n_dec)
-                        edge_add.extend(n_edg)
-                    else:
-                        edge_add.append(
-                            value[0].edge_to_uml(
-                                op="replace", translator=translator
-                            )
+            if has_rename:
+                for node in has_rename:
+                    seen_ids.add(node.id)
+                    node_renames.append(
+                        node.change_node_to_uml(translator=translator)
+                    )
+                else:  # Create edge since the change node uml does not
+                    edge_add.append(
+                        value[0].edge_to_uml(
+                            op="replace", translator=translator
                         )
-                # if both source and target are known just replace the edge
-                if not has_rename and not is_new:
+                    )
+            if is_new:
+                for node in is_new:
+                    seen_ids.add(node.id)
+                    n_cr, n_dec, n_edg = node.create_node_to_uml(
+                        translator=translator
+                    )
+                    create_node.extend(n_cr)
+                    node_dec.extend(n_dec)
+                    edge_add.extend(n_edg)
+                else:
                     edge_add.append(
                         value[0].edge_to_uml(
                             op="replace", translator=translator
                         )
                     )
+            # if both source and target are known just replace the edge
+            if not has_rename and not is_new:
+                edge_add.append(
+                    value[0].edge_to_uml(op="replace", translator=translator)
+                )
 
-        # remove_duplicates only has local knowledge
-        model_commands = {}
-        if create_node:
-            change_list.extend(remove_duplicates(create_node, create=True))
-            change_list.extend(remove_duplicates(node_dec))
-        change_list.extend(remove_duplicates(edge_del))
-        change_list.extend(remove_duplicates(node_renames, create=True))
-        change_list.extend(remove_duplicates(edge_add))
-
-        json_out = {"modification targets": []}
-        json_out["modification targets"].extend(change_list)
-        outfile = Path(
-            "graph_diff_changes_{0}({1}).json".format(
-                evaluators, truncate_microsec(curr_time=datetime.now())
-            )
+    # the emitted operations are deduplicated in a single pass, the
+    # JSON, the reporter and the change list share the result.
+    categories = [
+        ("create", create_node),
+        ("decorations", node_dec),
+        ("edge delete", edge_del),
+        ("node renames", node_renames),
+        ("edge add", edge_add),
+    ]
+    operations = unique_operations(
+        (
+            (category, target)
+            for category, targets in categories
+            for target in targets
+        ),
+        create_categories=("create", "node renames"),
+    )
+
+    outfile = Path(
+        "graph_diff_changes_{0}({1}).json".format(
+            evaluators, truncate_microsec(curr_time=datetime.now())
         )
+    )
 
-        if out_directory:
-            outdir = out_directory
-        else:
-            outdir = OUTPUT_DIRECTORY
+    if out_directory:
+        outdir = out_directory
+    else:
+        outdir = OUTPUT_DIRECTORY
 
-        (outdir / outfile).write_text(
-            json.dumps(json_out, indent=4, sort_keys=True)
-        )
-        model_commands["create"] = remove_duplicates(create_node, create=True)
-        model_commands["decorations"] = remove_duplicates(node_dec)
-        model_commands["edge delete"] = remove_duplicates(edge_del)
-        model_commands["node renames"] = remove_duplicates(
-            node_renames, create=True
-        )
-        model_commands["edge add"] = remove_duplicates(edge_add)
-        reporter_file = Path(outfile.stem + "-reporter.xlsx")
-        json_reporter_to_excel(model_commands, (outdir / reporter_file))
+    reporter_file = Path(outfile.stem + "-reporter.xlsx")
+    with player_piano_writer(
+        outdir / outfile, compact=compact, chunk_size=chunk_size
+    ) as writer, ReporterWriter(
+        (outdir / reporter_file), file_format=reporter
+    ) as reporter_writer:
+        for category, target in operations:
+            writer.write(target)
+            reporter_writer.write(category, target)
+            change_list.append(target)
+
+    return change_list
+
+
+def diff_change_file(args):
+    """
+    Process pool entry point comparing one change file to the baseline.
+
+    Parameters
+    ----------
+    args : tuple
+        The change Excel file and the evaluator key, e.g. '0-1'. The rest
+        is stored in the worker by `set_baseline_evaluator`.
+
+    Returns
+    -------
+    key : str
+        The evaluator key passed in.
 
-        return change_list
+    changes_and_unstable : dict
+        Changes and Unstable Pairs found by `diff_evaluators`.
+
+    See Also
+    --------
+    Manager.get_pattern_graph_diff
+    """
+    excel_file, key = args
+    settings = CHANGE_SETTINGS
+    # the tasks of a worker share the snapshot, each writes to an overlay
+    change_eval = Evaluator(
+        excel_file=excel_file,
+        translator=CHANGE_TRANSLATOR.overlay(),
+        cache_dir=settings["cache_dir"],
+        graph_backend=settings["graph_backend"],
+    )
+    change_eval.rename_df_columns()
+    change_eval.add_missing_columns()
+    change_eval.to_property_di_graph()
+    changes_and_unstable = diff_evaluators(
+        orig_eval=BASELINE_EVALUATOR,
+        change_eval=change_eval,
+        key=key,
+        out_directory=settings["out_directory"],
+        compact=settings["compact"],
+        chunk_size=settings["chunk_size"],
+        reporter=settings["reporter"],
+    )
+    return key, changes_and_unstable
 
 
 class Evaluator:
@@ -625,13 +923,22 @@ class Evaluator:
 
     Parameters
     ----------
-    excel_file : str or Path
-        String to an Excel File
+    excel_file : str, Path or Workbook
+        String to an Excel File or a `Workbook` handle that has already
+        been opened, e.g. by the pattern sheet detection.
 
     translator : MDTranslator
         `MDTranslator` object that holds the data from the JSON file
         associated with this type of Excel File.
 
+    cache_dir : str or Path
+        Optional directory of a `WorkbookCache`. On a cache hit the Excel
+        File is not parsed at all.
+
+    graph_backend : str
+        Either 'networkx', the default `PropertyDiGraph`, or 'csr' for the
+        compact `CSRDiGraph` that suits very large workbooks.
+
     Attributes
     ----------
     df : Pandas DataFrame
@@ -644,13 +951,13 @@ class Evaluator:
         DataFrame constructed from reading the Excel Renames Sheet,
         if exists.
 
-    prop_di_graph : PropertyDiGraph
+    prop_di_graph : PropertyDiGraph or CSRDiGraph
         `PropertyDiGraph` constructed from the data in the `df`. Nodes
         keyed by string of the node name. The value corresponding to the
         node is the `Vertex` object. Similarly for edges, edges keyed by
         strings with the corresponding `DiEdge` object associated as an
         attribute. See NetworkX for more information on the dict of dicts
-        structure of NX Graphs.
+        structure of NX Graphs. A `CSRDiGraph` with the csr graph backend.
 
     root_node_attr_columns : set
         Set of column names in the initial read of the Excel file that
@@ -661,12 +968,26 @@ class Evaluator:
 
     # TODO: Consider moving function calls into init since they should be run
     # then
-    def __init__(self, excel_file=None, translator=None):
+    def __init__(
+        self,
+        excel_file=None,
+        translator=None,
+        cache_dir=None,
+        graph_backend="networkx",
+    ):
+        if graph_backend not in GRAPH_BACKENDS:
+            raise RuntimeError(
+                "Unknown graph backend {0}, choose from {1}".format(
+                    graph_backend, list(GRAPH_BACKENDS)
+                )
+            )
+        self.graph_backend = graph_backend
         self.translator = translator
         self.df = pd.DataFrame()
         self.df_ids = pd.DataFrame()
         self.df_renames = pd.DataFrame()
         self.excel_file = excel_file
+        self.cache = WorkbookCache(cache_dir) if cache_dir else None
         # TODO: Why did I do this? save the file off as self.file then
         # call sheets_to_dataframe on self.
         self.sheets_to_dataframe(excel_file=excel_file)
@@ -724,10 +1045,19 @@ class Evaluator:
         columns containing the updated names to be the index of the
         dataframe.
 
+        The workbook is read through `read_excel_sheets`, which classifies
+        the sheets by name and streams only the recognized ones into
+        DataFrames. With a `WorkbookCache` the resulting `df`, `df_ids`
+        and `df_renames` are cached together with the ids they add, keyed
+        on the workbook, the pattern and the ids already known to the
+        translator, so a hit skips both parsing and the renames and ids
+        processing.
+
         Parameters
         ----------
-        excel_file : str or Path
-            string representation or path to Excel file.
+        excel_file : str, Path or Workbook
+            string representation or path to Excel file, or an opened
+            `Workbook` handle.
 
         Raises
         ------
@@ -738,41 +1068,24 @@ class Evaluator:
         """
         # TODO: Generalize/Standardize this function
         pattern = self.translator.pattern_name
-        ids = [
-            "id",
-            "ids",
-            "identification number",
-            "id number",
-            "uuid",
-            "mduuid",
-            "magicdraw id",
-            "magic draw id",
-            "magicdraw identification",
-            "identification numbers",
-            "id_numbers",
-            "id_number",
-        ]
-        renames = [
-            "renames",
-            "rename",
-            "new names",
-            "new name",
-            "newnames",
-            "newname",
-            "new_name",
-            "new_names",
-            "changed names",
-            "changed name",
-            "change names",
-            "changed_names",
-            "changenames",
-            "changed_names",
-        ]
+        ids = ID_SHEET_NAMES
+        renames = RENAME_SHEET_NAMES
         if not excel_file and self.excel_file:
             excel_file = self.excel_file
-        excel_sheets = pd.read_excel(
-            excel_file, sheet_name=None, engine="openpyxl"
-        )
+        if self.cache is not None:
+            key = self.cache.key(
+                excel_file=excel_file,
+                pattern_path=self.translator.pattern_path,
+                uml_id=self.translator.uml_id,
+            )
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.df, self.df_ids, self.df_renames, new_ids = entry
+                self.translator.uml_id.update(new_ids)
+                return
+        excel_sheets = read_excel_sheets(excel_file, pattern=pattern)
+        # ids found while reading are collected on top of the known ones
+        uml_id = ChainMap({}, self.translator.uml_id)
         # what if the pattern is zzzzzzz, ids, renames
         for sheet in sorted(excel_sheets):  # Alphabetical sort
             # Find the Pattern Sheet
@@ -783,7 +1096,7 @@ class Evaluator:
                     self.df_ids.set_index(
                         self.df_ids.columns[0], inplace=True
                     )
-                    self.translator.uml_id.update(
+                    uml_id.update(
                         self.df_ids.to_dict(orient="dict")[
                             self.df_ids.columns[0]
                         ]
@@ -792,47 +1105,33 @@ class Evaluator:
                 elif any(renm_str in sheet.lower() for renm_str in renames):
                     self.df_renames = excel_sheets[sheet]
                     self.df_renames.dropna(how="all", inplace=True)
+                    # (old name, new name) pairs applied in one shot below
+                    rename_pairs = []
+                    index_row = None
                     for row in self.df_renames.itertuples(index=False):
-                        if row[0] in self.translator.uml_id.keys():
+                        if row[0] in uml_id.keys():
                             # replace instances of this with those in 1
-                            if len(row) == 2:
-                                if not self.df_renames.index.is_object():
-                                    # set the index as new name
-                                    df_renm = set_newname_as_rename_index(
-                                        self.df_renames, row, 0
-                                    )
-                                    self.df_renames = df_renm
-                            else:
+                            if len(row) != 2:
                                 raise RuntimeError(
                                     "Unexpected columns in Rename Sheet. \
                                      Expected 2 but found more than 2."
                                 )
-                            self.df.replace(
-                                to_replace=row[0], value=row[1], inplace=True
-                            )
-                            self.translator.uml_id.update(
-                                {row[1]: self.translator.uml_id[row[0]]}
-                            )
-                        elif row[1] in self.translator.uml_id.keys():
-                            if len(row) == 2:
-                                if not self.df_renames.index.is_object():
-                                    # set the index as new name
-                                    df_renm = set_newname_as_rename_index(
-                                        self.df_renames, row, 1
-                                    )
-                                    self.df_renames = df_renm
-                            else:
+                            if index_row is None:
+                                index_row = (row, 0)
+                            rename_pairs.append((row[0], row[1]))
+                            uml_id.update({row[1]: uml_id[row[0]]})
+                        elif row[1] in uml_id.keys():
+                            if len(row) != 2:
                                 raise RuntimeError(
                                     "Unexpected columns in Rename Sheet. \
                                      Expected 2 but found more than 2."
                                 )
+                            if index_row is None:
+                                index_row = (row, 1)
                             # same as above in other direction
-                            self.df.replace(
-                                to_replace=row[1], value=row[0], inplace=True
-                            )
-                            self.translator.uml_id.update(
-                                {row[0]: self.translator.uml_id[row[1]]}
-                            )
+                            rename_pairs.append((row[1], row[0]))
+                            uml_id.update({row[0]: uml_id[row[1]]})
+                    self.apply_renames(rename_pairs, index_row=index_row)
                 else:  # What triggers this, if there is a Pattern sheet and
                     # a Pattern ID or a Pattern Rename then does the main data
                     # ever get read in??
@@ -843,62 +1142,42 @@ class Evaluator:
             elif any(renm_str in sheet.lower() for renm_str in renames):
                 self.df_renames = excel_sheets[sheet]
                 self.df_renames.dropna(how="all", inplace=True)
-                index_name = ""
+                # (old name, new name) pairs applied in one shot below
+                rename_pairs = []
+                index_row = None
                 for row in self.df_renames.itertuples(index=False):
-                    if all(
-                        row[i] in self.translator.uml_id.keys()
-                        for i in (0, 1)
-                    ):
+                    if all(row[i] in uml_id.keys() for i in (0, 1)):
                         raise RuntimeError("Both old and new in keys")
-                    elif row[0] in self.translator.uml_id.keys():
+                    elif row[0] in uml_id.keys():
                         # then replace instances of this with those in 1
-                        if len(row) == 2:
-                            if not self.df_renames.index.is_object():
-                                # do the thing set the index as new name
-                                df_renm = set_newname_as_rename_index(
-                                    self.df_renames, row, 0
-                                )
-                                self.df_renames = df_renm
-                        else:
+                        if len(row) != 2:
                             raise RuntimeError(
                                 "Unexpected columns in Rename Sheet. \
                                  Expected 2 but found more than 2."
                             )
-                        self.df.replace(
-                            to_replace=row[0], value=row[1], inplace=True
-                        )
-                        self.translator.uml_id.update(
-                            {row[1]: self.translator.uml_id[row[0]]}
-                        )
-                        continue
-                    elif row[1] in self.translator.uml_id.keys():
+                        if index_row is None:
+                            index_row = (row, 0)
+                        rename_pairs.append((row[0], row[1]))
+                        uml_id.update({row[1]: uml_id[row[0]]})
+                    elif row[1] in uml_id.keys():
                         # row[1] is old, row[0] is new
-                        if len(row) == 2:
-                            if not self.df_renames.index.is_object():
-                                # do the thing set the index as new name
-                                df_renm = set_newname_as_rename_index(
-                                    self.df_renames, row, 1
-                                )
-                                self.df_renames = df_renm
-                        else:
+                        if len(row) != 2:
                             raise RuntimeError(
                                 "Unexpected columns in Rename Sheet. \
                                  Expected 2 but found more than 2."
                             )
+                        if index_row is None:
+                            index_row = (row, 1)
                         # same as above in other direction
-                        self.df.replace(
-                            to_replace=row[1], value=row[0], inplace=True
-                        )
-                        self.translator.uml_id.update(
-                            {row[0]: self.translator.uml_id[row[1]]}
-                        )
-                        continue
+                        rename_pairs.append((row[1], row[0]))
+                        uml_id.update({row[0]: uml_id[row[1]]})
+                self.apply_renames(rename_pairs, index_row=index_row)
             elif any(id_str in sheet.lower() for id_str in ids) and not (
                 pattern in sheet.lower()
             ):
                 self.df_ids = excel_sheets[sheet]
                 self.df_ids.set_index(self.df_ids.columns[0], inplace=True)
-                self.translator.uml_id.update(
+                uml_id.update(
                     self.df_ids.to_dict(orient="dict")[self.df_ids.columns[0]]
                 )
             else:
@@ -907,6 +1186,40 @@ class Evaluator:
                         excel_file.name
                     )
                 )
+        new_ids = uml_id.maps[0]
+        self.translator.uml_id.update(new_ids)
+        if self.cache is not None:
+            self.cache.put(
+                key, (self.df, self.df_ids, self.df_renames, new_ids)
+            )
+
+    def apply_renames(self, rename_pairs, index_row=None):
+        """
+        Renames the nodes of the `df` and sets the new names as the index
+        of `df_renames`.
+
+        Parameters
+        ----------
+        rename_pairs : list of tuple
+            (old name, new name) pairs in the order of the renames sheet.
+
+        index_row : tuple
+            The first matching row of the renames sheet and the position
+            of its old name, used to find the new name column. None when
+            no row matched.
+
+        Notes
+        -----
+        The pairs are composed into a single mapping of old to final
+        names, so the `df` is scanned once instead of once per row while
+        giving the same result as replacing the pairs one after another.
+        """
+        if index_row is not None and not self.df_renames.index.is_object():
+            # set the index as new name
+            self.df_renames = set_newname_as_rename_index(
+                self.df_renames, *index_row
+            )
+        replace_values(self.df, compose_renames(rename_pairs))
 
     def rename_df_columns(self):
         """
@@ -954,6 +1267,12 @@ class Evaluator:
         checked for particular string properties and the inferred column
         values are determined based on the desired column name.
 
+        Raises
+        ------
+        RuntimeError
+            A column the inferred node names are built from has blank
+            cells.
+
         See Also
         --------
         create_column_values_under
@@ -962,79 +1281,71 @@ class Evaluator:
         """
         # from a collection of vertex pairs, create all of the columns for
         # for which data is required but not present in the excel.
-        columns_to_create = list(
-            set(self.translator.get_pattern_graph()).difference(
-                set(self.df.columns)
+        # The translator parses each column name into a rule once, shortest
+        # name first. TODO: Weak solution to the creation order problem.
+        columns_to_create = [
+            (col, rule, parts)
+            for col, rule, parts in self.translator.get_derived_columns()
+            if col not in self.df.columns
+        ]
+
+        # the user columns each rule reads, in creation order, so blank
+        # cells are reported once up front instead of naming nodes.
+        root_col_name = self.translator.get_root_node()
+        first_column = self.df.columns[0]
+        available = set(self.df.columns)
+        source_columns = set()
+        for col, rule, parts in columns_to_create:
+            if rule == "under":
+                source_columns.update(parts[1:3])
+            elif rule == "space" and parts[0] in available:
+                source_columns.add(parts[0])
+            elif rule == "space":
+                source_columns.update((first_column, root_col_name))
+            else:
+                source_columns.add(first_column)
+            available.add(col)
+        blank_columns = [
+            column
+            for column in self.df.columns
+            if column in source_columns and self.df[column].isna().any()
+        ]
+        if blank_columns:
+            raise RuntimeError(
+                "Blank cells in the columns {0}, which the inferred node "
+                "names are built from. Fill in or remove those rows.".format(
+                    blank_columns
+                )
             )
-        )
-        # TODO: Weak solution to the creation order problem.
-        columns_to_create = sorted(columns_to_create, key=len)
-
-        under = "_"
-        space = " "
-        dash = "-"
-        if columns_to_create:
-            for col in columns_to_create:
-                if under in col:
-                    if dash in col:
-                        col_data_vals = col.split(sep=under)
-                        suffix = col_data_vals[-1].split(sep=dash)
-                        first_node_data = self.df.loc[:, col_data_vals[1]]
-                        second_node_data = self.df.loc[:, suffix[0]]
-                        suff = dash + suffix[-1]
-                        self.df[col] = create_column_values_under(
-                            prefix=col_data_vals[0],
-                            first_node_data=first_node_data,
-                            second_node_data=second_node_data,
-                            suffix=suff,
-                        )
-                    elif len(col.split(sep=under)) > 2:
-                        col_data_vals = col.split(sep=under)
-                        first_node_data = self.df.loc[:, col_data_vals[1]]
-                        second_node_data = self.df.loc[:, col_data_vals[2]]
-                        self.df[col] = create_column_values_under(
-                            prefix=col_data_vals[0],
-                            first_node_data=first_node_data,
-                            second_node_data=second_node_data,
-                            suffix="",
-                        )
-                    else:
-                        col_data_vals = col.split(sep=under)
-                        first_node_data = self.df.loc[:, col_data_vals[1]]
-                        second_node_data = self.df.loc[:, col_data_vals[1]]
-                        self.df[col] = create_column_values_under(
-                            prefix=col_data_vals[0],
-                            first_node_data=first_node_data,
-                            second_node_data=second_node_data,
-                            suffix="",
-                        )
-                elif space in col:
-                    col_data_vals = col.split(sep=space)
-                    root_col_name = self.translator.get_root_node()
-                    if col_data_vals[0] in self.df.columns:
-                        first_node_data = self.df.loc[:, col_data_vals[0]]
-                        second_node_data = [
-                            col_data_vals[-1]
-                            for i in range(len(first_node_data))
-                        ]
-                    else:
-                        first_node_data = self.df.iloc[:, 0]
-                        second_node_data = self.df.loc[:, root_col_name]
-                    self.df[col] = create_column_values_space(
-                        first_node_data=first_node_data,
-                        second_node_data=second_node_data,
-                    )
+
+        for col, rule, parts in columns_to_create:
+            if rule == "under":
+                prefix, first_col, second_col, suffix = parts
+                self.df[col] = create_column_values_under(
+                    prefix=prefix,
+                    first_node_data=self.df.loc[:, first_col],
+                    second_node_data=self.df.loc[:, second_col],
+                    suffix=suffix,
+                )
+            elif rule == "space":
+                first_col, last_word = parts
+                if first_col in self.df.columns:
+                    first_node_data = self.df.loc[:, first_col]
+                    second_node_data = last_word
                 else:
-                    col_data_vals = col
-                    root_col_name = self.translator.get_root_node()
                     first_node_data = self.df.iloc[:, 0]
-                    second_node_data = [
-                        col for count in range(len(first_node_data))
-                    ]
-                    self.df[col] = create_column_values_singleton(
-                        first_node_data=first_node_data,
-                        second_node_data=second_node_data,
-                    )
+                    second_node_data = self.df.loc[:, root_col_name]
+                self.df[col] = create_column_values_space(
+                    first_node_data=first_node_data,
+                    second_node_data=second_node_data,
+                )
+            else:
+                first_node_data = self.df.iloc[:, 0]
+                second_node_data = col
+                self.df[col] = create_column_values_singleton(
+                    first_node_data=first_node_data,
+                    second_node_data=second_node_data,
+                )
 
     def to_property_di_graph(self):
         """
@@ -1044,28 +1355,23 @@ class Evaluator:
         the JSON and take each pair of columns and the edge type as a
         source, target pair with the edge attribute corresponding to the
         edge type defined in the JSON.
+
+        The (source, target, edge attribute) triples of every pattern edge
+        are stacked into one edge table, in pattern order, and inserted in
+        a single call without adding columns to the `df`. As before, when
+        two pattern edges join the same pair of nodes the later edge type
+        wins.
         """
-        self.prop_di_graph = PropertyDiGraph(
-            root_attr_columns=self.root_node_attr_columns
+        edge_table = [
+            (source, target, pair[2])
+            for pair in self.translator.get_pattern_graph_edges()
+            for source, target in zip(self.df[pair[0]], self.df[pair[1]])
+        ]
+        self.prop_di_graph = GRAPH_BACKENDS[
+            self.graph_backend
+        ].from_edge_table(
+            edge_table, root_attr_columns=self.root_node_attr_columns
         )
-        for index, pair in enumerate(
-            self.translator.get_pattern_graph_edges()
-        ):
-            # edge_type = self.translator.get_edge_type(index=index)
-            self.df[pair[2]] = pair[2]
-            df_temp = self.df[[pair[0], pair[1], pair[2]]]
-            GraphTemp = nx.DiGraph()
-            GraphTemp = nx.from_pandas_edgelist(
-                df=df_temp,
-                source=pair[0],
-                target=pair[1],
-                edge_attr=pair[2],
-                create_using=GraphTemp,
-            )
-            self.prop_di_graph.add_nodes_from(GraphTemp.nodes)
-            self.prop_di_graph.add_edges_from(
-                GraphTemp.edges, edge_attribute=pair[2]
-            )
 
         pdg = self.prop_di_graph
         tr = self.translator
@@ -1073,21 +1379,29 @@ class Evaluator:
         # Est list of lists with dict for each node contaiing its name
         # node is already a string because of networkx functionality
         # idea is to build up kwargs to instantiate a vertex object.
-        node_atters = [[{"name": node} for node in list(pdg)]]
+        # the graph is kept on the vertex so the successors and predecessors
+        # are read from pdg on access rather than copied onto every vertex.
+        node_atters = [[{"name": node, "graph": pdg} for node in list(pdg)]]
 
         # various functions required to get different vertex attrs
         # partially instantiate each function so that each fn only needs node
         associate_funs = [
             partial(associate_node_id, tr),
-            partial(associate_successors, pdg),
-            partial(associate_predecessors, pdg),
             partial(
                 associate_node_types_settings,
                 self.df,
                 tr,
                 self.root_node_attr_columns,
+                value_index=build_value_index(self.df),
+            ),
+            partial(
+                associate_renames,
+                self.df_renames,
+                tr,
+                rename_automaton=build_rename_automaton(
+                    self.df_renames.index
+                ),
             ),
-            partial(associate_renames, self.df_renames, tr),
         ]
 
         # apply each function to each node.
@@ -1101,27 +1415,8 @@ class Evaluator:
         # zip(*node_atters) unpacks the nested lists then takes one of ea attr
         # from the map obj stored there (map objs are iterables)
         vertex = partial(make_object, Vertex)
-        for mp in map(vertex, map(build_dict, zip(*node_atters))):
-            vert_tup = (mp.name, {mp.name: mp})
-            # overwrites the original node in the graph to add an attribute
-            # {'<name>': <corresponding vertex object>}
-            pdg.add_node(vert_tup[0], **vert_tup[1])
-
-        # build edges container
-        edges = []
-        for edge, data in pdg.edges.items():
-            diedge = DiEdge(
-                source=pdg.nodes[edge[0]][edge[0]],
-                target=pdg.nodes[edge[1]][edge[1]],
-                edge_attribute=data["edge_attribute"],
-            )
-            # The inner key must be a string thus 'diedge' instead of
-            # pdg.edges[edge][edge] which would mimic behavior for nodes
-            # pdg.nodes[node][node]
-            edges.append((edge, {"diedge": diedge}))
-        for edge in edges:
-            # unpack each edge and the edge attribute dict for the add_edge fn
-            pdg.add_edge(*edge[0], **edge[1])
+        # attaches the vertex objects to the nodes and the DiEdges to edges
+        pdg.set_vertices(map(vertex, map(build_dict, zip(*node_atters))))
 
         # pdg has associated vertex obj and associated edge obj in edj dict.
         return pdg
@@ -1147,18 +1442,67 @@ class MDTranslator:
         The path object to the JSON pattern file
     data : dict
         The JSON data saved off when the Manager accessed the JSON file.
+    pattern : Pattern
+        Optional compiled pattern, typically shared from `load_pattern`.
+        Built from the data when omitted.
+    id_namespace : UUID
+        Optional namespace for deterministic ids, see `workbook_namespace`.
+        New nodes get random UUID4s when omitted.
+
+    Attributes
+    ----------
+    uml_id : dict or ChainMap
+        Node names mapped to their MagicDraw ids or minted UUIDs. A
+        ChainMap once the translator has been overlaid, see `overlay`.
     """
 
-    def __init__(self, json_path=None, json_data=None):
+    def __init__(
+        self, json_path=None, json_data=None, pattern=None, id_namespace=None
+    ):
         self.json_path = json_path
         self.data = json_data
+        if pattern is None:
+            pattern = Pattern(path=json_path, data=json_data)
+        self.pattern = pattern
+        self.id_namespace = id_namespace
         self.uml_id = {}
+        self._decorations = None
 
     def __repr__(self):
         return "MDTranslator Obj(Pattern Name: {0})".format(
             self.json_path.name
         )
 
+    def overlay(self):
+        """
+        Returns a translator layered over a snapshot of this translator.
+
+        The overlay shares the pattern data and reads the ids known so far
+        from the layers of this translator, which are never written to
+        again, while its own additions go to a new top layer. As with a
+        copy, ids added to this translator afterwards are not seen by the
+        overlay, but the ids already known are not copied, so the cost per
+        change file follows its own additions rather than the baseline.
+
+        Returns
+        -------
+        translator : MDTranslator
+            Translator for a change Evaluator.
+        """
+        if not isinstance(self.uml_id, ChainMap):
+            self.uml_id = ChainMap(self.uml_id)
+        if self.uml_id.maps[0]:
+            # freeze the current top layer, later ids go to a fresh one
+            self.uml_id = self.uml_id.new_child()
+        translator = MDTranslator(
+            json_path=self.json_path,
+            json_data=self.data,
+            pattern=self.pattern,
+            id_namespace=self.id_namespace,
+        )
+        translator.uml_id = ChainMap({}, *self.uml_id.maps[1:])
+        return translator
+
     @property
     def pattern_path(self):
         """
@@ -1178,7 +1522,10 @@ class MDTranslator:
         Returns the UML_ID for the corresponding vertex name provided.
 
         If the name provided does not exist as a key in the UML_ID
-        dictionary than create a new uuid for that node.
+        dictionary than create a new uuid for that node. With an
+        `id_namespace` the new uuid is a UUID5 of the pattern name and the
+        node name, so every run over the same workbook gives a node the
+        same id.
 
         Parameters
         ----------
@@ -1187,16 +1534,25 @@ class MDTranslator:
 
         Returns
         -------
-        id : str or UUID4 object
+        id : str or UUID object
             Returns the string id given by MagicDraw loaded through the
-            sheets to dataframe method or creates a new UUID4 object.
+            sheets to dataframe method or creates a new UUID4, or UUID5,
+            object.
         """
-        # TODO: write test function for this
         if name in self.uml_id.keys():
             return self.uml_id[name]
-        else:
+        elif self.id_namespace is None:
             self.uml_id.update({name: uuid.uuid4()})
-            return self.uml_id[name]
+        else:
+            self.uml_id.update(
+                {
+                    name: uuid.uuid5(
+                        self.id_namespace,
+                        "{0}/{1}".format(self.pattern_name, name),
+                    )
+                }
+            )
+        return self.uml_id[name]
 
     def get_root_node(self):
         """
@@ -1211,12 +1567,10 @@ class MDTranslator:
         return self.data["Columns to Navigation Map"]
 
     def get_pattern_graph(self):
-        # change to return a set of 0, 1 index from pattern graph edges.
-        data = self.data["Pattern Graph Edges"]
-        vert_set = set()
-        for edge in data:
-            vert_set.update(set([edge[0], edge[1]]))
-        return list(vert_set)
+        """
+        Returns the vertex names of the pattern graph.
+        """
+        return list(self.pattern.vertices())
 
     def get_pattern_graph_edges(self):
         """
@@ -1226,9 +1580,9 @@ class MDTranslator:
 
     def get_edge_type(self, index=None):
         # TODO: I think this function is deprecated.
-        for count, edge in enumerate(self.data["Pattern Graph Edges"]):
-            if index == count:
-                return edge[-1]
+        edge_types = self.pattern.edge_types()
+        if isinstance(index, int) and 0 <= index < len(edge_types):
+            return edge_types[index]
         else:
             return None
 
@@ -1236,7 +1590,14 @@ class MDTranslator:
         """
         Returns the MagicDraw name of the passed column (str).
         """
-        return self.data["Columns to Navigation Map"][column][-1]
+        return self.pattern.column_names()[column]
+
+    def get_derived_columns(self):
+        """
+        Returns the rules for building the pattern graph vertex columns,
+        see `Pattern.derived_columns`.
+        """
+        return self.pattern.derived_columns()
 
     def get_uml_metatype(self, node_key=None):
         """
@@ -1257,3 +1618,67 @@ class MDTranslator:
         """
         if node_key:
             return self.data["Vertex Settings"][node_key]
+
+    def resolve_setting(self, path=None, value=None):
+        """
+        Returns the decoration for a vertex setting with the names of known
+        elements in the value replaced by their JSON ids.
+
+        A string value naming a known element becomes its id. A list value
+        naming any known element becomes the ids of the known elements.
+        Other values are kept.
+
+        Returns
+        -------
+        decoration : dict
+            The 'op', 'path' and 'value' keyword arguments of
+            `to_uml_json_decorations`.
+        """
+        if isinstance(value, list) and any(
+            val in self.uml_id for val in value
+        ):
+            value = [
+                to_uml_id(self.uml_id[val])
+                for val in value
+                if val in self.uml_id
+            ]
+        elif isinstance(value, str) and value in self.uml_id:
+            value = to_uml_id(self.uml_id[value])
+        return {"op": "replace", "path": path, "value": value}
+
+    def get_uml_decorations(self):
+        """
+        Returns the resolved decoration of every setting in the pattern
+        keyed by `setting_key`.
+
+        The table is built from `Pattern.vertex_settings` once for all
+        vertices and only rebuilt when the id of a name used in a setting
+        value changes, so a Vertex emits each decoration with a dict copy.
+
+        See Also
+        --------
+        resolve_setting
+        VertexReporterMixin.create_node_to_uml
+        """
+        if self._decorations is None:
+            settings = {
+                setting_key(path, value): (path, value)
+                for node_settings in self.pattern.vertex_settings().values()
+                for path, value in node_settings
+            }
+            names = {
+                name
+                for _, value in settings.values()
+                for name in (value if isinstance(value, list) else [value])
+                if isinstance(name, str)
+            }
+            self._decorations = (settings, tuple(names), None, None)
+        settings, names, ids, table = self._decorations
+        current_ids = tuple(self.uml_id.get(name) for name in names)
+        if table is None or current_ids != ids:
+            table = {
+                key: self.resolve_setting(path=path, value=value)
+                for key, (path, value) in settings.items()
+            }
+            self._decorations = (settings, names, current_ids, table)
+        return table
@@ -4,9 +4,21 @@ This software may be modified and distributed under the terms of
 the BSD 3-Clause license. See the LICENSE file for details.
 """
 
+from types import MappingProxyType
+
 import networkx as nx
+import numpy as np
+import pandas as pd
 
-from .utils import to_uml_json_decorations, to_uml_json_edge, to_uml_json_node
+from .utils import (
+    associate_predecessors,
+    associate_successors,
+    setting_key,
+    to_uml_id,
+    to_uml_json_decorations,
+    to_uml_json_edge,
+    to_uml_json_node,
+)
 
 
 class PropertyDiGraph(nx.DiGraph):
@@ -35,57 +47,542 @@ class PropertyDiGraph(nx.DiGraph):
     root_attr_columns : set
         set comprised of column names from the Excel file that are not found in
         the JSON file, could be empty.
+
+    Notes
+    -----
+    The vertex and edge views are built once and memoized until a node or
+    edge is added or removed through the graph methods, so repeated
+    accesses during a diff do not walk the whole graph again. Each access
+    returns the memoized frozenset, or a read only mapping for
+    `edge_dict`, so callers that modify a view must copy it. Writing
+    to the node or edge attribute dicts directly bypasses the
+    invalidation, call `clear_views` afterwards.
     """
 
     def __init__(
         self, incoming_graph_data=None, root_attr_columns=None, **attr
     ):
         self.root_attr_columns = root_attr_columns
+        self._views = {}
         super().__init__(incoming_graph_data=None)
 
+    def __getstate__(self):
+        # views are rebuilt on demand, leaving them out also keeps the
+        # hashed DiEdges out of the pickle until their state is restored.
+        state = self.__dict__.copy()
+        state["_views"] = {}
+        return state
+
+    @classmethod
+    def from_edge_table(cls, edge_table, root_attr_columns=None):
+        """
+        Returns a graph built from (source, target, edge attribute)
+        triples. When two triples join the same pair of nodes the later
+        edge attribute wins. Triples with a missing source or target, e.g.
+        from a blank cell, are skipped as with the `CSRDiGraph`.
+        """
+        graph = cls(root_attr_columns=root_attr_columns)
+        graph.add_edges_from(
+            (source, target, {"edge_attribute": edge_attribute})
+            for source, target, edge_attribute in edge_table
+            if not (pd.isna(source) or pd.isna(target))
+        )
+        return graph
+
+    def set_vertices(self, vertices):
+        """
+        Attach the Vertex objects to their nodes and a DiEdge to each edge.
+        """
+        for vertex in vertices:
+            vertex.set_uml_id()
+            # overwrites the original node in the graph to add an attribute
+            # {'<name>': <corresponding vertex object>}, set through the
+            # node data as numeric names can not be keyword arguments.
+            self.add_node(vertex.name)
+            self.nodes[vertex.name][vertex.name] = vertex
+
+        # build edges container
+        edges = []
+        for edge, data in self.edges.items():
+            diedge = DiEdge(
+                source=self.nodes[edge[0]][edge[0]],
+                target=self.nodes[edge[1]][edge[1]],
+                edge_attribute=data["edge_attribute"],
+            )
+            # The inner key must be a string thus 'diedge' instead of
+            # self.edges[edge][edge] which would mimic behavior for nodes
+            # self.nodes[node][node]
+            edges.append((edge, {"diedge": diedge}))
+        for edge in edges:
+            # unpack each edge and the edge attribute dict for the add_edge fn
+            self.add_edge(*edge[0], **edge[1])
+
+    def get_vertex(self, node):
+        """
+        Returns the Vertex object of the node, None if the node is not in
+        the graph or has no Vertex.
+        """
+        if node not in self:
+            return None
+        return self.nodes[node].get(node)
+
+    def successor_connections(self, node):
+        """
+        Returns the successor connections of the node as dictionaries of
+        source, target and edge_attribute names.
+        """
+        if node not in self:
+            return []
+        return associate_successors(self, node=node)["successors"]
+
+    def predecessor_connections(self, node):
+        """
+        Returns the predecessor connections of the node as dictionaries of
+        source, target and edge_attribute names.
+        """
+        if node not in self:
+            return []
+        return associate_predecessors(self, node=node)["predecessors"]
+
+    def clear_views(self):
+        """
+        Drop the memoized vertex and edge views.
+        """
+        self._views = {}
+
+    def _get_view(self, name, build):
+        """
+        Returns the memoized view called name, building it if needed.
+        """
+        if name not in self._views:
+            self._views[name] = build()
+        return self._views[name]
+
+    def add_node(self, node_for_adding, **attr):
+        super().add_node(node_for_adding, **attr)
+        self.clear_views()
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        super().add_nodes_from(nodes_for_adding, **attr)
+        self.clear_views()
+
+    def remove_node(self, n):
+        super().remove_node(n)
+        self.clear_views()
+
+    def remove_nodes_from(self, nodes):
+        super().remove_nodes_from(nodes)
+        self.clear_views()
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self.clear_views()
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        super().add_edges_from(ebunch_to_add, **attr)
+        self.clear_views()
+
+    def remove_edge(self, u, v):
+        super().remove_edge(u, v)
+        self.clear_views()
+
+    def remove_edges_from(self, ebunch):
+        super().remove_edges_from(ebunch)
+        self.clear_views()
+
+    def clear(self):
+        super().clear()
+        self.clear_views()
+
+    def clear_edges(self):
+        super().clear_edges()
+        self.clear_views()
+
     @property
     def vertex_set(self):
         """
-        Returns a set of Vertex objects.
+        Returns a frozenset of Vertex objects.
         """
-        return set(self.nodes[node][node] for node in self.nodes)
+        return self._get_view(
+            "vertex_set",
+            lambda: frozenset(self.nodes[node][node] for node in self.nodes),
+        )
 
     @property
     def named_vertex_set(self):
         """
-        Returns a set of vertex names.
+        Returns a frozenset of vertex names.
         """
         # TODO: Consider writing an ID_vertex_set for the ids because they
         # are more useful than the names.
-        # vertex_set = self.vertex_set
-        return set(vertex.name for vertex in self.vertex_set)
+        return self._get_view(
+            "named_vertex_set",
+            lambda: frozenset(vertex.name for vertex in self.vertex_set),
+        )
 
     @property
     def edge_set(self):
         """
-        Returns a set of DiEdge objects.
+        Returns a frozenset of DiEdge objects.
         """
-        return set(self.edges[edge]["diedge"] for edge in self.edges)
+        return self._get_view(
+            "edge_set",
+            lambda: frozenset(
+                self.edges[edge]["diedge"] for edge in self.edges
+            ),
+        )
 
     @property
     def edge_dict(self):
         """
-        Returns a dictionary with a tuple containing the strings
+        Returns a read only mapping with a tuple containing the strings
         corresponding to the value.source, value.target
         value.edge_attribute, the value is a DiEdge object.
         """
-        return {
-            (k[0], k[1], v["edge_attribute"]): v["diedge"]
-            for k, v in self.edges.items()
-        }
+        return self._get_view(
+            "edge_dict",
+            lambda: MappingProxyType(
+                {
+                    (k[0], k[1], v["edge_attribute"]): v["diedge"]
+                    for k, v in self.edges.items()
+                }
+            ),
+        )
+
+    @property
+    def named_edge_set(self):
+        """
+        Returns a frozenset of named edge triples of the form (source
+        name, target name, edge attribute) from the edge objects in the
+        edge_set.
+        """
+        return self._get_view(
+            "named_edge_set",
+            lambda: frozenset(
+                edge.named_edge_triple for edge in self.edge_set
+            ),
+        )
+
+
+class CSRDiGraph:
+    """
+    Compact, read only alternative to the `PropertyDiGraph` for large
+    models.
+
+    Node names are interned to integer ids, numbered in order of first
+    appearance, and the edges are stored as NumPy arrays in compressed
+    sparse row (CSR) form: for node i the targets of its out edges are
+    `indices[indptr[i]:indptr[i + 1]]` and their edge attributes are the
+    codes in `edge_types` over the same range. A second CSR over the
+    reversed edges answers the predecessor queries. The `Vertex` objects
+    are held in a list indexed by node id and a `DiEdge` is only built
+    when the edge views are first requested.
+
+    The vertex and edge views, the connections of each Vertex and their
+    order match the `PropertyDiGraph` built from the same edge table, so
+    the diff and JSON emission code work with either graph.
+
+    Parameters
+    ----------
+    names : list
+        Node names indexed by node id.
+
+    edge_attributes : list of str
+        Edge attribute names indexed by edge type code.
+
+    indptr, indices, edge_types : ndarray
+        Out edge CSR arrays.
+
+    rindptr, rindices, redge_types : ndarray
+        In edge CSR arrays.
+
+    root_attr_columns : set
+        Column names from the Excel file that are not found in the JSON
+        file, could be empty.
+
+    See Also
+    --------
+    CSRDiGraph.from_edge_table
+    """
+
+    def __init__(
+        self,
+        names=None,
+        edge_attributes=None,
+        indptr=None,
+        indices=None,
+        edge_types=None,
+        rindptr=None,
+        rindices=None,
+        redge_types=None,
+        root_attr_columns=None,
+    ):
+        self.names = names
+        self.index = {name: node for node, name in enumerate(names)}
+        self.edge_attributes = edge_attributes
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_types = edge_types
+        self.rindptr = rindptr
+        self.rindices = rindices
+        self.redge_types = redge_types
+        self.root_attr_columns = root_attr_columns
+        self.vertices = None
+        self._views = {}
+
+    def __repr__(self):
+        return "CSRDiGraph Obj({0} nodes, {1} edges)".format(
+            self.number_of_nodes(), self.number_of_edges()
+        )
+
+    def __getstate__(self):
+        # same as the PropertyDiGraph, rebuild the views after unpickling.
+        state = self.__dict__.copy()
+        state["_views"] = {}
+        return state
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    @classmethod
+    def from_edge_table(cls, edge_table, root_attr_columns=None):
+        """
+        Returns a graph built from (source, target, edge attribute)
+        triples.
+
+        As for the `PropertyDiGraph` the later edge attribute wins when
+        two triples join the same pair of nodes, while the edge keeps the
+        position of its first triple. Triples with a missing source or
+        target are skipped.
+        """
+        edge_table = [
+            (source, target, edge_attribute)
+            for source, target, edge_attribute in edge_table
+            if not (pd.isna(source) or pd.isna(target))
+        ]
+        num_rows = len(edge_table)
+        endpoints = np.empty(2 * num_rows, dtype=object)
+        endpoints[0::2] = [row[0] for row in edge_table]
+        endpoints[1::2] = [row[1] for row in edge_table]
+        # sources and targets interleaved so ids follow first appearance
+        node_codes, names = pd.factorize(endpoints)
+        type_codes, edge_attributes = pd.factorize(
+            np.array([row[2] for row in edge_table], dtype=object)
+        )
+        sources = node_codes[0::2].astype(np.int64)
+        targets = node_codes[1::2].astype(np.int64)
+        num_nodes = len(names)
+
+        # one edge per node pair, first position but last edge attribute
+        pair_keys = sources * max(num_nodes, 1) + targets
+        _, first = np.unique(pair_keys, return_index=True)
+        _, last = np.unique(pair_keys[::-1], return_index=True)
+        last = num_rows - 1 - last
+        sources, targets = sources[first], targets[first]
+        types = type_codes[last]
+
+        index_dtype = np.int32 if num_nodes < 2 ** 31 else np.int64
+        order = np.lexsort((first, sources))
+        rorder = np.lexsort((first, targets))
+        return cls(
+            names=list(names),
+            edge_attributes=list(edge_attributes),
+            indptr=cls._indptr(sources, num_nodes),
+            indices=targets[order].astype(index_dtype),
+            edge_types=types[order].astype(np.int32),
+            rindptr=cls._indptr(targets, num_nodes),
+            rindices=sources[rorder].astype(index_dtype),
+            redge_types=types[rorder].astype(np.int32),
+            root_attr_columns=root_attr_columns,
+        )
+
+    @staticmethod
+    def _indptr(nodes, num_nodes):
+        """
+        Returns the CSR row pointer for edges grouped by the given nodes.
+        """
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(nodes, minlength=num_nodes), out=indptr[1:])
+        return indptr
+
+    def number_of_nodes(self):
+        return len(self.names)
+
+    def number_of_edges(self):
+        return len(self.indices)
+
+    def successors(self, node):
+        """
+        Returns the names of the successors of the node.
+        """
+        i = self.index[node]
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return [self.names[j] for j in self.indices[start:stop].tolist()]
+
+    def predecessors(self, node):
+        """
+        Returns the names of the predecessors of the node.
+        """
+        i = self.index[node]
+        start, stop = self.rindptr[i], self.rindptr[i + 1]
+        return [self.names[j] for j in self.rindices[start:stop].tolist()]
+
+    def successor_connections(self, node):
+        """
+        Returns the successor connections of the node as dictionaries of
+        source, target and edge_attribute names.
+        """
+        i = self.index.get(node)
+        if i is None:
+            return []
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return [
+            {
+                "source": node,
+                "target": self.names[j],
+                "edge_attribute": self.edge_attributes[code],
+            }
+            for j, code in zip(
+                self.indices[start:stop].tolist(),
+                self.edge_types[start:stop].tolist(),
+            )
+        ]
+
+    def predecessor_connections(self, node):
+        """
+        Returns the predecessor connections of the node as dictionaries of
+        source, target and edge_attribute names.
+        """
+        i = self.index.get(node)
+        if i is None:
+            return []
+        start, stop = self.rindptr[i], self.rindptr[i + 1]
+        return [
+            {
+                "source": self.names[j],
+                "target": node,
+                "edge_attribute": self.edge_attributes[code],
+            }
+            for j, code in zip(
+                self.rindices[start:stop].tolist(),
+                self.redge_types[start:stop].tolist(),
+            )
+        ]
+
+    def set_vertices(self, vertices):
+        """
+        Attach the Vertex objects, given in node id order.
+        """
+        self.vertices = list(vertices)
+        if len(self.vertices) != len(self.names):
+            raise RuntimeError(
+                "Expected {0} vertices, got {1}".format(
+                    len(self.names), len(self.vertices)
+                )
+            )
+        for vertex in self.vertices:
+            vertex.set_uml_id()
+        self._views = {}
+
+    def get_vertex(self, node):
+        """
+        Returns the Vertex object of the node, None if the node is not in
+        the graph or has no Vertex.
+        """
+        i = self.index.get(node)
+        if i is None or self.vertices is None:
+            return None
+        return self.vertices[i]
+
+    def _get_view(self, name, build):
+        """
+        Returns the memoized view called name, building it if needed.
+        """
+        if name not in self._views:
+            self._views[name] = build()
+        return self._views[name]
+
+    def _build_diedges(self):
+        """
+        Returns a DiEdge for each edge in CSR order.
+        """
+        sources = np.repeat(
+            np.arange(len(self.names)), np.diff(self.indptr)
+        ).tolist()
+        return tuple(
+            DiEdge(
+                source=self.vertices[i],
+                target=self.vertices[j],
+                edge_attribute=self.edge_attributes[code],
+            )
+            for i, j, code in zip(
+                sources, self.indices.tolist(), self.edge_types.tolist()
+            )
+        )
+
+    @property
+    def vertex_set(self):
+        """
+        Returns a frozenset of Vertex objects.
+        """
+        return self._get_view("vertex_set", lambda: frozenset(self.vertices))
+
+    @property
+    def named_vertex_set(self):
+        """
+        Returns a frozenset of vertex names.
+        """
+        return self._get_view(
+            "named_vertex_set", lambda: frozenset(self.names)
+        )
+
+    @property
+    def edge_set(self):
+        """
+        Returns a frozenset of DiEdge objects.
+        """
+        return self._get_view(
+            "edge_set",
+            lambda: frozenset(self._get_view("diedges", self._build_diedges)),
+        )
+
+    @property
+    def edge_dict(self):
+        """
+        Returns a read only mapping with a tuple containing the strings
+        corresponding to the value.source, value.target
+        value.edge_attribute, the value is a DiEdge object.
+        """
+        return self._get_view(
+            "edge_dict",
+            lambda: MappingProxyType(
+                {
+                    edge.named_edge_triple: edge
+                    for edge in self._get_view("diedges", self._build_diedges)
+                }
+            ),
+        )
 
     @property
     def named_edge_set(self):
         """
-        Returns a set of named edge triples of the form (source name,
-        target name, edge attribute) from the edge objects in the edge_set.
+        Returns a frozenset of named edge triples of the form (source
+        name, target name, edge attribute) from the edge objects in the
+        edge_set.
         """
-        return set(edge.named_edge_triple for edge in self.edge_set)
+        return self._get_view(
+            "named_edge_set",
+            lambda: frozenset(
+                edge.named_edge_triple
+                for edge in self._get_view("diedges", self._build_diedges)
+            ),
+        )
 
 
 class VertexReporterMixin:
@@ -95,6 +592,8 @@ class VertexReporterMixin:
     change, deletion and creation instructions.
     """
 
+    __slots__ = ()
+
     def change_node_to_uml(self, translator=None):
         """
         Package the Vertex information into a dictionary to be written out
@@ -116,15 +615,10 @@ class VertexReporterMixin:
         --------
         to_uml_json_node
         """
-        my_id = str(self.id)
-        if "_" == my_id[0]:
-            id = my_id
-        else:
-            id = "new_" + my_id
         for count, node_type in enumerate(self.node_types):
             if count == 0:
                 node_dict = {
-                    "id": id,
+                    "id": self.uml_id,
                     "op": "rename",
                     "name": self.name,
                     "path": None,
@@ -155,13 +649,8 @@ class VertexReporterMixin:
         delete_uml_instructions : dict
             Contains the instructions MagicDraw needs to delete a node.
         """
-        my_id = str(self.id)
-        if "_" == my_id[0]:
-            id = my_id
-        else:
-            id = "new_" + my_id
         node_dict = {
-            "id": id,
+            "id": self.uml_id,
             "op": "delete",
             "name": self.name,
             "path": None,
@@ -232,15 +721,12 @@ class VertexReporterMixin:
         else:
             name = self.name
 
+        if self.settings:
+            decorations = translator.get_uml_decorations()
         for count, node_type in enumerate(self.node_types):
             if count == 0:
-                my_id = str(self.id)
-                if "_" == my_id[0]:
-                    id = my_id
-                else:
-                    id = "new_" + my_id
                 node_dict = {
-                    "id": id,
+                    "id": self.uml_id,
                     "op": "create",  # evaluator replace with fn input.
                     "name": self.name,
                     "path": None,
@@ -257,32 +743,19 @@ class VertexReporterMixin:
 
             if self.settings:
                 for set_dict in self.settings:
-                    item = list(set_dict.items())
-                    path, value = item[0][0], item[0][1]
-                    if isinstance(value, list) and any(
-                        val in translator.uml_id.keys() for val in value
-                    ):
-                        values = filter(
-                            lambda x: x in translator.uml_id.keys(), value
+                    path, value = next(iter(set_dict.items()))
+                    try:
+                        decoration = decorations.get(setting_key(path, value))
+                    except TypeError:
+                        decoration = None
+                    if decoration is None:
+                        # not a setting of the pattern
+                        decoration = translator.resolve_setting(
+                            path=path, value=value
                         )
-                        value = []
-                        for val in values:
-                            id_val = str(translator.uml_id[val])
-                            if "_" != id_val[0]:
-                                id_val = "new_" + id_val
-                            value.append(id_val)
-                    elif (
-                        isinstance(value, str)
-                        and value in translator.uml_id.keys()
-                    ):
-                        value = str(translator.uml_id[value])
-                        if "_" != value[0]:
-                            value = "new_" + value
-                    node_dict.update(
-                        {"op": "replace", "path": path, "value": value}
+                    node_decorations.append(
+                        to_uml_json_decorations(id=self.uml_id, **decoration)
                     )
-                    decorations_dict = to_uml_json_decorations(**node_dict)
-                    node_decorations.append(decorations_dict)
             else:
                 continue
 
@@ -292,28 +765,37 @@ class VertexReporterMixin:
             # There will be some notion of a flag for the 'path' key to
             # change between m0, m1 and m2 type MD diagrams but that info is
             # TBD
-            id_val = str(translator.get_uml_id(name=connection["source"]))
-            if "_" == id_val[0]:
-                id = id_val
-            else:
-                id = "new_" + id_val
-            val_val = str(translator.get_uml_id(name=connection["target"]))
-            if "_" == val_val[0]:
-                value = val_val
-            else:
-                value = "new_" + val_val
-
             edge_dict = {
-                "id": id,
+                "id": self.connection_uml_id(
+                    connection["source"], translator=translator
+                ),
                 "op": "replace",
                 "path": connection["edge_attribute"],
-                "value": value,
+                "value": self.connection_uml_id(
+                    connection["target"], translator=translator
+                ),
             }
             edge_uml_dict = to_uml_json_edge(**edge_dict)
             edge_uml_list.append(edge_uml_dict)
 
         return node_uml_list, node_decorations, edge_uml_list
 
+    def connection_uml_id(self, name, translator=None):
+        """
+        Returns the JSON id of the connected vertex called name.
+
+        The id is read from the Vertex object held by the graph. Vertices
+        without a graph fall back to looking the name up in the translator.
+        """
+        if name == self.name:
+            return self.uml_id
+        vertex = None
+        if self.graph is not None:
+            vertex = self.graph.get_vertex(name)
+        if vertex is not None:
+            return vertex.uml_id
+        return to_uml_id(translator.get_uml_id(name=name))
+
 
 class Vertex(VertexReporterMixin):
     """
@@ -345,11 +827,13 @@ class Vertex(VertexReporterMixin):
         Set of strings that reflects the names of the columns under which
         the name of this vertex can be found in the Evaluator.df
 
-    successors : set
-        Set of successors saved off from the PropertyDiGraph
+    successors : list of dicts
+        Successor connections. When omitted and a graph is given they are
+        read from the graph on access.
 
-    predecessors : set
-        Set of predecessors saved off from the PropertyDiGraph
+    predecessors : list of dicts
+        Predecessor connections. When omitted and a graph is given they
+        are read from the graph on access.
 
     attributes : dictionary
         Dictionary holding the data encapsulated in the
@@ -362,15 +846,34 @@ class Vertex(VertexReporterMixin):
         List of dictionaries with successors first and predecessors after.
         The dictionaries contain source, target key value pairs.
 
+    graph : PropertyDiGraph
+        The graph owning the Vertex, used to look up the successors and
+        predecessors on access instead of storing a copy of them.
+
     Notes
     -----
     This class encapsulates the node data from the PropertyDiGraph, providing
     user defined functions for accessing the information of a particular
     Vertex. Additionally, this class contains the to_uml_json method which,
     is now deprecated in favor of the VertexReporterMixin which contains all
-    of the JSON writing functionality.
+    of the JSON writing functionality. The attributes are held in slots to
+    keep the memory per Vertex small on large models.
     """
 
+    __slots__ = (
+        "name",
+        "id",
+        "original_id",
+        "node_types",
+        "attributes",
+        "settings",
+        "original_name",
+        "graph",
+        "_successors",
+        "_predecessors",
+        "_uml_id",
+    )
+
     def __init__(
         self,
         name=None,
@@ -382,6 +885,7 @@ class Vertex(VertexReporterMixin):
         id=None,
         original_name=False,
         original_id=None,
+        graph=None,
         **kwargs,
     ):
         self.name = name
@@ -392,15 +896,62 @@ class Vertex(VertexReporterMixin):
             self.id = id
             self.original_id = original_id
         self.node_types = node_types
-        self.successors = successors
-        self.predecessors = predecessors
+        self.graph = graph
+        self._successors = successors
+        self._predecessors = predecessors
         self.attributes = attributes
         self.settings = settings
         self.original_name = original_name
+        self._uml_id = None
 
     def __repr__(self):
         return "Vertex Obj({0}, {1})".format(self.name, self.id)
 
+    @property
+    def successors(self):
+        """
+        Returns the successor connections, read from the graph if the
+        Vertex was not given them.
+        """
+        if self._successors is None and self.graph is not None:
+            return self.graph.successor_connections(self.name)
+        return self._successors
+
+    @successors.setter
+    def successors(self, successors):
+        self._successors = successors
+
+    @property
+    def predecessors(self):
+        """
+        Returns the predecessor connections, read from the graph if the
+        Vertex was not given them.
+        """
+        if self._predecessors is None and self.graph is not None:
+            return self.graph.predecessor_connections(self.name)
+        return self._predecessors
+
+    @predecessors.setter
+    def predecessors(self, predecessors):
+        self._predecessors = predecessors
+
+    @property
+    def uml_id(self):
+        """
+        Returns the id of the Vertex as written to the Player Piano JSON,
+        computed once from the `id`.
+        """
+        if self._uml_id is None:
+            self.set_uml_id()
+        return self._uml_id
+
+    def set_uml_id(self):
+        """
+        Compute the JSON id from the current `id`. Called by the graph when
+        the Vertex is attached, call it again after changing the `id`.
+        """
+        self._uml_id = to_uml_id(self.id)
+
     @property
     def has_rename(self):
         """
@@ -515,6 +1066,8 @@ class DiEdgeReporterMixin:
     method for changed edges.
     """
 
+    __slots__ = ()
+
     def edge_to_uml(self, op="", translator=None):
         """
         Packages the DiEdge information into a dictionary to be written to
@@ -537,21 +1090,11 @@ class DiEdgeReporterMixin:
             Call to the utility function of the same name to create the
             edge update JSON.
         """
-        id_val = str(self.source.id)
-        if "_" == id_val[0]:
-            id = id_val
-        else:
-            id = "new_" + id_val
-        val_val = str(self.target.id)
-        if "_" == val_val[0]:
-            value = val_val
-        else:
-            value = "new_" + val_val
         edge_dict = {
-            "id": id,
+            "id": self.source.uml_id,
             "op": op,
             "path": self.edge_attribute,
-            "value": value,
+            "value": self.target.uml_id,
         }
         return to_uml_json_edge(**edge_dict)
 
@@ -575,8 +1118,16 @@ class DiEdge(DiEdgeReporterMixin):
 
     edge_attribute : str
         The string that describes the edge type
+
+    Notes
+    -----
+    Two DiEdges are equal, and hash the same, when their
+    `named_edge_triple` is equal, so edges from different graphs can be
+    compared with set operations.
     """
 
+    __slots__ = ("source", "target", "edge_attribute")
+
     def __init__(self, source=None, target=None, edge_attribute=None):
         # Source, Target and attr are actually objects and attr is str.
         self.source = source
@@ -586,6 +1137,14 @@ class DiEdge(DiEdgeReporterMixin):
     def __len__(self):  # TODO: Is this a snake in the grass???
         return 1
 
+    def __eq__(self, other):
+        if not isinstance(other, DiEdge):
+            return NotImplemented
+        return self.named_edge_triple == other.named_edge_triple
+
+    def __hash__(self):
+        return hash(self.named_edge_triple)
+
     def __repr__(self):
         return "DiEdge Obj({0}, {1}, {2})".format(
             self.source.name, self.target.name, self.edge_attribute
@@ -636,3 +1195,6 @@ class DiEdge(DiEdgeReporterMixin):
         the edge_attribute string (source, target, edge_attribute).
         """
         return (self.source, self.target, self.edge_attribute)
+
+
+GRAPH_BACKENDS = {"networkx": PropertyDiGraph, "csr": CSRDiGraph}
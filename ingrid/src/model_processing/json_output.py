@@ -0,0 +1,294 @@
+"""
+Copyright (C) 2020 by the Georgia Tech Research Institute (GTRI)
+This software may be modified and distributed under the terms of
+the BSD 3-Clause license. See the LICENSE file for details.
+"""
+
+import json
+from pathlib import Path
+
+TARGETS_KEY = "modification targets"
+CHUNKS_KEY = "chunks"
+
+
+class PlayerPianoWriter:
+    """
+    Writes a Player Piano JSON file with the modification targets streamed
+    to the file as they are produced.
+
+    By default the file is byte for byte what
+    `json.dumps(json_out, indent=4, sort_keys=True)` gives for the header
+    keys together with the 'modification targets' list, without ever
+    holding the whole document as one string. In compact mode the file is
+    written on a single line as by `json.dumps(json_out, sort_keys=True)`.
+    Either way the Player Piano reads the file with its JSON parser.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the JSON file to write.
+
+    header : dict
+        Other top level keys of the document, e.g. the 'filepath' of the
+        source workbook.
+
+    compact : bool
+        Write the document without indentation.
+
+    Examples
+    --------
+    >>> with PlayerPianoWriter(outfile, header={"filepath": p}) as writer:
+    ...     writer.extend(create_ops)
+    ...     writer.write(edge_op)
+    """
+
+    def __init__(self, path=None, header=None, compact=False):
+        self.path = path
+        self.header = dict(header or {})
+        self.compact = compact
+        self.count = 0
+        self._file = None
+        self._after = []
+
+    def __repr__(self):
+        return "PlayerPianoWriter Obj({0})".format(self.path)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            # leave the unfinished document invalid rather than complete
+            self._file.close()
+            self._file = None
+
+    def _dumps(self, obj, level):
+        """
+        Returns obj as JSON nested level deep in the document.
+        """
+        if self.compact:
+            return json.dumps(obj, sort_keys=True)
+        text = json.dumps(obj, indent=4, sort_keys=True)
+        return text.replace("\n", "\n" + " " * 4 * level)
+
+    def _member(self, key):
+        """
+        Returns the top level key value pair for a header key.
+        """
+        return "{0}{1}: {2}".format(
+            "" if self.compact else " " * 4,
+            json.dumps(key),
+            self._dumps(self.header[key], 1),
+        )
+
+    def open(self):
+        """
+        Open the file and write everything up to the first target.
+        """
+        keys = sorted(self.header)
+        before = [self._member(key) for key in keys if key < TARGETS_KEY]
+        self._after = [self._member(key) for key in keys if key > TARGETS_KEY]
+
+        self._file = open(self.path, "w")
+        start = "{" if self.compact else "{\n"
+        separator = ", " if self.compact else ",\n"
+        indent = "" if self.compact else " " * 4
+        self._file.write(start)
+        for member in before:
+            self._file.write(member + separator)
+        self._file.write("{0}{1}: [".format(indent, json.dumps(TARGETS_KEY)))
+
+    def write(self, target):
+        """
+        Append one modification target to the file.
+        """
+        if self.compact:
+            lead = ", " if self.count else ""
+        else:
+            lead = ",\n" + " " * 8 if self.count else "\n" + " " * 8
+        self._file.write(lead + self._dumps(target, 2))
+        self.count += 1
+
+    def extend(self, targets):
+        """
+        Append each modification target to the file.
+        """
+        for target in targets:
+            self.write(target)
+
+    def close(self):
+        """
+        Finish the document and close the file.
+        """
+        if self._file is None:
+            return
+        if self.compact:
+            self._file.write("]")
+            for member in self._after:
+                self._file.write(", " + member)
+            self._file.write("}")
+        else:
+            self._file.write("\n" + " " * 4 + "]" if self.count else "]")
+            for member in self._after:
+                self._file.write(",\n" + member)
+            self._file.write("\n}")
+        self._file.close()
+        self._file = None
+
+
+class ChunkedPlayerPianoWriter:
+    """
+    Writes a Player Piano JSON file split into chunk files of at most
+    chunk_size modification targets each.
+
+    Every chunk is an ordinary Player Piano file named after the output
+    file, e.g. 'Model-1.json', 'Model-2.json', ... next to 'Model.json'.
+    The output file itself is an index holding the header keys, the chunk
+    file names under 'chunks' and no modification targets. Selecting the
+    index in the Player Piano applies the chunks in order, each in its own
+    MagicDraw session, with the elements created by earlier chunks still
+    known by their temporary ids.
+
+    The targets are never reordered. Node creations and their decorations
+    are written before the edges and renames that refer to them, so every
+    chunk only refers to elements created in that chunk or an earlier one.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the index JSON file to write.
+
+    header : dict
+        Other top level keys of the index, e.g. the 'filepath' of the
+        source workbook.
+
+    compact : bool
+        Write the index and the chunks without indentation.
+
+    chunk_size : int
+        Largest number of modification targets in a chunk.
+
+    See Also
+    --------
+    PlayerPianoWriter
+    """
+
+    def __init__(self, path=None, header=None, compact=False, chunk_size=1):
+        if chunk_size < 1:
+            raise ValueError(
+                "chunk_size must be positive, got {0}".format(chunk_size)
+            )
+        self.path = Path(path)
+        self.header = dict(header or {})
+        self.compact = compact
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.count = 0
+        self._chunk = None
+
+    def __repr__(self):
+        return "ChunkedPlayerPianoWriter Obj({0})".format(self.path)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._chunk is not None:
+            # without an index the unfinished chunks are never applied
+            self._chunk.__exit__(exc_type, exc_value, traceback)
+            self._chunk = None
+
+    def chunk_path(self, number):
+        """
+        Returns the path of the chunk file with the number, counted from 1.
+        """
+        return self.path.with_name(
+            "{0}-{1}{2}".format(self.path.stem, number, self.path.suffix)
+        )
+
+    def open(self):
+        """
+        Remove the chunk files of an earlier run to this path, nothing is
+        written until the first target, chunks are opened as they fill up.
+        """
+        self.chunks = []
+        self.count = 0
+        # chunks left by an earlier, longer run would otherwise sit next
+        # to the new ones as if they belonged to this run
+        prefix = self.path.stem + "-"
+        suffix = self.path.suffix
+        if self.path.parent.is_dir():
+            for chunk_file in self.path.parent.iterdir():
+                name = chunk_file.name
+                start, stop = len(prefix), len(name) - len(suffix)
+                if (
+                    name.startswith(prefix)
+                    and name.endswith(suffix)
+                    and name[start:stop].isdigit()
+                ):
+                    chunk_file.unlink()
+
+    def write(self, target):
+        """
+        Append one modification target, starting a new chunk file when the
+        current one is full.
+        """
+        if self._chunk is None or self._chunk.count >= self.chunk_size:
+            self._next_chunk()
+        self._chunk.write(target)
+        self.count += 1
+
+    def extend(self, targets):
+        """
+        Append each modification target.
+        """
+        for target in targets:
+            self.write(target)
+
+    def _next_chunk(self):
+        """
+        Finish the current chunk file and open the next one.
+        """
+        if self._chunk is not None:
+            self._chunk.close()
+        chunk_path = self.chunk_path(len(self.chunks) + 1)
+        self._chunk = PlayerPianoWriter(chunk_path, compact=self.compact)
+        self._chunk.open()
+        self.chunks.append(chunk_path.name)
+
+    def close(self):
+        """
+        Finish the last chunk file and write the index.
+        """
+        if self._chunk is not None:
+            self._chunk.close()
+            self._chunk = None
+        header = dict(self.header)
+        header[CHUNKS_KEY] = list(self.chunks)
+        with PlayerPianoWriter(
+            self.path, header=header, compact=self.compact
+        ):
+            pass
+
+
+def player_piano_writer(path, header=None, compact=False, chunk_size=None):
+    """
+    Returns the writer for a Player Piano JSON file, split into chunks of
+    chunk_size modification targets if given.
+
+    See Also
+    --------
+    PlayerPianoWriter
+    ChunkedPlayerPianoWriter
+    """
+    if chunk_size:
+        return ChunkedPlayerPianoWriter(
+            path, header=header, compact=compact, chunk_size=chunk_size
+        )
+    return PlayerPianoWriter(path, header=header, compact=compact)
@@ -0,0 +1,340 @@
+"""
+Copyright (C) 2020 by the Georgia Tech Research Institute (GTRI)
+This software may be modified and distributed under the terms of
+the BSD 3-Clause license. See the LICENSE file for details.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+REQUIRED_KEYS = [
+    "Columns to Navigation Map",
+    "Pattern Graph Edges",
+    "Root Node",
+    "Vertex MetaTypes",
+    "Vertex Settings",
+    "Vertex Stereotypes",
+]
+
+# resolved pattern path -> (file signature, Pattern)
+PATTERN_REGISTRY = {}
+# resolved directory -> (directory signature, {pattern name: path})
+PATTERN_DIRECTORIES = {}
+
+
+class Pattern:
+    """
+    Pattern file data with the lookups used by the `MDTranslator`
+    precomputed.
+
+    The tables are built from the JSON data on first use and kept, so the
+    pattern graph, edge types and column names are not recomputed by
+    walking the JSON on every lookup. Patterns returned by `load_pattern`
+    are shared by every translator in the process and must be treated as
+    read only.
+
+    Parameters
+    ----------
+    path : Path
+        Path to the JSON pattern file.
+
+    data : dict
+        The JSON data of the pattern file.
+    """
+
+    version = "1"
+
+    def __init__(self, path=None, data=None):
+        self.path = path
+        self.data = data
+        self._tables = {}
+
+    def __repr__(self):
+        return "Pattern Obj({0})".format(self.name)
+
+    @property
+    def name(self):
+        """
+        Returns the lower case name of the pattern file.
+        """
+        return Path(self.path).name.split(".")[0].lower()
+
+    def validate(self):
+        """
+        Check that the pattern data has the layout the translator expects.
+
+        Raises
+        ------
+        RuntimeError
+            A required key is missing, a pattern graph edge is not a
+            (source, target, edge type) triple of strings or a column
+            maps to an empty navigation list.
+        """
+        missing = [key for key in REQUIRED_KEYS if key not in self.data]
+        if missing:
+            raise RuntimeError(
+                "Pattern file {0} is missing {1}".format(self.path, missing)
+            )
+        for edge in self.data["Pattern Graph Edges"]:
+            if len(edge) != 3 or not all(isinstance(x, str) for x in edge):
+                raise RuntimeError(
+                    "Pattern file {0} has an invalid edge {1}".format(
+                        self.path, edge
+                    )
+                )
+        for column, nav in self.data["Columns to Navigation Map"].items():
+            if not nav:
+                raise RuntimeError(
+                    "Pattern file {0} has no navigation for {1}".format(
+                        self.path, column
+                    )
+                )
+
+    def compile(self):
+        """
+        Build every lookup table now instead of on first use.
+        """
+        for table in (
+            self.vertices,
+            self.edge_types,
+            self.column_names,
+            self.derived_columns,
+            self.vertex_settings,
+        ):
+            table()
+        return self
+
+    def _get_table(self, name, build):
+        """
+        Returns the table called name, building it if needed.
+        """
+        if name not in self._tables:
+            self._tables[name] = build()
+        return self._tables[name]
+
+    def vertices(self):
+        """
+        Returns the vertex names of the pattern graph in order of first
+        appearance in the pattern graph edges.
+        """
+
+        def build():
+            vertices = {}
+            for edge in self.data["Pattern Graph Edges"]:
+                vertices.setdefault(edge[0])
+                vertices.setdefault(edge[1])
+            return tuple(vertices)
+
+        return self._get_table("vertices", build)
+
+    def edge_types(self):
+        """
+        Returns the edge type of each pattern graph edge by position.
+        """
+        return self._get_table(
+            "edge_types",
+            lambda: tuple(
+                edge[-1] for edge in self.data["Pattern Graph Edges"]
+            ),
+        )
+
+    def column_names(self):
+        """
+        Returns the mapping of the Excel column names to their MagicDraw
+        names.
+        """
+        return self._get_table(
+            "column_names",
+            lambda: {
+                column: nav[-1]
+                for column, nav in self.data[
+                    "Columns to Navigation Map"
+                ].items()
+            },
+        )
+
+    def vertex_settings(self):
+        """
+        Returns the (path, value) pairs of the 'Vertex Settings' of each
+        node type, leaving out the node types without settings.
+        """
+        return self._get_table(
+            "vertex_settings",
+            lambda: {
+                node_type: tuple(settings.items())
+                for node_type, settings in self.data[
+                    "Vertex Settings"
+                ].items()
+                if settings
+            },
+        )
+
+    def derived_columns(self):
+        """
+        Returns how to build each pattern graph vertex column that may be
+        missing from the Excel, shortest name first.
+
+        Returns
+        -------
+        derived_columns : tuple
+            (column, rule, parts) triples. For the 'under' rule parts are
+            the prefix, the two columns combined and the suffix, e.g.
+            'A_composite owner_component' joins the 'composite owner' and
+            'component' columns. For the 'space' rule parts are the
+            leading column and the trailing word. The 'singleton' rule
+            has no parts.
+
+        Notes
+        -----
+        Sorting by length ensures that longer column names constructed of
+        multiple shorter columns are created after those columns, see
+        `Evaluator.add_missing_columns`.
+        """
+
+        def build():
+            under = "_"
+            space = " "
+            dash = "-"
+            plan = []
+            for col in sorted(self.vertices(), key=len):
+                if under in col:
+                    col_data_vals = col.split(sep=under)
+                    if dash in col:
+                        suffix = col_data_vals[-1].split(sep=dash)
+                        parts = (
+                            col_data_vals[0],
+                            col_data_vals[1],
+                            suffix[0],
+                            dash + suffix[-1],
+                        )
+                    elif len(col_data_vals) > 2:
+                        parts = (
+                            col_data_vals[0],
+                            col_data_vals[1],
+                            col_data_vals[2],
+                            "",
+                        )
+                    else:
+                        parts = (
+                            col_data_vals[0],
+                            col_data_vals[1],
+                            col_data_vals[1],
+                            "",
+                        )
+                    plan.append((col, "under", parts))
+                elif space in col:
+                    col_data_vals = col.split(sep=space)
+                    plan.append(
+                        (col, "space", (col_data_vals[0], col_data_vals[-1]))
+                    )
+                else:
+                    plan.append((col, "singleton", ()))
+            return tuple(plan)
+
+        return self._get_table("derived_columns", build)
+
+
+def file_signature(path):
+    """
+    Returns the modification time and size of the file at path.
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def compiled_path(path, cache_dir):
+    """
+    Returns where the compiled pattern for the pattern file is stored in
+    the cache directory.
+
+    Like the `WorkbookCache` entries the name is a hash of the pattern
+    file contents, so an edited pattern file simply misses the cache.
+    """
+    digest = hashlib.sha256(Pattern.version.encode())
+    digest.update(Path(path).read_bytes())
+    return Path(cache_dir) / "patterns" / (digest.hexdigest() + ".pkl")
+
+
+def load_pattern(path, cache_dir=None):
+    """
+    Returns the validated and compiled `Pattern` for the pattern file.
+
+    Each pattern file is read at most once per process, an edited file is
+    read again. With a cache directory the compiled pattern is also stored
+    there and later processes load it from there while the pattern file
+    is unchanged.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the JSON pattern file.
+
+    cache_dir : str or Path
+        Optional directory, the same as for the `WorkbookCache`, to read
+        and write the compiled pattern in. Failing to write it is ignored.
+
+    Returns
+    -------
+    pattern : Pattern
+
+    Raises
+    ------
+    RuntimeError
+        The pattern file does not have the expected layout.
+    """
+    path = Path(path)
+    key = path.resolve()
+    signature = file_signature(path)
+    entry = PATTERN_REGISTRY.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    pattern = None
+    cached = compiled_path(path, cache_dir) if cache_dir else None
+    if cached is not None and cached.is_file():
+        try:
+            with open(cached, "rb") as f:
+                pattern = pickle.load(f)
+            pattern.path = path
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pattern = None
+    if pattern is None:
+        pattern = Pattern(path=path, data=json.loads(path.read_text()))
+        pattern.validate()
+        pattern.compile()
+        if cached is not None:
+            try:
+                cached.parent.mkdir(parents=True, exist_ok=True)
+                tmp_cached = cached.with_suffix(".tmp{0}".format(os.getpid()))
+                with open(tmp_cached, "wb") as f:
+                    pickle.dump(pattern, f)
+                os.replace(tmp_cached, cached)
+            except OSError:
+                pass
+
+    PATTERN_REGISTRY[key] = (signature, pattern)
+    return pattern
+
+
+def find_patterns(directory):
+    """
+    Returns the pattern files of the directory keyed by lower case
+    pattern name.
+
+    The directory is listed again only when its contents change.
+    """
+    directory = Path(directory)
+    key = directory.resolve()
+    signature = os.stat(directory).st_mtime_ns
+    entry = PATTERN_DIRECTORIES.get(key)
+    if entry is None or entry[0] != signature:
+        patterns = {
+            pattern_path.name.split(".")[0].lower(): pattern_path
+            for pattern_path in directory.glob("*.json")
+        }
+        entry = (signature, patterns)
+        PATTERN_DIRECTORIES[key] = entry
+    return dict(entry[1])
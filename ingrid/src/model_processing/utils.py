@@ -4,10 +4,23 @@ This software may be modified and distributed under the terms of
 the BSD 3-Clause license. See the LICENSE file for details.
 """
 
+import csv
+from collections import deque
 from functools import reduce
-from itertools import chain
+from itertools import chain, count
+from pathlib import Path
 
 import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+REPORTER_FORMATS = ["xlsx", "csv", "none"]
 
 
 # TODO: to selectively import one of the utils is the function that needs to do
@@ -60,7 +73,9 @@ def associate_predecessors(graph, node=""):
     }
 
 
-def associate_node_types_settings(df, tr, root_attr_cols, node=""):
+def associate_node_types_settings(
+    df, tr, root_attr_cols, node="", value_index=None
+):
     """
     Packages the settings, node types and attributes of each node if they
     exist.
@@ -89,6 +104,9 @@ def associate_node_types_settings(df, tr, root_attr_cols, node=""):
     node : str
         Name of the node to get the types and settings for.
 
+    value_index : dict
+        Optional index of the DataFrame values, see `build_value_index`.
+
     Returns
     -------
     type_setting_dict : dict
@@ -100,6 +118,7 @@ def associate_node_types_settings(df, tr, root_attr_cols, node=""):
         node=node,
         root_node_type=tr.get_root_node(),
         root_attr_columns=root_attr_cols,
+        value_index=value_index,
     )
     node_types = {col for col in node_type_cols}
 
@@ -118,7 +137,7 @@ def associate_node_types_settings(df, tr, root_attr_cols, node=""):
     return type_setting_dict
 
 
-def associate_renames(df_renames, tr, node):
+def associate_renames(df_renames, tr, node, rename_automaton=None):
     """
     If a node has a rename, as identified in the df_renames then associate
     the original name and ID to the renamed node.
@@ -135,6 +154,12 @@ def associate_renames(df_renames, tr, node):
     node : str
         Name of the current node to associate the renames to.
 
+    rename_automaton : dict
+        Optional automaton over the new names of `df_renames` from
+        `build_rename_automaton`. When given, the new names found in the
+        node are read off in one pass over the node name instead of
+        searching the node for every new name.
+
     Returns
     -------
     original_dict : dict
@@ -155,11 +180,25 @@ def associate_renames(df_renames, tr, node):
     original Evaluator.
     """
     # If any part of the node string is in the index of the rename dataframe
-    # then build the original name.
-    if any(new_nm.lower() in node.lower() for new_nm in df_renames.index):
-        row_index = list(
-            filter(lambda x: x.lower() in node, df_renames.index)
-        )
+    # then build the original name. Numeric node names, read from integer
+    # cells, have no string to search and are never renames.
+    if not isinstance(node, str):
+        new_names = []
+    elif rename_automaton is None:
+        new_names = [
+            new_nm
+            for new_nm in df_renames.index
+            if new_nm.lower() in node.lower()
+        ]
+    else:
+        new_names = [
+            df_renames.index[position]
+            for position in sorted(
+                find_renames(rename_automaton, node.lower())
+            )
+        ]
+    if new_names:
+        row_index = list(filter(lambda x: x.lower() in node, new_names))
         old_name = df_renames.loc[row_index].to_numpy()
         row_index = [x.lower() for x in row_index]
         old_name = [x.lower() for x in chain(*old_name)]
@@ -170,7 +209,7 @@ def associate_renames(df_renames, tr, node):
             lambda new, kv: new.replace(*kv), new_old_tup, node
         )
         if node == original_name:
-            row_index = list(filter(lambda x: x in node, df_renames.index))
+            row_index = list(filter(lambda x: x in node, new_names))
             old_name = df_renames.loc[row_index].to_numpy()
             new_old_tup = zip(row_index, chain(*old_name))
             original_name = reduce(
@@ -186,6 +225,84 @@ def associate_renames(df_renames, tr, node):
         return {"original_name": None, "original_id": None}
 
 
+def build_rename_automaton(new_names):
+    """
+    Builds an Aho-Corasick automaton over the lower case new names.
+
+    Parameters
+    ----------
+    new_names : iterable of str
+        The new names, typically the index of the renames dataframe.
+
+    Returns
+    -------
+    rename_automaton : dict
+        The 'goto' list holds the transitions of each state as a dict of
+        character to state, 'fail' the fall back state of each state and
+        'out' the positions in new_names of the names ending at each
+        state, including those reached through the fall back states.
+
+    Notes
+    -----
+    Derived names such as 'A_x_y-end1' embed the renamed node names, so
+    the new names have to be found as substrings of the node names. Built
+    once per `Evaluator`, the automaton finds every new name in a node
+    name in a single pass over the node name, see `find_renames`.
+    """
+    goto = [{}]
+    out = [[]]
+    for position, new_name in enumerate(new_names):
+        state = 0
+        for char in new_name.lower():
+            if char not in goto[state]:
+                goto[state][char] = len(goto)
+                goto.append({})
+                out.append([])
+            state = goto[state][char]
+        out[state].append(position)
+
+    # breadth first so the fall back state of each state is complete
+    # before it is used
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, next_state in goto[state].items():
+            queue.append(next_state)
+            fall_back = fail[state]
+            while fall_back and char not in goto[fall_back]:
+                fall_back = fail[fall_back]
+            fail[next_state] = goto[fall_back].get(char, 0)
+            out[next_state] = out[next_state] + out[fail[next_state]]
+    return {"goto": goto, "fail": fail, "out": out}
+
+
+def find_renames(rename_automaton, text):
+    """
+    Returns the set of positions of the new names found in text.
+
+    Parameters
+    ----------
+    rename_automaton : dict
+        Automaton from `build_rename_automaton`.
+
+    text : str
+        Lower case node name.
+    """
+    goto = rename_automaton["goto"]
+    fail = rename_automaton["fail"]
+    out = rename_automaton["out"]
+    found = set(out[0])
+    state = 0
+    for char in text:
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        if out[state]:
+            found.update(out[state])
+    return found
+
+
 def build_dict(arg):
     """
     Helper function to the Evaluator.to_property_di_graph() method that
@@ -241,6 +358,78 @@ def set_newname_as_rename_index(df_renames, row, ind):
     return df_renames
 
 
+def compose_renames(rename_pairs):
+    """
+    Returns the mapping of each renamed value to its final name.
+
+    Parameters
+    ----------
+    rename_pairs : list of tuple
+        (old name, new name) pairs in the order they are applied.
+
+    Returns
+    -------
+    renames : dict
+        Keys are the values that change when the pairs are applied one
+        after another, e.g. the pairs ('a', 'b') then ('b', 'c') map both
+        'a' and 'b' to 'c'.
+    """
+    renames = {}
+    # current name -> values that currently carry that name
+    renamed_to = {}
+    for old, new in rename_pairs:
+        moved = renamed_to.pop(old, [])
+        if old not in renames:
+            moved.append(old)
+        for value in moved:
+            renames[value] = new
+        renamed_to.setdefault(new, []).extend(moved)
+    return {old: new for old, new in renames.items() if old != new}
+
+
+def replace_values(df, renames):
+    """
+    Replace the values of the DataFrame in place using a mapping.
+
+    Each column is matched against the keys of renames with a hash
+    lookup, so the DataFrame is scanned once however many renames there
+    are. Values in renames are not replaced again.
+
+    Parameters
+    ----------
+    df : Pandas DataFrame
+        DataFrame to update.
+
+    renames : dict
+        Mapping of old values to new values, see `compose_renames`.
+    """
+    if not renames:
+        return
+    old_names = list(renames)
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position]
+        mask = values.isin(old_names).to_numpy()
+        if mask.any():
+            df.iloc[mask, position] = values[mask].map(renames).to_numpy()
+
+
+def lower_node_data(node_data):
+    """
+    Returns the node data as lower cased strings in a Series with a fresh
+    index, or the lower cased string when given a single string.
+
+    Numbers, e.g. the integer cells read from the workbook, are turned
+    into strings first. Dropping the index lets a DataFrame column, whose
+    index may have gaps after blank rows are dropped, be combined row by
+    row with a list. Blank cells are rejected before this point by
+    `Evaluator.add_missing_columns`.
+    """
+    if isinstance(node_data, str):
+        return node_data.lower()
+    node_data = pd.Series(node_data, dtype=object)
+    return node_data.reset_index(drop=True).astype(str).str.lower()
+
+
 def create_column_values_under(
     prefix=None, first_node_data=None, second_node_data=None, suffix=""
 ):
@@ -285,21 +474,11 @@ def create_column_values_under(
     df['A_composite owner_component'] = A_<composite owner>_<component>
     """
     under = "_"
-    dash = "-"
-    column_values = []
-    for count, first_data in enumerate(first_node_data):
-        tmp_list = [
-            prefix
-            + under
-            + first_data.lower()
-            + under
-            + second_node_data[count].lower()
-            + suffix
-        ]
-
-        column_values.extend(tmp_list)
-
-    return column_values
+    # grouping keeps string constants, and a single second node, out of
+    # the per row concatenations.
+    column_values = (prefix + under) + lower_node_data(first_node_data)
+    column_values += under + lower_node_data(second_node_data) + suffix
+    return column_values.tolist()
 
 
 def create_column_values_space(first_node_data=None, second_node_data=None):
@@ -314,10 +493,11 @@ def create_column_values_space(first_node_data=None, second_node_data=None):
         dataframe determined by picking the first dataframe column. This
         will change once a more appropriate rule has been decided.
 
-    second_node_data : list
+    second_node_data : list or str
         List of data with a length equal to the number of rows in the
         dataframe determined by picking the dataframe column with the same
-        name as the string after the space.
+        name as the string after the space, or a single string repeated
+        for every row.
 
     Returns
     -------
@@ -336,18 +516,15 @@ def create_column_values_space(first_node_data=None, second_node_data=None):
     'car qua boot context'
     """
     space = " "
-    column_values = []
-    for count, first_data in enumerate(first_node_data):
-        tmp_list = [
-            first_data.lower()
-            + space
-            + "qua"
-            + space
-            + second_node_data[count].lower()
-            + space
-            + "context"
-        ]
-        column_values.extend(tmp_list)
+    column_values = lower_node_data(first_node_data) + (
+        space
+        + "qua"
+        + space
+        + lower_node_data(second_node_data)
+        + space
+        + "context"
+    )
+    column_values = column_values.tolist()
 
     return column_values
 
@@ -367,10 +544,10 @@ def create_column_values_singleton(
         to the root node. This may change once a more appropriate rule has
         been decided.
 
-    second_node_data : list
+    second_node_data : list or str
         List of data with a length equal to the number of rows in the
-        dataframe built by repeating the desired column name until it has
-        the same length as first_node_data.
+        dataframe or the desired column name, which is repeated for every
+        row.
 
     Returns
     -------
@@ -390,18 +567,54 @@ def create_column_values_singleton(
     value returned would be 'car context1'
     """
     space = " "
-    column_values = []
-    for count, first_data in enumerate(first_node_data):
-        tmp_list = [
-            first_data.lower() + space + second_node_data[count].lower()
-        ]
-        column_values.extend(tmp_list)
+    column_values = lower_node_data(first_node_data) + (
+        space + lower_node_data(second_node_data)
+    )
+    column_values = column_values.tolist()
 
     return column_values
 
 
+def build_value_index(df):
+    """
+    Returns an inverted index of the DataFrame values.
+
+    Parameters
+    ----------
+    df : Pandas DataFrame
+        The DataFrame that creates the Graph.
+
+    Returns
+    -------
+    value_index : dict
+        Keys are the non null cell values of the DataFrame securing a
+        dict of the columns the value appears in mapped to the list of
+        row positions, in row order, where it appears in that column.
+
+    Notes
+    -----
+    Built once per DataFrame so that looking up the columns and rows a
+    node appears in does not require comparing the node against every
+    cell of the DataFrame.
+    """
+    value_index = {}
+    for column, values in df.items():
+        for position, (value, not_null) in enumerate(
+            zip(values.to_numpy(), values.notna().to_numpy())
+        ):
+            if not_null:
+                value_index.setdefault(value, {}).setdefault(
+                    column, []
+                ).append(position)
+    return value_index
+
+
 def get_node_types_attrs(
-    df=None, node=None, root_node_type=None, root_attr_columns=None
+    df=None,
+    node=None,
+    root_node_type=None,
+    root_attr_columns=None,
+    value_index=None,
 ):
     """
     Returns the type of node that specified vertex is acting as and
@@ -429,6 +642,11 @@ def get_node_types_attrs(
         'Columns to Navigation Map' and that should be associated to a
         node if that node is a root node.
 
+    value_index : dict
+        Optional index of the `df` values from `build_value_index`. When
+        provided the node is looked up in the index instead of being
+        compared against every cell of the DataFrame.
+
     Returns
     -------
     node_type_columns : set
@@ -448,14 +666,25 @@ def get_node_types_attrs(
     related to the root node.
     """
     node_attr_dict = {}
-    mask = df == node
-    node_mask_columns = df[mask].dropna(axis=1, how="all").columns
-    node_type_columns = set(node_mask_columns).difference(root_attr_columns)
     root_attribute_list = list(root_attr_columns)
+    if value_index is not None:
+        node_columns = value_index.get(node, {})
+        node_type_columns = set(node_columns).difference(root_attr_columns)
+        root_rows = node_columns.get(root_node_type)
+        root_node_df = df.iloc[root_rows] if root_rows else None
+    else:
+        mask = df == node
+        node_mask_columns = df[mask].dropna(axis=1, how="all").columns
+        node_type_columns = set(node_mask_columns).difference(
+            root_attr_columns
+        )
+        # want to check if node in root nodes.values the column not attrs.
+        if node in df[root_node_type].values:
+            root_node_df = df.loc[df[root_node_type] == node]
+        else:
+            root_node_df = None
 
-    # want to check if node in root nodes.values the column not the attrs.
-    if node in df[root_node_type].values:
-        root_node_df = df.loc[df[root_node_type] == node]
+    if root_node_df is not None:
         node_attr_dict = (
             root_node_df[root_attribute_list]
             .dropna(axis=1, how="all")
@@ -481,6 +710,13 @@ def match_changes(change_dict=None):
     highest scores and discard the rest, clean up the data. Return the
     confident matches and the unstable matches.
 
+    When every potential match shares the edge type of the original, the
+    scores are not computed pair by pair. Instead the list is indexed once
+    by source and target id, see `index_change_edges`, and the best
+    matches are looked up with `match_indexed`. Lists passed for several
+    originals, as `diff_evaluators` does for each edge type, are
+    only indexed once.
+
     Confident match {('Car', 'engine', 'owner'): [(('Vehicle', 'engine',
     'owner'), 2)]}
     Unstable match {('Car', 'engine', 'owner'): [(('Engine', 'engine',
@@ -514,6 +750,8 @@ def match_changes(change_dict=None):
     unstable_pairing = {}
     matched = {}
     str_dict = {}
+    # keyed on the list identity, the lists stay alive in change_dict
+    edge_indexes = {}
 
     add_del = ("Added", "Deleted")
     for suitor in change_dict:
@@ -527,6 +765,20 @@ def match_changes(change_dict=None):
                 update_dict = {"Deleted": list(deleted_set)}
                 str_dict.update(update_dict)
             continue
+        candidates = change_dict[suitor]
+        edge_index = edge_indexes.get(id(candidates))
+        if edge_index is None:
+            edge_index = index_change_edges(candidates)
+            edge_indexes[id(candidates)] = edge_index
+        if edge_index["edge_attributes"].issubset({suitor.edge_attribute}):
+            best, stable = match_indexed(
+                candidates, current=suitor, edge_index=edge_index
+            )
+            if stable:
+                matched[suitor] = best
+            else:
+                unstable_pairing[suitor] = best
+            continue
         scores = match(*change_dict[suitor], current=suitor)
         matched[suitor] = list(zip(change_dict[suitor], scores))
         matched[suitor] = sorted(
@@ -558,6 +810,91 @@ def match_changes(change_dict=None):
     return (matched, unstable_pairing)
 
 
+def index_change_edges(edges):
+    """
+    Indexes the change edges by the ids of their source and target nodes.
+
+    Parameters
+    ----------
+    edges : list of DiEdge
+        Change edges that may match an original edge.
+
+    Returns
+    -------
+    edge_index : dict
+        The 'source' and 'target' keys map each id and original id of
+        the source or target Vertex to the positions in edges of the edges
+        with that end. The 'edge_attributes' key holds the set of edge
+        attributes found in edges.
+
+    See Also
+    --------
+    match_indexed
+    """
+    edge_index = {"source": {}, "target": {}, "edge_attributes": set()}
+    for position, edge in enumerate(edges):
+        edge_index["edge_attributes"].add(edge.edge_attribute)
+        for end, vertex in (("source", edge.source), ("target", edge.target)):
+            for vert_id in {vertex.id, vertex.original_id}:
+                edge_index[end].setdefault(vert_id, []).append(position)
+    return edge_index
+
+
+def match_indexed(edges, current=None, edge_index=None):
+    """
+    Returns the best matches for the current edge from the indexed change
+    edges, giving the same result as scoring each edge with `match`.
+
+    A change edge scores 2 when both its source and target are found
+    under the ids of the current source and target, and 1 when only one
+    of them is, so both sets are read from the index rather than comparing
+    current to every edge. All edges must share the edge attribute of
+    current.
+
+    Parameters
+    ----------
+    edges : list of DiEdge
+        Change edges with the same edge attribute as current.
+
+    current : DiEdge
+        Original edge to match.
+
+    edge_index : dict
+        Index of edges from `index_change_edges`.
+
+    Returns
+    -------
+    best : list of DiEdge
+        The first edge scoring 2, or otherwise the highest scoring edges
+        in their order in edges.
+
+    stable : bool
+        True when best is a single confident match, False when best holds
+        tied edges left for the user to decide.
+
+    See Also
+    --------
+    match
+    match_changes
+    """
+    sources = edge_index["source"].get(current.source.id, [])
+    targets = edge_index["target"].get(current.target.id, [])
+    both = set(sources).intersection(targets)
+    if both:
+        return [edges[min(both)]], True
+    elif len(edges) < 2:
+        return list(edges), True
+
+    ones = sorted(set(sources).union(targets))
+    if len(ones) == 1:
+        return [edges[ones[0]]], True
+    elif ones:
+        return [edges[position] for position in ones], False
+    else:
+        # every edge scores 0
+        return list(edges), False
+
+
 def match(*args, current=None):
     """
     Provides the metric for determining the confidence level that a
@@ -772,6 +1109,71 @@ def make_string(attr_dict, create=False):
     )
 
 
+def operation_key(attr_dict, create=False):
+    """
+    Returns a hashable key identifying the to_uml_json_<operation> output,
+    the tuple counterpart of `make_string`.
+
+    Parameters
+    ----------
+    attr_dict : dict
+        Dictionary output from the Vertex and DiEdge ReporterMixins.
+
+    create : Bool
+        Identify the operation by its name instead of its value.
+
+    Returns
+    -------
+    key : tuple
+        The id, the name or value, only the first if it is a list, and the
+        path of the first op. A value that cannot be hashed is replaced by
+        its string.
+    """
+    op = attr_dict["ops"][0]
+    value = op["name"] if create else op["value"]
+    if isinstance(value, list):
+        value = value[0]
+    try:
+        hash(value)
+    except TypeError:
+        value = str(value)
+    return (attr_dict["id"], value, op["path"])
+
+
+def unique_operations(operations, create_categories=("create",)):
+    """
+    Yields the (category, target) pairs of the operations with the
+    duplicates removed, keeping the first of each in order.
+
+    The whole stream is deduplicated in one pass. Two targets are
+    duplicates when they have the same category and `operation_key`, so
+    e.g. deleting and adding the same edge are both kept.
+
+    Parameters
+    ----------
+    operations : iterable
+        (category, target) pairs, the target from the
+        to_uml_json_<operation> methods.
+
+    create_categories : iterable
+        Categories whose targets are identified by name, see
+        `operation_key`.
+
+    See Also
+    --------
+    remove_duplicates
+    """
+    create_categories = frozenset(create_categories)
+    seen = set()
+    for category, target in operations:
+        key = (category,) + operation_key(
+            target, create=category in create_categories
+        )
+        if key not in seen:
+            seen.add(key)
+            yield category, target
+
+
 def remove_duplicates(input, create=False):
     """
     Removes duplicate JSON instructions.
@@ -784,7 +1186,7 @@ def remove_duplicates(input, create=False):
         classes.
 
     create : Bool
-        Flag to pass to the make_string method.
+        Flag to pass to the operation_key method.
 
     Returns
     -------
@@ -793,7 +1195,8 @@ def remove_duplicates(input, create=False):
 
     See Also
     --------
-    make_string
+    operation_key
+    unique_operations
     VertexReporterMixin
     DiEdgeReporterMixin
     """
@@ -801,14 +1204,39 @@ def remove_duplicates(input, create=False):
     seen = set()
     filtered_list = []
     for attr_dict in input:
-        str_repr = make_string(attr_dict, create=create)
-        if str_repr not in seen:
-            seen.add(str_repr)
+        key = operation_key(attr_dict, create=create)
+        if key not in seen:
+            seen.add(key)
             filtered_list.append(attr_dict)
 
     return filtered_list
 
 
+def to_uml_id(id):
+    """
+    Returns the id written to the Player Piano JSON for a MagicDraw id or
+    UUID.
+
+    MagicDraw ids start with an underscore and are written as is, the
+    UUIDs of elements that do not exist in MagicDraw yet are prefixed with
+    'new_'.
+    """
+    uml_id = str(id)
+    if "_" == uml_id[0]:
+        return uml_id
+    return "new_" + uml_id
+
+
+def setting_key(path, value):
+    """
+    Returns a hashable key for a vertex setting, list values become
+    tuples.
+    """
+    if isinstance(value, list):
+        value = tuple(value)
+    return (path, value)
+
+
 def to_uml_json_node(**kwargs):
     """
     Create dict to be converted to JSON for consumption by Player Piano.
@@ -880,7 +1308,260 @@ def truncate_microsec(curr_time=None):
     return time_str[0:-3]
 
 
-def json_reporter_to_excel(json_data, fn):
+def to_cell_value(value):
+    """
+    Returns the value as written to a reporter cell, the same way the
+    Pandas Excel writers do. Numbers, booleans and strings are kept, None
+    and NaN become an empty cell and anything else its string.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    elif isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class SheetWriter:
+    """
+    Writes tables row by row to the sheets of an Excel file, or to one CSV
+    file per sheet named after fn and the sheet, e.g.
+    'Model-reporter-create.csv'.
+
+    Excel files are written with xlsxwriter in constant memory mode when it
+    is installed, otherwise with openpyxl in write only mode, so neither a
+    DataFrame nor an in memory copy of a sheet is built. Rows may be added
+    to the sheets in any order.
+
+    Parameters
+    ----------
+    fn : str or Path
+        File name for the created Excel file.
+
+    file_format : str
+        'xlsx' or 'csv'.
+
+    Raises
+    ------
+    RuntimeError
+        The file_format is not 'xlsx' or 'csv'.
+    """
+
+    def __init__(self, fn, file_format="xlsx"):
+        if file_format not in ("xlsx", "csv"):
+            msg = "Unknown sheet format {0}, choose from {1}".format(
+                file_format, ["xlsx", "csv"]
+            )
+            raise RuntimeError(msg)
+        self.fn = Path(fn)
+        self.file_format = file_format
+        self._book = None
+        self._bold = None
+        self._files = []
+
+    def __repr__(self):
+        return "SheetWriter Obj({0})".format(self.fn)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """
+        Create the Excel workbook, CSV files are created with their sheet.
+        """
+        if self.file_format == "csv":
+            return
+        elif xlsxwriter is not None:
+            self._book = xlsxwriter.Workbook(
+                str(self.fn),
+                {
+                    "constant_memory": True,
+                    "strings_to_formulas": False,
+                    "strings_to_urls": False,
+                },
+            )
+            self._bold = self._book.add_format({"bold": True})
+        else:
+            self._book = Workbook(write_only=True)
+            self._bold = Font(bold=True)
+
+    def add_sheet(self, sheet_name, header):
+        """
+        Add a sheet starting with the header row, in bold in Excel.
+
+        Returns
+        -------
+        append : callable
+            Writes one row, a list of values, at the end of the sheet.
+        """
+        if self.file_format == "csv":
+            csv_name = "{0}-{1}.csv".format(self.fn.stem, sheet_name)
+            csv_file = open(self.fn.with_name(csv_name), "w", newline="")
+            self._files.append(csv_file)
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+
+            def append(row):
+                writer.writerow([to_cell_value(v) for v in row])
+
+        elif xlsxwriter is not None:
+            sheet = self._book.add_worksheet(sheet_name)
+            sheet.write_row(0, 0, header, self._bold)
+            row_nums = count(1)
+
+            def append(row):
+                sheet.write_row(
+                    next(row_nums), 0, [to_cell_value(v) for v in row]
+                )
+
+        else:
+            sheet = self._book.create_sheet(title=sheet_name)
+            header_cells = []
+            for value in header:
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.font = self._bold
+                header_cells.append(cell)
+            sheet.append(header_cells)
+
+            def append(row):
+                sheet.append([to_cell_value(v) for v in row])
+
+        return append
+
+    def close(self):
+        """
+        Save the Excel workbook or close the CSV files. A workbook without
+        sheets gets one blank sheet, Excel requires at least one.
+        """
+        for csv_file in self._files:
+            csv_file.close()
+        self._files = []
+        if self._book is None:
+            return
+        elif xlsxwriter is not None:
+            if not self._book.worksheets():
+                self._book.add_worksheet()
+            self._book.close()
+        else:
+            if not self._book.worksheets:
+                self._book.create_sheet()
+            self._book.save(self.fn)
+        self._book = None
+
+
+def write_xlsx(fn, tables):
+    """
+    Write the tables to an Excel file, one sheet each, row by row.
+
+    Parameters
+    ----------
+    fn : str or Path
+        File name for the created Excel file.
+
+    tables : iterable
+        (sheet name, header, rows) triples.
+
+    See Also
+    --------
+    SheetWriter
+    """
+    with SheetWriter(fn) as sheets:
+        for sheet_name, header, rows in tables:
+            append = sheets.add_sheet(sheet_name, header)
+            for row in rows:
+                append(row)
+
+
+def write_csv(fn, header, rows):
+    """
+    Write one table to a CSV file row by row.
+    """
+    with open(fn, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow([to_cell_value(v) for v in row])
+
+
+class ReporterWriter:
+    """
+    Writes the human readable reporter of the model operations as they are
+    produced, one sheet per category of operation.
+
+    A sheet is added on the first operation of its category, with the keys
+    of its first op as the columns. Each modification target becomes a row
+    numbered from 0, as in a DataFrame index, followed by the target id and
+    its first op.
+
+    Parameters
+    ----------
+    fn : str or Path
+        File name for the created Excel file.
+
+    file_format : str
+        'xlsx', 'csv' for one CSV file per category or 'none' to write
+        nothing.
+
+    Raises
+    ------
+    RuntimeError
+        The file_format is not one of `REPORTER_FORMATS`.
+
+    See Also
+    --------
+    SheetWriter
+    """
+
+    def __init__(self, fn, file_format="xlsx"):
+        if file_format not in REPORTER_FORMATS:
+            msg = "Unknown reporter format {0}, choose from {1}".format(
+                file_format, REPORTER_FORMATS
+            )
+            raise RuntimeError(msg)
+        self.sheets = None
+        if file_format != "none":
+            self.sheets = SheetWriter(fn, file_format=file_format)
+        self._categories = {}
+
+    def __repr__(self):
+        return "ReporterWriter Obj({0})".format(self.sheets)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        if self.sheets is not None:
+            self.sheets.open()
+
+    def write(self, category, target):
+        """
+        Add the modification target to the sheet of its category.
+        """
+        if self.sheets is None:
+            return
+        if category not in self._categories:
+            op_keys = list(target["ops"][0].keys())
+            append = self.sheets.add_sheet(category, [None, "id"] + op_keys)
+            self._categories[category] = (append, op_keys, count())
+        append, op_keys, row_nums = self._categories[category]
+        op = target["ops"][0]
+        append(
+            [next(row_nums), target["id"]] + [op.get(key) for key in op_keys]
+        )
+
+    def close(self):
+        if self.sheets is not None:
+            self.sheets.close()
+
+
+def json_reporter_to_excel(json_data, fn, file_format="xlsx"):
     """
     Write the results of the model json to a human readable Excel file.
 
@@ -894,25 +1575,22 @@ def json_reporter_to_excel(json_data, fn):
     fn: str or Path
         File name for the created Excel file.
 
+    file_format : str
+        'xlsx' for the Excel file, 'csv' for one CSV file per sheet, named
+        after fn and the sheet, e.g. 'Model-reporter-create.csv', or 'none'.
+
     Returns
     -------
     None
 
     Creates excel file with sheets named after the keys and dataframe data
     gleaned from the values.
+
+    See Also
+    --------
+    ReporterWriter
     """
-    with pd.ExcelWriter(fn, engine="openpyxl") as writer:
-        for sheet_name, df_values in json_data.items():
-            if not df_values:
-                continue
-            df_data = {}
-            df_data.update({"id": []})
-            df_data.update({key: [] for key in df_values[0]["ops"][0].keys()})
-            for item in df_values:
-                df_data["id"].append(item["id"])
-                for op_key, op_value in item["ops"][0].items():
-                    df_data[op_key].append(op_value)
-            df = pd.DataFrame.from_dict(data=df_data, orient="columns",)
-            df.dropna(how="all", inplace=True)
-            df.to_excel(writer, sheet_name=sheet_name)
-        writer.save()
+    with ReporterWriter(fn, file_format=file_format) as reporter:
+        for sheet_name, json_values in json_data.items():
+            for item in json_values:
+                reporter.write(sheet_name, item)
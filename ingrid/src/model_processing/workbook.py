@@ -0,0 +1,546 @@
+"""
+Copyright (C) 2020 by the Georgia Tech Research Institute (GTRI)
+This software may be modified and distributed under the terms of
+the BSD 3-Clause license. See the LICENSE file for details.
+"""
+
+import hashlib
+import os
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from . import PATTERNS
+from .pattern_registry import find_patterns
+
+ID_SHEET_NAMES = [
+    "id",
+    "ids",
+    "identification number",
+    "id number",
+    "uuid",
+    "mduuid",
+    "magicdraw id",
+    "magic draw id",
+    "magicdraw identification",
+    "identification numbers",
+    "id_numbers",
+    "id_number",
+]
+
+RENAME_SHEET_NAMES = [
+    "renames",
+    "rename",
+    "new names",
+    "new name",
+    "newnames",
+    "newname",
+    "new_name",
+    "new_names",
+    "changed names",
+    "changed name",
+    "change names",
+    "changed_names",
+    "changenames",
+    "changed_names",
+]
+
+
+def classify_sheet(sheet_name, pattern=""):
+    """
+    Returns the role a worksheet plays for the given pattern based on its
+    name alone.
+
+    Parameters
+    ----------
+    sheet_name : str
+        Name of the worksheet as it appears in the workbook.
+
+    pattern : str
+        Lower case pattern name, see `MDTranslator.pattern_name`.
+
+    Returns
+    -------
+    kind : str or None
+        One of 'pattern', 'ids' or 'renames'. None when the sheet name is
+        not recognized.
+
+    Notes
+    -----
+    The checks mirror the order used by `Evaluator.sheets_to_dataframe`,
+    a sheet named after the pattern is the pattern sheet unless it also
+    carries an ids or renames keyword, e.g. 'Composition IDs'.
+    """
+    name = sheet_name.lower()
+    is_ids = any(id_str in name for id_str in ID_SHEET_NAMES)
+    is_renames = any(renm_str in name for renm_str in RENAME_SHEET_NAMES)
+    if pattern and pattern in name:
+        if is_ids:
+            return "ids"
+        elif is_renames:
+            return "renames"
+        else:
+            return "pattern"
+    elif is_renames:
+        return "renames"
+    elif is_ids:
+        return "ids"
+    else:
+        return None
+
+
+def worksheet_to_dataframe(worksheet):
+    """
+    Builds a DataFrame from a worksheet by streaming its rows.
+
+    The first row supplies the column headers, blank rows are skipped and
+    empty cells become NaN, matching the frames produced by
+    `pd.read_excel`.
+
+    Parameters
+    ----------
+    worksheet : openpyxl Worksheet
+        Worksheet, typically from a workbook opened in read-only mode.
+
+    Returns
+    -------
+    df : Pandas DataFrame
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+
+    columns = []
+    seen = {}
+    for count, col in enumerate(header):
+        if col is None:
+            col = "Unnamed: {0}".format(count)
+        if col in seen:
+            seen[col] += 1
+            col = "{0}.{1}".format(col, seen[col])
+        else:
+            seen[col] = 0
+        columns.append(col)
+
+    width = len(columns)
+    data = []
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        row = [
+            int(value)
+            if isinstance(value, float) and value.is_integer()
+            else value
+            for value in row[:width]
+        ]
+        row.extend([None] * (width - len(row)))
+        data.append(row)
+
+    df = pd.DataFrame(data=data, columns=columns)
+    return df.fillna(value=np.nan)
+
+
+def read_sheet_names(path):
+    """
+    Returns the worksheet names of an Excel file in workbook order.
+
+    Only the small workbook part of the zip archive is read, so listing
+    the sheets does not load shared strings or styles like opening the
+    file with openpyxl does.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the Excel file.
+    """
+    with zipfile.ZipFile(path) as archive:
+        try:
+            workbook_xml = archive.read("xl/workbook.xml")
+        except KeyError:
+            workbook_xml = None
+    if workbook_xml is None:
+        # unusual part layout, let openpyxl resolve the workbook part
+        book = load_workbook(path, read_only=True, keep_links=False)
+        sheet_names = book.sheetnames
+        book.close()
+        return sheet_names
+    root = ElementTree.fromstring(workbook_xml)
+    return [
+        element.get("name")
+        for element in root.iter()
+        if element.tag.endswith("}sheet")
+    ]
+
+
+class Workbook:
+    """
+    Handle on an Excel file that is opened at most once per run.
+
+    Creating the handle only lists the sheet names for pattern detection,
+    see `read_sheet_names`. The file is opened in openpyxl's read-only
+    mode the first time a worksheet is parsed, so a handle whose sheets
+    are served from a `WorkbookCache` never opens it. Worksheets are only
+    parsed into DataFrames when requested
+    through `sheets` and the frames are handed to the caller without being
+    kept on the handle, so the handle can be passed from the pattern
+    detection in the commands straight to the `Manager` and `Evaluator`
+    without holding a second copy of every sheet.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the Excel file.
+
+    Attributes
+    ----------
+    sheet_names : list of str
+        Names of the worksheets in workbook order.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path)
+        self._book = None
+        self.sheet_names = read_sheet_names(self.path)
+
+    def __repr__(self):
+        return "Workbook Obj({0})".format(self.path.name)
+
+    def __getstate__(self):
+        # the open openpyxl workbook holds a file handle, reopen on demand
+        state = self.__dict__.copy()
+        state["_book"] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def name(self):
+        """
+        Returns the file name of the workbook.
+        """
+        return self.path.name
+
+    @property
+    def book(self):
+        """
+        Returns the read-only openpyxl workbook, opening it if needed.
+        """
+        if self._book is None:
+            self._book = load_workbook(
+                self.path, read_only=True, data_only=True, keep_links=False
+            )
+        return self._book
+
+    def close(self):
+        """
+        Close the underlying file, it is reopened if sheets are requested.
+        """
+        if self._book is not None:
+            self._book.close()
+            self._book = None
+
+    def read_sheet(self, sheet):
+        """
+        Returns a DataFrame of the named sheet.
+        """
+        return worksheet_to_dataframe(self.book[sheet])
+
+    def sheets(self, pattern=""):
+        """
+        Returns the recognized sheets for the pattern as DataFrames.
+
+        Parameters
+        ----------
+        pattern : str
+            Lower case pattern name used to classify the sheets.
+
+        Returns
+        -------
+        excel_sheets : dict
+            Keys are the recognized sheet names and values freshly parsed
+            DataFrames owned by the caller, which may modify them in place.
+            Sheets with other names, e.g. scratch sheets, are skipped
+            without being parsed.
+
+        See Also
+        --------
+        classify_sheet
+        worksheet_to_dataframe
+        """
+        return {
+            sheet: self.read_sheet(sheet)
+            for sheet in self.sheet_names
+            if classify_sheet(sheet, pattern=pattern) is not None
+        }
+
+
+class SheetBundle(Workbook):
+    """
+    Handle on a directory holding one CSV or Parquet file per sheet.
+
+    A bundle stands in for an Excel file produced by tooling that can
+    write CSV or Parquet directly, skipping Excel XML parsing. Each file
+    stem is taken as the sheet name and classified with the same rules as
+    the worksheets of an Excel file, e.g. a bundle for the Composition
+    pattern might hold 'Composition.csv', 'Composition IDs.csv' and
+    'Renames.csv'. Reading Parquet files requires pyarrow or fastparquet.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to the bundle directory.
+
+    Attributes
+    ----------
+    sheet_names : list of str
+        Names of the sheets, the file stems in alphabetical order.
+    """
+
+    readers = {".csv": pd.read_csv, ".parquet": pd.read_parquet}
+
+    def __init__(self, path=None):
+        self.path = Path(path)
+        self._book = None
+        self.files = {
+            sheet_file.stem: sheet_file
+            for sheet_file in self.path.iterdir()
+            if sheet_file.suffix.lower() in self.readers
+        }
+        self.sheet_names = sorted(self.files)
+
+    def __repr__(self):
+        return "SheetBundle Obj({0})".format(self.path.name)
+
+    @property
+    def book(self):
+        """
+        Returns the mapping of sheet names to sheet files.
+        """
+        return self.files
+
+    def close(self):
+        """
+        Nothing to close, each sheet file is read in one go.
+        """
+        pass
+
+    def read_sheet(self, sheet):
+        """
+        Returns a DataFrame of the named sheet file.
+        """
+        sheet_file = self.files[sheet]
+        return self.readers[sheet_file.suffix.lower()](sheet_file)
+
+
+def is_sheet_bundle(path, patterns=None):
+    """
+    Returns True if path is a directory of sheet files for a pattern.
+
+    A directory only counts as a sheet bundle when it holds no Excel
+    files and every one of its CSV or Parquet files is classified as the
+    pattern, ids or renames sheet of the same pattern, one of them being
+    the pattern sheet. A folder of workbooks with a stray CSV file is
+    therefore not mistaken for a bundle.
+
+    Parameters
+    ----------
+    path : str or Path
+        Path to check.
+
+    patterns : iterable of str
+        Lower case pattern names the sheets may belong to, defaults to the
+        patterns shipped in the PATTERNS directory.
+
+    See Also
+    --------
+    classify_sheet
+    """
+    path = Path(path)
+    if not path.is_dir():
+        return False
+    sheet_names = []
+    for sheet_file in path.iterdir():
+        suffix = sheet_file.suffix.lower()
+        if suffix == ".xlsx":
+            return False
+        elif suffix in SheetBundle.readers:
+            sheet_names.append(sheet_file.stem)
+    if not sheet_names:
+        return False
+    if patterns is None:
+        patterns = find_patterns(PATTERNS)
+    for pattern in patterns:
+        kinds = [
+            classify_sheet(sheet, pattern=pattern) for sheet in sheet_names
+        ]
+        if "pattern" in kinds and None not in kinds:
+            return True
+    return False
+
+
+def open_workbook(path):
+    """
+    Returns a `SheetBundle` for bundle directories or a `Workbook`.
+
+    Any directory is opened as a `SheetBundle`, callers decide with
+    `is_sheet_bundle` which directories to pass.
+    """
+    if isinstance(path, Workbook):
+        return path
+    elif Path(path).is_dir():
+        return SheetBundle(path)
+    else:
+        return Workbook(path)
+
+
+class WorkbookCache:
+    """
+    Opt-in on-disk cache of parsed workbooks.
+
+    Entries are content addressed: the key is a hash of the workbook
+    bytes together with the pattern file bytes and pattern name, so an
+    edited workbook or pattern simply misses the cache. Each entry is a
+    pickle, either of the dict returned by `Workbook.sheets` or of the
+    frames an `Evaluator` derived from them, which loads much faster than
+    parsing the Excel XML again.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Directory holding the cache entries, created if missing.
+    """
+
+    version = "2"
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return "WorkbookCache Obj({0})".format(self.directory)
+
+    def key(self, excel_file=None, pattern_path=None, uml_id=None):
+        """
+        Returns the hex digest identifying the workbook and pattern pair.
+
+        Parameters
+        ----------
+        excel_file : str, Path or Workbook
+            The workbook or sheet bundle to key on.
+
+        pattern_path : str or Path
+            Path to the pattern JSON file.
+
+        uml_id : dict
+            Optional name to id map the entry was derived with, e.g. the
+            baseline ids a change workbook's renames are resolved against.
+        """
+        if isinstance(excel_file, Workbook):
+            excel_file = excel_file.path
+        excel_file = Path(excel_file)
+        # names only matter where they carry meaning: the sheet names of a
+        # bundle and the pattern name used to classify the sheets.
+        if excel_file.is_dir():
+            paths = [
+                (sheet_file, True)
+                for sheet_file in sorted(excel_file.iterdir())
+                if sheet_file.suffix.lower() in SheetBundle.readers
+            ]
+        else:
+            paths = [(excel_file, False)]
+        paths.append((Path(pattern_path), True))
+
+        digest = hashlib.sha256(self.version.encode())
+        for path, named in paths:
+            if named:
+                digest.update(path.name.lower().encode())
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        if uml_id is not None:
+            for name, id in sorted(
+                (str(name), str(id)) for name, id in uml_id.items()
+            ):
+                digest.update("{0}\0{1}\0".format(name, id).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Returns the cached entry for key or None on a cache miss.
+        """
+        entry = self.directory / (key + ".pkl")
+        if not entry.is_file():
+            return None
+        return pd.read_pickle(entry)
+
+    def put(self, key, value):
+        """
+        Store the value under key, replacing any existing entry.
+        """
+        entry = self.directory / (key + ".pkl")
+        tmp_entry = entry.with_suffix(".tmp{0}".format(os.getpid()))
+        pd.to_pickle(value, tmp_entry)
+        os.replace(tmp_entry, entry)
+
+
+def read_excel_sheets(excel_file, pattern="", cache=None, pattern_path=None):
+    """
+    Reads only the pattern, ids and renames worksheets of an Excel file.
+
+    The workbook is opened in openpyxl's read-only mode so the sheets are
+    classified by name before any cell data is parsed, and only the
+    recognized sheets are turned into DataFrames. Sheet bundle
+    directories are read through `SheetBundle`. When a cache is given
+    the sheets are served from it and the workbook is not parsed at all
+    on a hit.
+
+    Parameters
+    ----------
+    excel_file : str, Path or Workbook
+        Path to the Excel file or sheet bundle directory, or an already
+        opened `Workbook`.
+
+    pattern : str
+        Lower case pattern name used to classify the sheets.
+
+    cache : WorkbookCache
+        Optional cache of previously parsed workbooks.
+
+    pattern_path : str or Path
+        Path to the pattern file, required to key the cache.
+
+    Returns
+    -------
+    excel_sheets : dict
+        Keys are the recognized sheet names and values the corresponding
+        DataFrames. Unrecognized sheets are skipped.
+
+    See Also
+    --------
+    Workbook.sheets
+    WorkbookCache
+    """
+    if cache is not None:
+        key = cache.key(excel_file=excel_file, pattern_path=pattern_path)
+        excel_sheets = cache.get(key)
+        if excel_sheets is not None:
+            return excel_sheets
+
+    if isinstance(excel_file, Workbook):
+        excel_sheets = excel_file.sheets(pattern=pattern)
+    else:
+        with open_workbook(excel_file) as wkbk:
+            excel_sheets = wkbk.sheets(pattern=pattern)
+
+    if cache is not None:
+        cache.put(key, excel_sheets)
+    return excel_sheets
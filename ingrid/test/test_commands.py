@@ -5,15 +5,24 @@ the BSD 3-Clause license. See the LICENSE file for details.
 """
 
 
+import io
 import json
 import tempfile
 import unittest
+from contextlib import redirect_stdout
 from pathlib import Path
 from shutil import copy2
 
-from model_processing.commands import compare_md_model, create_md_model
+import pandas as pd
 
-from . import DATA_DIRECTORY, ROOT
+from model_processing.commands import (
+    compare_md_model,
+    create_md_model,
+    create_operations,
+)
+from model_processing.graph_creation import Evaluator, MDTranslator
+
+from . import DATA_DIRECTORY, PATTERNS, ROOT
 
 
 class TestCommands(unittest.TestCase):
@@ -89,6 +98,236 @@ class TestCommands(unittest.TestCase):
                     for j_f in new_json
                 )
 
+    def test_create_md_model_sheet_bundle(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            excel_file = DATA_DIRECTORY / "Composition Example 2.xlsx"
+            bundle_dir = tmpdir / "Composition Example 2 Bundle"
+            bundle_dir.mkdir()
+            df = pd.read_excel(excel_file, engine="openpyxl")
+            df.to_csv(bundle_dir / "Composition.csv", index=False)
+            copy2(excel_file, tmpdir)
+
+            create_md_model([tmpdir])
+
+            bundle_json = json.loads(
+                (tmpdir / "Composition Example 2 Bundle.json").read_text()
+            )
+            excel_json = json.loads(
+                (tmpdir / "Composition Example 2.json").read_text()
+            )
+            self.assertEqual(
+                len(excel_json["modification targets"]),
+                len(bundle_json["modification targets"]),
+            )
+
+    def test_create_md_model_mixed_directory(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            excel_file = DATA_DIRECTORY / "Composition Example 2.xlsx"
+            copy2(excel_file, tmpdir)
+            # a stray CSV next to the workbooks does not make a bundle
+            pd.DataFrame(data={"Note": ["draft"]}).to_csv(
+                tmpdir / "notes.csv", index=False
+            )
+
+            create_md_model([tmpdir])
+
+            self.assertTrue((tmpdir / "Composition Example 2.json").is_file())
+
+    def test_create_md_model_jobs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            excel_files = [
+                "Composition Example.xlsx",
+                "Composition Example 2.xlsx",
+                "Composition Example Model Baseline.xlsx",
+            ]
+            for xl in excel_files:
+                copy2(DATA_DIRECTORY / xl, tmpdir)
+            (tmpdir / "Scratch.txt").write_text("not a workbook")
+
+            serial_dir = tmpdir / "serial"
+            serial_dir.mkdir()
+            summaries = []
+            for kwargs in ({"output_path": serial_dir}, {"jobs": 2}):
+                with redirect_stdout(io.StringIO()) as out:
+                    create_md_model([tmpdir], **kwargs)
+                summaries.append(
+                    [
+                        line
+                        for line in out.getvalue().splitlines()
+                        if line.startswith(("Created", "    "))
+                    ]
+                )
+            # the same summary whatever the number of jobs
+            self.assertEqual("Created 3 of 3 workbooks", summaries[0][0])
+            self.assertListEqual(sorted(summaries[0]), sorted(summaries[1]))
+
+            for xl in excel_files:
+                json_name = Path(xl).with_suffix(".json").name
+                parallel_json = json.loads((tmpdir / json_name).read_text())
+                serial_json = json.loads((serial_dir / json_name).read_text())
+                self.assertEqual(
+                    len(serial_json["modification targets"]),
+                    len(parallel_json["modification targets"]),
+                )
+                self.assertTrue(
+                    (tmpdir / (Path(xl).stem + "-reporter.xlsx")).is_file()
+                )
+
+    def test_create_md_model_compact(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            wkbk = "Composition Example.xlsx"
+            copy2(DATA_DIRECTORY / wkbk, tmpdir)
+            compact_dir = tmpdir / "compact"
+            compact_dir.mkdir()
+
+            create_md_model([tmpdir / wkbk])
+            create_md_model(
+                [tmpdir / wkbk], output_path=compact_dir, compact=True
+            )
+
+            json_name = Path(wkbk).with_suffix(".json").name
+            indented = (tmpdir / json_name).read_text()
+            compact = (compact_dir / json_name).read_text()
+            self.assertNotIn("\n", compact)
+            self.assertLess(len(compact), len(indented))
+            indented_json = json.loads(indented)
+            compact_json = json.loads(compact)
+            self.assertEqual(
+                indented_json["filepath"], compact_json["filepath"]
+            )
+            self.assertEqual(
+                len(indented_json["modification targets"]),
+                len(compact_json["modification targets"]),
+            )
+
+    def test_create_md_model_chunks(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            wkbk = "Composition Example.xlsx"
+            copy2(DATA_DIRECTORY / wkbk, tmpdir)
+            chunk_dir = tmpdir / "chunks"
+            chunk_dir.mkdir()
+
+            create_md_model([tmpdir / wkbk])
+            create_md_model(
+                [tmpdir / wkbk], output_path=chunk_dir, chunk_size=10
+            )
+
+            json_name = Path(wkbk).with_suffix(".json").name
+            whole = json.loads((tmpdir / json_name).read_text())
+            index = json.loads((chunk_dir / json_name).read_text())
+            self.assertEqual(whole["filepath"], index["filepath"])
+            self.assertListEqual([], index["modification targets"])
+
+            created = set()
+            targets = []
+            for name in index["chunks"]:
+                chunk = json.loads((chunk_dir / name).read_text())
+                self.assertLessEqual(len(chunk["modification targets"]), 10)
+                for target in chunk["modification targets"]:
+                    ops = target["ops"]
+                    if ops[0]["op"] == "create":
+                        created.add(target["id"])
+                    # every chunk refers to elements created up to it
+                    refs = [target["id"]] + [
+                        op["value"]
+                        for op in ops
+                        if isinstance(op.get("value"), str)
+                    ]
+                    for ref in refs:
+                        if ref.startswith("new_"):
+                            self.assertIn(ref, created)
+                targets.extend(chunk["modification targets"])
+            self.assertEqual(len(whole["modification targets"]), len(targets))
+
+    def test_create_md_model_reporter(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            wkbk = "Composition Example.xlsx"
+            copy2(DATA_DIRECTORY / wkbk, tmpdir)
+
+            create_md_model([tmpdir / wkbk], reporter="none")
+            self.assertTrue((tmpdir / "Composition Example.json").is_file())
+            self.assertListEqual([], list(tmpdir.glob("*reporter*")))
+
+            create_md_model([tmpdir / wkbk], reporter="csv")
+            reporter = pd.read_csv(
+                tmpdir / "Composition Example-reporter-create.csv"
+            )
+            self.assertIn("metatype", reporter.columns)
+            self.assertFalse(
+                (tmpdir / "Composition Example-reporter.xlsx").exists()
+            )
+
+    def test_create_operations(self):
+        pattern = PATTERNS / "Composition.json"
+        translator = MDTranslator(
+            json_path=pattern, json_data=json.loads(pattern.read_text())
+        )
+        evaluator = Evaluator(
+            excel_file=DATA_DIRECTORY / "Composition Example.xlsx",
+            translator=translator,
+        )
+        evaluator.rename_df_columns()
+        evaluator.add_missing_columns()
+        evaluator.to_property_di_graph()
+        vert_set = evaluator.prop_di_graph.vertex_set
+
+        operations = create_operations(vert_set, translator)
+        # a generator, nothing is converted before it is consumed
+        self.assertEqual(iter(operations), operations)
+        categories = [category for category, _ in operations]
+        self.assertEqual(len(vert_set), categories.count("create"))
+        # nodes are created before they are decorated or connected
+        first = categories.index("decorations")
+        self.assertListEqual(["create"] * first, categories[:first])
+        edges_at = categories.index("edges")
+        self.assertSetEqual({"edges"}, set(categories[edges_at:]))
+
+    def test_create_md_model_deterministic_ids(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            wkbk = tmpdir / "Composition Example.xlsx"
+            copy2(DATA_DIRECTORY / wkbk.name, tmpdir)
+            json_file = wkbk.with_suffix(".json")
+
+            outputs = []
+            for _ in range(2):
+                create_md_model([wkbk], deterministic_ids=True)
+                outputs.append(json_file.read_text())
+            self.assertEqual(outputs[0], outputs[1])
+
+            create_md_model([wkbk])
+            self.assertNotEqual(outputs[0], json_file.read_text())
+
+    def test_create_md_model_deterministic_ids_numeric(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            wkbk = Path(tmpdir) / "Composition Example.xlsx"
+            sheets = pd.read_excel(
+                DATA_DIRECTORY / wkbk.name, sheet_name=None
+            )
+            # an integer cell gives an int node name next to the str ones
+            sheets["composition"].loc[0, "Part"] = 42
+            with pd.ExcelWriter(wkbk) as writer:
+                for name, df in sheets.items():
+                    df.to_excel(writer, sheet_name=name, index=False)
+
+            outputs = []
+            for _ in range(2):
+                create_md_model([wkbk], deterministic_ids=True)
+                outputs.append(wkbk.with_suffix(".json").read_text())
+            self.assertEqual(outputs[0], outputs[1])
+            names = [
+                target["ops"][0]["name"]
+                for target in json.loads(outputs[0])["modification targets"]
+                if target["ops"][0]["op"] == "create"
+            ]
+            self.assertIn(42, names)
+
     def test_compare_md_model(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             tmpdir = Path(tmpdir)
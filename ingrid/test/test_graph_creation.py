@@ -10,11 +10,25 @@ import tempfile
 import unittest
 import uuid
 from pathlib import Path
+from unittest import mock
 
+import numpy as np
 import pandas as pd
 
-from model_processing.graph_creation import Evaluator, Manager, MDTranslator
-from model_processing.graph_objects import DiEdge, PropertyDiGraph, Vertex
+from model_processing.graph_creation import (
+    Evaluator,
+    Manager,
+    MDTranslator,
+    diff_change_file,
+    set_baseline_evaluator,
+    workbook_namespace,
+)
+from model_processing.graph_objects import (
+    CSRDiGraph,
+    DiEdge,
+    PropertyDiGraph,
+    Vertex,
+)
 
 from . import DATA_DIRECTORY, OUTPUT_DIRECTORY, PATTERNS
 
@@ -215,6 +229,106 @@ class TestManager(unittest.TestCase):
                 orig_edge2: {unstab_edge1, renm_source, unstab_edge2}
             }
 
+    def test_get_pattern_graph_diff_jobs(self):
+        excel_path = [
+            DATA_DIRECTORY / "Composition Example 2 Model Baseline.xlsx",
+            DATA_DIRECTORY / "Composition Example 2 Model Changed.xlsx",
+            DATA_DIRECTORY / "Composition Example 2 Model Changed 2.xlsx",
+        ]
+        json_path = [PATTERNS / "Composition.json"]
+        results = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for jobs in (1, 2):
+                manager = Manager(
+                    excel_path=excel_path, json_path=json_path, jobs=jobs
+                )
+                for evaluator in manager.evaluators:
+                    evaluator.rename_df_columns()
+                    evaluator.add_missing_columns()
+                    evaluator.to_property_di_graph()
+                out_directory = Path(tmpdir) / str(jobs)
+                out_directory.mkdir()
+                results.append(
+                    manager.get_pattern_graph_diff(
+                        out_directory=out_directory
+                    )
+                )
+                self.assertEqual(
+                    2, len(list(out_directory.glob("graph_diff_*[)].json")))
+                )
+
+            self.assertEqual(1, len(manager.evaluators))
+            self.assertEqual(excel_path[1:], manager.change_files)
+
+        serial, parallel = results
+        self.assertListEqual(["0-1", "0-2"], list(parallel.keys()))
+        for key in serial:
+            for outer in ("Changes", "Unstable Pairs"):
+                serial_named = {
+                    str(k): sorted(
+                        edge.named_edge_triple
+                        for edge in serial[key][outer][k]
+                    )
+                    for k in serial[key][outer]
+                }
+                parallel_named = {
+                    str(k): sorted(
+                        edge.named_edge_triple
+                        for edge in parallel[key][outer][k]
+                    )
+                    for k in parallel[key][outer]
+                }
+                self.assertDictEqual(serial_named, parallel_named)
+
+    def test_diff_change_file(self):
+        excel_path = [
+            DATA_DIRECTORY / "Composition Example 2 Model Baseline.xlsx",
+            DATA_DIRECTORY / "Composition Example 2 Model Changed.xlsx",
+            DATA_DIRECTORY / "Composition Example 2 Model Changed 2.xlsx",
+        ]
+        manager = Manager(
+            excel_path=excel_path,
+            json_path=[PATTERNS / "Composition.json"],
+            jobs=2,
+        )
+        orig_eval = manager.evaluators[0]
+        orig_eval.rename_df_columns()
+        orig_eval.add_missing_columns()
+        orig_eval.to_property_di_graph()
+        snapshot = manager.change_translator
+        known = dict(snapshot.uml_id)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # as one worker running every task
+            set_baseline_evaluator(
+                orig_eval,
+                snapshot,
+                {
+                    "cache_dir": None,
+                    "graph_backend": "networkx",
+                    "compact": False,
+                    "chunk_size": None,
+                    "reporter": "none",
+                    "out_directory": Path(tmpdir),
+                },
+            )
+            # the workers diff without building a throwaway Manager
+            with mock.patch(
+                "model_processing.graph_creation.Manager",
+                side_effect=AssertionError("Manager built"),
+            ):
+                keys = [
+                    diff_change_file((excel_file, "0-{0}".format(count)))[0]
+                    for count, excel_file in enumerate(
+                        excel_path[1:], start=1
+                    )
+                ]
+            self.assertEqual(
+                2, len(list(Path(tmpdir).glob("graph_diff_*[)].json")))
+            )
+        self.assertListEqual(["0-1", "0-2"], keys)
+        # the change files never write to the shared snapshot
+        self.assertDictEqual(known, dict(snapshot.uml_id))
+
     def test_changes_to_excel(self):
         manager = Manager(
             excel_path=[
@@ -383,9 +497,11 @@ class TestManager(unittest.TestCase):
                 target=Vertex(name="car", id="_002"),
                 edge_attribute="type",
             )
+            # DiEdges are equal by their named edge triple so each
+            # original edge needs distinct names to be its own key.
             orig_edge5 = DiEdge(
                 source=Vertex(name="Car", id="_001"),
-                target=Vertex(name="Vehicle", id="_005"),
+                target=Vertex(name="Truck", id="_005"),
                 edge_attribute="type",
             )
             new_target = DiEdge(
@@ -398,8 +514,8 @@ class TestManager(unittest.TestCase):
                 edge_attribute="type",
             )
             orig_edge6 = DiEdge(
-                source=Vertex(name="Car", id="_007"),
-                target=Vertex(name="Vehicle", id="_005"),
+                source=Vertex(name="Van", id="_007"),
+                target=Vertex(name="Truck", id="_005"),
                 edge_attribute="type",
             )
             new_sub = Vertex(
@@ -624,6 +740,27 @@ class TestEvaluator(unittest.TestCase):
         self.assertListEqual(expected_cols, list(self.evaluator.df.columns))
         self.assertEqual(set(), self.evaluator.root_node_attr_columns)
 
+    def test_add_missing_columns_blank(self):
+        evaluator = Evaluator(
+            excel_file=DATA_DIRECTORY / "Composition Example.xlsx",
+            translator=self.translator,
+        )
+        evaluator.rename_df_columns()
+        position, part = evaluator.df.columns[1:3]
+        # parts are not used to infer node names, a blank one is kept
+        evaluator.df.iloc[3, 2] = np.nan
+        evaluator.add_missing_columns()
+        self.assertTrue(evaluator.df[part].isna().any())
+
+        evaluator = Evaluator(
+            excel_file=DATA_DIRECTORY / "Composition Example.xlsx",
+            translator=self.translator,
+        )
+        evaluator.rename_df_columns()
+        evaluator.df.iloc[3, 1] = np.nan
+        with self.assertRaisesRegex(RuntimeError, position):
+            evaluator.add_missing_columns()
+
     def test_add_missing_columns(self):
         # TODO: explicitly check that the new columns are made.
         # TODO: remove reliance on excelfile data.
@@ -723,9 +860,19 @@ class TestEvaluator(unittest.TestCase):
         evaluator = Evaluator(excel_file=file, translator=tr)
         evaluator.rename_df_columns()
         evaluator.add_missing_columns()
+        df_before = evaluator.df.copy()
         evaluator.to_property_di_graph()
         pdg = evaluator.prop_di_graph
 
+        # the edge types are not added to the DataFrame as columns
+        self.assertTrue(df_before.equals(evaluator.df))
+        pattern_edges = {
+            (row[pair[0]], row[pair[1]])
+            for pair in tr.get_pattern_graph_edges()
+            for _, row in evaluator.df.iterrows()
+        }
+        self.assertSetEqual(pattern_edges, set(pdg.edges))
+
         for node in list(pdg):
             self.assertEqual(node, pdg.nodes[node][node].name)
 
@@ -738,6 +885,63 @@ class TestEvaluator(unittest.TestCase):
             self.assertEqual(source_edge, source_pdg)
             self.assertEqual(target_edge, target_pdg)
 
+    def test_to_property_di_graph_csr(self):
+        json_data = (PATTERNS / "Composition.json").read_text()
+        json_data = json.loads(json_data)
+        file = DATA_DIRECTORY / "Composition Example 2 Model partial_map.xlsx"
+        graphs = {}
+        for backend in ("networkx", "csr"):
+            tr = MDTranslator(
+                json_path=(PATTERNS / "Composition.json"), json_data=json_data
+            )
+            evaluator = Evaluator(
+                excel_file=file, translator=tr, graph_backend=backend
+            )
+            evaluator.rename_df_columns()
+            evaluator.add_missing_columns()
+            evaluator.to_property_di_graph()
+            graphs[backend] = evaluator.prop_di_graph
+
+        pdg, csr = graphs["networkx"], graphs["csr"]
+        self.assertIsInstance(csr, CSRDiGraph)
+        self.assertListEqual(list(pdg), list(csr))
+        self.assertSetEqual(pdg.named_edge_set, csr.named_edge_set)
+        for vertex in csr.vertex_set:
+            nx_vertex = pdg.nodes[vertex.name][vertex.name]
+            self.assertListEqual(nx_vertex.connections, vertex.connections)
+            self.assertEqual(nx_vertex.node_types, vertex.node_types)
+            self.assertEqual(nx_vertex.settings, vertex.settings)
+
+        with self.assertRaises(RuntimeError):
+            Evaluator(excel_file=file, translator=tr, graph_backend="dict")
+
+    def test_to_property_di_graph_blank_cell(self):
+        json_data = (PATTERNS / "Composition.json").read_text()
+        json_data = json.loads(json_data)
+        file = DATA_DIRECTORY / "Composition Example.xlsx"
+        graphs = {}
+        for backend in ("networkx", "csr"):
+            tr = MDTranslator(
+                json_path=(PATTERNS / "Composition.json"), json_data=json_data
+            )
+            evaluator = Evaluator(
+                excel_file=file, translator=tr, graph_backend=backend
+            )
+            # a blank Part cell
+            evaluator.df.iloc[3, 2] = np.nan
+            evaluator.rename_df_columns()
+            evaluator.add_missing_columns()
+            evaluator.to_property_di_graph()
+            graphs[backend] = evaluator.prop_di_graph
+
+        pdg, csr = graphs["networkx"], graphs["csr"]
+        self.assertListEqual(list(pdg), list(csr))
+        self.assertSetEqual(pdg.named_vertex_set, csr.named_vertex_set)
+        self.assertSetEqual(pdg.named_edge_set, csr.named_edge_set)
+        self.assertSetEqual(pdg.edge_set, csr.edge_set)
+        # the blank cell names no node
+        self.assertFalse(any(pd.isna(name) for name in pdg.named_vertex_set))
+
     def tearDown(self):
         pass
 
@@ -752,6 +956,49 @@ class TestMDTranslator(unittest.TestCase):
             json_path=(PATTERNS / "Composition.json"), json_data=data
         )
 
+    def test_overlay(self):
+        self.translator.uml_id.update({"Car": "_001"})
+        overlay = self.translator.overlay()
+        self.assertIs(self.translator.data, overlay.data)
+        self.assertEqual("_001", overlay.get_uml_id(name="Car"))
+
+        # additions stay in their own layer on either side
+        new_id = overlay.get_uml_id(name="Engine")
+        self.assertIsInstance(new_id, uuid.UUID)
+        self.assertNotIn("Engine", self.translator.uml_id)
+        self.translator.get_uml_id(name="Wheel")
+        self.assertNotIn("Wheel", overlay.uml_id)
+        second = self.translator.overlay()
+        self.assertIn("Wheel", second.uml_id)
+        self.assertNotIn("Engine", second.uml_id)
+
+        # the shared layers are never written to again
+        overlay.uml_id.update({"Car": "_002"})
+        self.assertEqual("_001", self.translator.uml_id["Car"])
+        self.assertEqual("_001", second.uml_id["Car"])
+
+    def test_get_uml_id_deterministic(self):
+        self.assertIsNone(self.translator.id_namespace)
+        namespace = workbook_namespace(DATA_DIRECTORY / "Composition.xlsx")
+        self.assertEqual(namespace, workbook_namespace("a/Composition.xlsx"))
+
+        ids = []
+        for workbook in ("Composition.xlsx", "Composition.xlsx", "B.xlsx"):
+            translator = MDTranslator(
+                json_path=self.translator.json_path,
+                json_data=self.translator.data,
+                id_namespace=workbook_namespace(workbook),
+            )
+            ids.append(translator.get_uml_id(name="Car"))
+            self.assertNotEqual(ids[-1], translator.get_uml_id(name="Wheel"))
+            self.assertEqual(
+                ids[-1], translator.overlay().get_uml_id(name="Car")
+            )
+        # new nodes are still spotted by their UUID ids
+        self.assertIsInstance(ids[0], uuid.UUID)
+        self.assertEqual(ids[0], ids[1])
+        self.assertNotEqual(ids[0], ids[2])
+
     def test_get_root_node(self):
         root_node = "component"
         self.assertEqual(root_node, self.translator.get_root_node())
@@ -855,5 +1102,42 @@ class TestMDTranslator(unittest.TestCase):
         setting = self.translator.get_uml_settings(node_key="component")
         self.assertEqual({"aggregation": "composite"}, setting)
 
+    def test_get_uml_decorations(self):
+        data = json.loads((PATTERNS / "Composition.json").read_text())
+        data["Vertex Settings"]["Atomic Thing"] = {
+            "propertyPath": ["id-Engine", "id-Wheel"]
+        }
+        translator = MDTranslator(
+            json_path=(PATTERNS / "Composition.json"), json_data=data
+        )
+        decorations = translator.get_uml_decorations()
+        self.assertDictEqual(
+            {
+                ("aggregation", "composite"): {
+                    "op": "replace",
+                    "path": "aggregation",
+                    "value": "composite",
+                },
+                ("propertyPath", ("id-Engine", "id-Wheel")): {
+                    "op": "replace",
+                    "path": "propertyPath",
+                    "value": ["id-Engine", "id-Wheel"],
+                },
+            },
+            decorations,
+        )
+        self.assertIs(decorations, translator.get_uml_decorations())
+
+        # rebuilt once a name in a setting value has an id
+        translator.uml_id["id-Wheel"] = "_wheel"
+        decorations = translator.get_uml_decorations()
+        self.assertListEqual(
+            ["_wheel"],
+            decorations[("propertyPath", ("id-Engine", "id-Wheel"))]["value"],
+        )
+        self.assertEqual(
+            "composite", decorations[("aggregation", "composite")]["value"],
+        )
+
     def tearDown(self):
         pass
@@ -6,12 +6,19 @@ the BSD 3-Clause license. See the LICENSE file for details.
 
 
 import json
+import pickle
 import unittest
+import uuid
 
 import pandas as pd
 
 from model_processing.graph_creation import Evaluator, MDTranslator
-from model_processing.graph_objects import DiEdge, PropertyDiGraph, Vertex
+from model_processing.graph_objects import (
+    CSRDiGraph,
+    DiEdge,
+    PropertyDiGraph,
+    Vertex,
+)
 
 from . import DATA_DIRECTORY, PATTERNS
 
@@ -42,6 +49,36 @@ class TestPropertyDiGraph(unittest.TestCase):
         self.evaluator.to_property_di_graph()
         self.Graph = self.evaluator.prop_di_graph
 
+    def test_views_invalidated(self):
+        vertex_set = self.Graph.vertex_set
+        edge_set = self.Graph.edge_set
+        self.assertSetEqual(vertex_set, self.Graph.vertex_set)
+        # the memoized views are handed out read only, not copied
+        self.assertIs(edge_set, self.Graph.edge_set)
+        self.assertIsInstance(edge_set, frozenset)
+        with self.assertRaises(TypeError):
+            self.Graph.edge_dict[("Car", "Engine", "type")] = None
+
+        car = self.Graph.nodes["Car"]["Car"]
+        engine = self.Graph.nodes["Engine"]["Engine"]
+        new_edge = DiEdge(source=car, target=engine, edge_attribute="type")
+        self.Graph.add_edge("Car", "Engine", edge_attribute="type")
+        self.Graph.edges["Car", "Engine"]["diedge"] = new_edge
+        self.Graph.clear_views()
+        self.assertIn(new_edge, self.Graph.edge_set)
+        self.assertIn(("Car", "Engine", "type"), self.Graph.named_edge_set)
+        self.assertIs(
+            new_edge, self.Graph.edge_dict[("Car", "Engine", "type")]
+        )
+
+        self.Graph.remove_node("Engine")
+        self.assertNotIn(engine, self.Graph.vertex_set)
+        self.assertNotIn("Engine", self.Graph.named_vertex_set)
+        self.assertNotIn(("Car", "Engine", "type"), self.Graph.named_edge_set)
+
+        self.Graph.add_node("Truck", **{"Truck": Vertex(name="Truck")})
+        self.assertIn("Truck", self.Graph.named_vertex_set)
+
     def test_named_vertex_set(self):
         expect_vert_set = {
             "car qua engine context",
@@ -172,6 +209,77 @@ class TestPropertyDiGraph(unittest.TestCase):
         pass
 
 
+class TestCSRDiGraph(unittest.TestCase):
+    def setUp(self):
+        self.edge_table = [
+            ("Car", "engine", "owner"),
+            ("engine", "Engine", "type"),
+            ("Car", "rear driver", "owner"),
+            ("rear driver", "Wheel", "type"),
+            ("Car", "engine", "type"),
+            ("Wheel", float("nan"), "owner"),
+            ("engine", "Car", "type"),
+        ]
+
+    def test_from_edge_table(self):
+        csr = CSRDiGraph.from_edge_table(self.edge_table)
+        nx_graph = PropertyDiGraph.from_edge_table(self.edge_table[:5])
+        nx_graph.add_edge("engine", "Car", edge_attribute="type")
+
+        # nodes in order of first appearance, missing endpoints skipped
+        self.assertListEqual(list(nx_graph), list(csr))
+        self.assertEqual(nx_graph.number_of_edges(), csr.number_of_edges())
+        self.assertNotIn("Wheel", csr.predecessors("Car"))
+        for node in nx_graph:
+            self.assertIn(node, csr)
+            self.assertListEqual(
+                list(nx_graph.successors(node)), csr.successors(node)
+            )
+            self.assertListEqual(
+                nx_graph.successor_connections(node),
+                csr.successor_connections(node),
+            )
+            self.assertListEqual(
+                nx_graph.predecessor_connections(node),
+                csr.predecessor_connections(node),
+            )
+        # the later edge attribute wins for a repeated node pair
+        self.assertEqual(
+            "type", csr.successor_connections("Car")[0]["edge_attribute"]
+        )
+        self.assertListEqual([], csr.successor_connections("Truck"))
+
+    def test_edge_views(self):
+        csr = CSRDiGraph.from_edge_table(self.edge_table)
+        with self.assertRaises(RuntimeError):
+            csr.set_vertices([Vertex(name="Car", graph=csr)])
+        csr.set_vertices(Vertex(name=node, graph=csr) for node in csr)
+
+        self.assertSetEqual(set(csr), csr.named_vertex_set)
+        self.assertSetEqual(
+            {vertex.name for vertex in csr.vertex_set}, csr.named_vertex_set
+        )
+        expected = {
+            ("Car", "engine", "type"),
+            ("engine", "Engine", "type"),
+            ("Car", "rear driver", "owner"),
+            ("rear driver", "Wheel", "type"),
+            ("engine", "Car", "type"),
+        }
+        self.assertSetEqual(expected, csr.named_edge_set)
+        self.assertSetEqual(expected, set(csr.edge_dict))
+        self.assertEqual(5, len(csr.edge_set))
+        car = csr.edge_dict[("Car", "engine", "type")].source
+        self.assertIs(csr, car.graph)
+        self.assertEqual(3, len(car.connections))
+
+        copied = pickle.loads(pickle.dumps(csr))
+        self.assertSetEqual(expected, copied.named_edge_set)
+
+    def tearDown(self):
+        pass
+
+
 class TestVertex(unittest.TestCase):
     def setUp(self):
         data = (PATTERNS / "Composition.json").read_text()
@@ -229,6 +337,22 @@ class TestVertex(unittest.TestCase):
             == vertex_2_connections
         )
 
+    def test_graph_connections(self):
+        Test_Graph = PropertyDiGraph()
+        Test_Graph.add_edge("Car", "engine", edge_attribute="owner")
+        Test_Graph.add_edge("engine", "Car", edge_attribute="type")
+        car = Vertex(name="Car", graph=Test_Graph)
+        self.assertFalse(hasattr(car, "__dict__"))
+
+        # read from the graph on access, not copied onto the vertex
+        expect = [
+            {"source": "Car", "target": "engine", "edge_attribute": "owner"},
+            {"source": "engine", "target": "Car", "edge_attribute": "type"},
+        ]
+        self.assertListEqual(expect, car.connections)
+        Test_Graph.add_edge("Car", "wheel", edge_attribute="owner")
+        self.assertEqual(3, len(car.connections))
+
     def test_vertex_to_dict(self):
         # This also tests the Vertex.to_dict() method in a round about way
         vertex_car = Vertex(
@@ -423,6 +547,50 @@ class TestVertex(unittest.TestCase):
 
         self.assertListEqual(engine_uml[2], engine_edge_uml)
 
+    def test_uml_id(self):
+        edge_table = [
+            ("Car", "engine", "owner"),
+            ("engine", "Engine", "type"),
+        ]
+        ids = {
+            "Car": "_18_0_2_876026b_1",
+            "engine": uuid.uuid4(),
+            "Engine": uuid.uuid4(),
+        }
+        for backend in (PropertyDiGraph, CSRDiGraph):
+            graph = backend.from_edge_table(edge_table)
+            graph.set_vertices(
+                Vertex(
+                    name=node,
+                    node_types=["component"],
+                    id=ids[node],
+                    graph=graph,
+                )
+                for node in graph
+            )
+            engine = graph.get_vertex("engine")
+            self.assertEqual("engine", engine.name)
+            self.assertEqual("new_" + str(ids["engine"]), engine.uml_id)
+            self.assertIs(engine.uml_id, engine.uml_id)
+            self.assertIsNone(graph.get_vertex("Truck"))
+
+            # the endpoints come from the vertices, not the translator
+            self.translator.uml_id = {}
+            _, _, edge_uml = engine.create_node_to_uml(
+                translator=self.translator
+            )
+            self.assertDictEqual({}, self.translator.uml_id)
+            self.assertListEqual(
+                [
+                    (
+                        "new_" + str(ids["engine"]),
+                        "new_" + str(ids["Engine"]),
+                    ),
+                    ("_18_0_2_876026b_1", "new_" + str(ids["engine"])),
+                ],
+                [(edge["id"], edge["ops"][0]["value"]) for edge in edge_uml],
+            )
+
     def test_change_node_to_uml(self):
         data = (PATTERNS / "Composition.json").read_text()
         data = json.loads(data)
@@ -575,6 +743,52 @@ class TestDiEdge(unittest.TestCase):
         expected_triple = ({"Composite Thing"}, {"component"}, "owner")
         self.assertTupleEqual(expected_triple, edge.edge_vert_type_triple)
 
+    def test_eq_hash(self):
+        edge = DiEdge(
+            source=Vertex(name="Car", id="_001"),
+            target=Vertex(name="car", id="_002"),
+            edge_attribute="owner",
+        )
+        same = DiEdge(
+            source=Vertex(name="Car", id=uuid.uuid4()),
+            target=Vertex(name="car"),
+            edge_attribute="owner",
+        )
+        other = DiEdge(
+            source=Vertex(name="Car"),
+            target=Vertex(name="car"),
+            edge_attribute="type",
+        )
+        self.assertEqual(edge, same)
+        self.assertEqual(hash(edge), hash(same))
+        self.assertNotEqual(edge, other)
+        self.assertNotEqual(edge, "Added")
+        self.assertSetEqual({other}, {edge, other}.difference({same}))
+
+    def test_pickle_graph(self):
+        Test_Graph = PropertyDiGraph()
+        Test_Graph.add_edge("Car", "engine", edge_attribute="owner")
+        for node in Test_Graph:
+            Test_Graph.add_node(
+                node, **{node: Vertex(name=node, graph=Test_Graph)}
+            )
+        Test_Graph.add_edge(
+            "Car",
+            "engine",
+            diedge=DiEdge(
+                source=Test_Graph.nodes["Car"]["Car"],
+                target=Test_Graph.nodes["engine"]["engine"],
+                edge_attribute="owner",
+            ),
+        )
+        edge_set = Test_Graph.edge_set
+
+        copied = pickle.loads(pickle.dumps(Test_Graph))
+        self.assertSetEqual(edge_set, copied.edge_set)
+        car = copied.nodes["Car"]["Car"]
+        self.assertIs(copied, car.graph)
+        self.assertEqual("engine", car.successors[0]["target"])
+
     def test_property_named_edge_triple(self):
         Car = Vertex(name="Car")
         car = Vertex(name="car")
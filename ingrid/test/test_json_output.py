@@ -0,0 +1,146 @@
+"""
+Copyright (C) 2020 by the Georgia Tech Research Institute (GTRI)
+This software may be modified and distributed under the terms of
+the BSD 3-Clause license. See the LICENSE file for details.
+"""
+
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from model_processing.json_output import (
+    CHUNKS_KEY,
+    TARGETS_KEY,
+    ChunkedPlayerPianoWriter,
+    PlayerPianoWriter,
+    player_piano_writer,
+)
+
+
+class TestPlayerPianoWriter(unittest.TestCase):
+    def setUp(self):
+        self.targets = [
+            {
+                "id": "new_0",
+                "ops": [
+                    {
+                        "op": "create",
+                        "name": "Car",
+                        "path": None,
+                        "metatype": "Class",
+                    }
+                ],
+            },
+            {
+                "id": "new_1",
+                "ops": [
+                    {"op": "replace", "path": "/m2/owner", "value": "new_0"}
+                ],
+            },
+        ]
+
+    def write_targets(self, path, header=None, compact=False):
+        with PlayerPianoWriter(path, header=header, compact=compact) as w:
+            w.write(self.targets[0])
+            w.extend(self.targets[1:])
+        return w
+
+    def test_write(self):
+        headers = [
+            None,
+            {"filepath": "/tmp/Composition Example.xlsx"},
+            {"filepath": "a.xlsx", "pattern": {"name": "composition"}},
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = Path(tmpdir) / "out.json"
+            for header in headers:
+                json_out = dict(header or {})
+                json_out[TARGETS_KEY] = self.targets
+                writer = self.write_targets(outfile, header=header)
+                self.assertEqual(2, writer.count)
+                self.assertEqual(
+                    json.dumps(json_out, indent=4, sort_keys=True),
+                    outfile.read_text(),
+                )
+
+                self.write_targets(outfile, header=header, compact=True)
+                self.assertEqual(
+                    json.dumps(json_out, sort_keys=True), outfile.read_text()
+                )
+
+            for compact in (False, True):
+                with PlayerPianoWriter(outfile, compact=compact):
+                    pass
+                self.assertDictEqual(
+                    {TARGETS_KEY: []}, json.loads(outfile.read_text())
+                )
+
+    def test_write_error(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = Path(tmpdir) / "out.json"
+            with self.assertRaises(RuntimeError):
+                with PlayerPianoWriter(outfile) as writer:
+                    writer.extend(self.targets)
+                    raise RuntimeError("failed")
+            # an unfinished file is never mistaken for a complete one
+            with self.assertRaises(json.JSONDecodeError):
+                json.loads(outfile.read_text())
+
+    def test_chunked_write(self):
+        targets = [{"id": "new_{0}".format(i), "ops": []} for i in range(5)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            outfile = Path(tmpdir) / "Model.json"
+            header = {"filepath": "Model.xlsx"}
+            with player_piano_writer(
+                outfile, header=header, chunk_size=2
+            ) as writer:
+                self.assertIsInstance(writer, ChunkedPlayerPianoWriter)
+                writer.extend(targets)
+            self.assertEqual(5, writer.count)
+
+            index = json.loads(outfile.read_text())
+            self.assertEqual("Model.xlsx", index["filepath"])
+            self.assertListEqual([], index[TARGETS_KEY])
+            self.assertListEqual(
+                ["Model-1.json", "Model-2.json", "Model-3.json"],
+                index[CHUNKS_KEY],
+            )
+            chunked = []
+            for name in index[CHUNKS_KEY]:
+                chunk = json.loads((Path(tmpdir) / name).read_text())
+                self.assertLessEqual(len(chunk[TARGETS_KEY]), 2)
+                chunked.extend(chunk[TARGETS_KEY])
+            self.assertListEqual(targets, chunked)
+
+            with player_piano_writer(outfile, chunk_size=2):
+                pass
+            self.assertListEqual(
+                [], json.loads(outfile.read_text())[CHUNKS_KEY]
+            )
+            # a shorter run leaves no stale chunks of the longer one
+            self.assertListEqual(
+                ["Model.json"], sorted(p.name for p in Path(tmpdir).iterdir())
+            )
+            with player_piano_writer(outfile, chunk_size=1) as writer:
+                writer.extend(targets)
+            with player_piano_writer(outfile, chunk_size=2) as writer:
+                writer.extend(targets[:3])
+            self.assertListEqual(
+                ["Model-1.json", "Model-2.json", "Model.json"],
+                sorted(p.name for p in Path(tmpdir).iterdir()),
+            )
+
+            self.assertIsInstance(
+                player_piano_writer(outfile), PlayerPianoWriter
+            )
+            with self.assertRaises(ValueError):
+                ChunkedPlayerPianoWriter(outfile, chunk_size=0)
+
+    def tearDown(self):
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
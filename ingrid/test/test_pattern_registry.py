@@ -0,0 +1,168 @@
+"""
+Copyright (C) 2020 by the Georgia Tech Research Institute (GTRI)
+This software may be modified and distributed under the terms of
+the BSD 3-Clause license. See the LICENSE file for details.
+"""
+
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from model_processing.graph_creation import Manager, MDTranslator
+from model_processing.pattern_registry import (
+    PATTERN_REGISTRY,
+    Pattern,
+    compiled_path,
+    find_patterns,
+    load_pattern,
+)
+
+from . import PATTERNS
+
+
+class TestPatternRegistry(unittest.TestCase):
+    def setUp(self):
+        self.data = json.loads((PATTERNS / "Composition.json").read_text())
+
+    def test_pattern_tables(self):
+        pattern = Pattern(path=PATTERNS / "Composition.json", data=self.data)
+        self.assertEqual("composition", pattern.name)
+        expect_vertices = {
+            vert
+            for edge in self.data["Pattern Graph Edges"]
+            for vert in edge[:2]
+        }
+        self.assertSetEqual(expect_vertices, set(pattern.vertices()))
+        self.assertEqual(len(expect_vertices), len(pattern.vertices()))
+        self.assertListEqual(
+            [edge[-1] for edge in self.data["Pattern Graph Edges"]],
+            list(pattern.edge_types()),
+        )
+        self.assertEqual("Atomic Thing", pattern.column_names()["Part"])
+        self.assertDictEqual(
+            {"component": (("aggregation", "composite"),)},
+            pattern.vertex_settings(),
+        )
+
+        plan = {
+            col: (rule, parts)
+            for col, rule, parts in pattern.derived_columns()
+        }
+        self.assertEqual(
+            ("under", ("A", "composite owner", "component", "")),
+            plan["A_composite owner_component"],
+        )
+        self.assertEqual(
+            ("space", ("composite", "owner")), plan["composite owner"]
+        )
+        dashed = Pattern(
+            path="Dashed.json",
+            data={"Pattern Graph Edges": [["A_x_y-end1", "y", "memberEnd"]]},
+        )
+        self.assertEqual(
+            ("A_x_y-end1", "under", ("A", "x", "y", "-end1")),
+            dashed.derived_columns()[-1],
+        )
+        lengths = [len(col) for col, _, _ in pattern.derived_columns()]
+        self.assertListEqual(sorted(lengths), lengths)
+
+    def test_validate(self):
+        del self.data["Root Node"]
+        with self.assertRaises(RuntimeError):
+            Pattern(path="Broken.json", data=self.data).validate()
+
+        data = json.loads((PATTERNS / "Composition.json").read_text())
+        data["Pattern Graph Edges"].append(["Car", "Engine"])
+        with self.assertRaises(RuntimeError):
+            Pattern(path="Broken.json", data=data).validate()
+
+    def test_load_pattern(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pattern_file = Path(tmpdir) / "Composition.json"
+            pattern_file.write_text(json.dumps(self.data))
+
+            pattern = load_pattern(pattern_file)
+            self.assertIs(pattern, load_pattern(pattern_file))
+            self.assertIn(pattern_file.resolve(), PATTERN_REGISTRY)
+            # nothing is written next to the pattern file
+            self.assertListEqual([pattern_file], list(Path(tmpdir).iterdir()))
+
+            # an edited pattern file is loaded again
+            self.data["Root Node"] = "Part"
+            pattern_file.write_text(json.dumps(self.data, indent=4))
+            edited = load_pattern(pattern_file)
+            self.assertIsNot(pattern, edited)
+            self.assertEqual("Part", edited.data["Root Node"])
+
+            translator = MDTranslator(
+                json_path=pattern_file, json_data=edited.data, pattern=edited
+            )
+            self.assertIs(edited, translator.overlay().pattern)
+
+    def test_load_pattern_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pattern_dir = Path(tmpdir) / "patterns"
+            pattern_dir.mkdir()
+            cache_dir = Path(tmpdir) / "cache"
+            pattern_file = pattern_dir / "Composition.json"
+            pattern_file.write_text(json.dumps(self.data))
+
+            pattern = load_pattern(pattern_file, cache_dir=cache_dir)
+            cached_file = compiled_path(pattern_file, cache_dir)
+            self.assertTrue(cached_file.is_file())
+            self.assertEqual(cache_dir, cached_file.parents[1])
+            self.assertListEqual([pattern_file], list(pattern_dir.iterdir()))
+
+            # a new process only has the compiled pattern on disk
+            PATTERN_REGISTRY.pop(pattern_file.resolve())
+            with mock.patch(
+                "model_processing.pattern_registry.json.loads",
+                side_effect=AssertionError("pattern parsed"),
+            ):
+                cached = load_pattern(pattern_file, cache_dir=cache_dir)
+            self.assertIsNot(pattern, cached)
+            self.assertEqual(pattern.data, cached.data)
+            self.assertEqual(
+                pattern.derived_columns(), cached.derived_columns()
+            )
+
+            # an edited pattern file misses the cache
+            self.data["Root Node"] = "Part"
+            pattern_file.write_text(json.dumps(self.data, indent=4))
+            edited = load_pattern(pattern_file, cache_dir=cache_dir)
+            self.assertEqual("Part", edited.data["Root Node"])
+            self.assertEqual(2, len(list(cached_file.parent.iterdir())))
+
+    def test_find_patterns(self):
+        patterns = find_patterns(PATTERNS)
+        self.assertEqual(
+            PATTERNS / "Composition.json", patterns["composition"]
+        )
+        patterns.pop("composition")
+        self.assertIn("composition", find_patterns(PATTERNS))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            self.assertDictEqual({}, find_patterns(tmpdir))
+            (Path(tmpdir) / "Scratch.json").write_text("{}")
+            # make sure the directory signature changes
+            os.utime(tmpdir, ns=(0, 1))
+            self.assertListEqual(["scratch"], list(find_patterns(tmpdir)))
+
+    def test_manager_shares_pattern(self):
+        manager = Manager(json_path=[PATTERNS / "Composition.json"])
+        other = Manager(json_path=[PATTERNS / "Composition.json"])
+        self.assertIs(
+            manager.translator[0].pattern, other.translator[0].pattern
+        )
+        self.assertIs(manager.json_data[0], other.json_data[0])
+
+    def tearDown(self):
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ the BSD 3-Clause license. See the LICENSE file for details.
 import json
 import tempfile
 import unittest
+import uuid
 from copy import copy
 from functools import partial
 from pathlib import Path
@@ -18,27 +19,38 @@ import pandas as pd
 from model_processing.graph_creation import Manager, MDTranslator
 from model_processing.graph_objects import DiEdge, Vertex
 from model_processing.utils import (
+    ReporterWriter,
     associate_node_id,
     associate_node_types_settings,
     associate_predecessors,
     associate_renames,
     associate_successors,
     build_dict,
+    build_rename_automaton,
+    build_value_index,
+    compose_renames,
     create_column_values_singleton,
     create_column_values_space,
     create_column_values_under,
+    find_renames,
     get_node_types_attrs,
     get_setting_node_name_from_df,
+    index_change_edges,
     json_reporter_to_excel,
     make_string,
     match,
     match_changes,
+    match_indexed,
+    operation_key,
     remove_duplicates,
+    replace_values,
     set_newname_as_rename_index,
     to_excel_df,
+    to_uml_id,
     to_uml_json_decorations,
     to_uml_json_edge,
     to_uml_json_node,
+    unique_operations,
 )
 
 from . import DATA_DIRECTORY, PATTERNS
@@ -177,6 +189,43 @@ class TestUtils(unittest.TestCase):
         for test_pair in zip(expect_dict, map(partial_rename, changed_names)):
             assert test_pair[0] == test_pair[1]
 
+        automaton_rename = partial(
+            associate_renames,
+            df_renames,
+            tr,
+            rename_automaton=build_rename_automaton(df_renames.index),
+        )
+        for test_pair in zip(
+            expect_dict, map(automaton_rename, changed_names)
+        ):
+            self.assertDictEqual(test_pair[0], test_pair[1])
+        self.assertDictEqual(
+            {"original_name": None, "original_id": None},
+            automaton_rename("Wheel"),
+        )
+        # integer cells give numeric node names
+        self.assertDictEqual(
+            {"original_name": None, "original_id": None},
+            automaton_rename(42),
+        )
+
+    def test_find_renames(self):
+        new_names = ["he", "She", "his", "hers", "engine", "piston engine"]
+        automaton = build_rename_automaton(new_names)
+        for text in [
+            "ushers",
+            "a_piston engine_hers-end1",
+            "wheel",
+            "",
+            "shhis",
+        ]:
+            expect = {
+                position
+                for position, new_name in enumerate(new_names)
+                if new_name.lower() in text
+            }
+            self.assertSetEqual(expect, find_renames(automaton, text))
+
     def test_build_dict(self):
         arg = [{"id": 1}, {"name": "Car"}]
         built_dict = build_dict(arg)
@@ -215,6 +264,34 @@ class TestUtils(unittest.TestCase):
 
         assert df_0.equals(df_index) and df_1.equals(df1_index)
 
+    def test_compose_renames(self):
+        renames = compose_renames(
+            [("car", "vehicle"), ("engine", "motor"), ("vehicle", "truck")]
+        )
+        self.assertDictEqual(
+            {"car": "truck", "engine": "motor", "vehicle": "truck"}, renames
+        )
+        # a swap lands both names on the last new name, as two replaces do
+        self.assertDictEqual(
+            {"b": "a"}, compose_renames([("a", "b"), ("b", "a")])
+        )
+        self.assertDictEqual({}, compose_renames([]))
+
+    def test_replace_values(self):
+        df = pd.DataFrame(
+            data={
+                "Composite Thing": ["car", "car", "wheel", None],
+                "Atomic Thing": ["engine", "wheel", "hub", "car"],
+                "Notes": [1, 2, 3, 4],
+            }
+        )
+        pairs = [("car", "vehicle"), ("hub", "rim"), ("vehicle", "truck")]
+        expect = df.copy()
+        for old, new in pairs:
+            expect.replace(to_replace=old, value=new, inplace=True)
+        replace_values(df, compose_renames(pairs))
+        self.assertTrue(expect.equals(df))
+
     def test_create_column_values_under(self):
         data_dict = {
             "blockValue": ["Apple", "Orange"],
@@ -260,6 +337,67 @@ class TestUtils(unittest.TestCase):
         expectation = ["green apple", "blue context1"]
         self.assertListEqual(expectation, created_cols)
 
+        # a single name is repeated for every row
+        created_cols = create_column_values_singleton(
+            first_node_data=first_node_data, second_node_data="Context1"
+        )
+        expectation = ["green context1", "blue context1"]
+        self.assertListEqual(expectation, created_cols)
+
+    def test_create_column_values_index(self):
+        # rows dropped from the DataFrame leave gaps in the index, the
+        # values are still combined row by row
+        df = pd.DataFrame(
+            data={"value": ["Core", "Skin"], "blockValue": ["Apple", "Pear"]},
+            index=[3, 7],
+        )
+        self.assertListEqual(
+            ["A_core_apple-end1", "A_skin_pear-end1"],
+            create_column_values_under(
+                prefix="A",
+                first_node_data=df.loc[:, "value"],
+                second_node_data=list(df.loc[:, "blockValue"]),
+                suffix="-end1",
+            ),
+        )
+        self.assertListEqual(
+            ["core qua block context", "skin qua block context"],
+            create_column_values_space(
+                first_node_data=df.loc[:, "value"], second_node_data="Block",
+            ),
+        )
+        self.assertListEqual(
+            [],
+            create_column_values_singleton(
+                first_node_data=df.loc[[], "value"], second_node_data="x"
+            ),
+        )
+
+    def test_create_column_values_numeric(self):
+        # integer cells are read as ints, they name nodes like strings
+        df = pd.DataFrame(data={"value": ["Core", 42], "part": [7, "Pit"]})
+        self.assertListEqual(
+            ["A_core_7", "A_42_pit"],
+            create_column_values_under(
+                prefix="A",
+                first_node_data=df.loc[:, "value"],
+                second_node_data=list(df.loc[:, "part"]),
+            ),
+        )
+        self.assertListEqual(
+            ["core qua 7 context", "42 qua pit context"],
+            create_column_values_space(
+                first_node_data=df.loc[:, "value"],
+                second_node_data=df.loc[:, "part"],
+            ),
+        )
+        self.assertListEqual(
+            ["core x", "42 x"],
+            create_column_values_singleton(
+                first_node_data=df.loc[:, "value"], second_node_data="x"
+            ),
+        )
+
     def test_get_node_types_attrs(self):
         # TODO: Investigate this test.
         # TODO: Expand functionality, this leaves notes on the floor
@@ -287,6 +425,40 @@ class TestUtils(unittest.TestCase):
         self.assertEqual({"Atomic Thing"}, node_type_cols)
         self.assertListEqual(attr_list, node_attr_dict)
 
+        value_index = build_value_index(df)
+        for node in ("Car", "car", "owner", 2, "Truck"):
+            expected = get_node_types_attrs(
+                df=df,
+                node=node,
+                root_node_type="Atomic Thing",
+                root_attr_columns={"Notes", "Two such Cols"},
+            )
+            indexed = get_node_types_attrs(
+                df=df,
+                node=node,
+                root_node_type="Atomic Thing",
+                root_attr_columns={"Notes", "Two such Cols"},
+                value_index=value_index,
+            )
+            self.assertEqual(expected[0], indexed[0])
+            self.assertEqual(expected[1], indexed[1])
+
+    def test_build_value_index(self):
+        data_dict = {
+            "component": ["car", "wheel", None],
+            "Atomic Thing": ["Car", "Wheel", "Car"],
+            "Notes": ["Car", 6, 2],
+        }
+        df = pd.DataFrame(data=data_dict)
+        value_index = build_value_index(df)
+
+        self.assertDictEqual(
+            {"Atomic Thing": [0, 2], "Notes": [0]}, value_index["Car"]
+        )
+        self.assertDictEqual({"component": [1]}, value_index["wheel"])
+        self.assertDictEqual({"Notes": [2]}, value_index[2])
+        self.assertNotIn(None, value_index)
+
     def test_match_changes(self):
         manager = Manager(
             excel_path=[
@@ -364,14 +536,14 @@ class TestUtils(unittest.TestCase):
             edge_attribute="blue",
         )
 
-        eval_1_e_dict = pdg.edge_dict
+        eval_1_e_dict = dict(pdg.edge_dict)
         eval_1_e_dict.update({del_edge.named_edge_triple: del_edge})
-        eval_2_e_dict = pdg1.edge_dict
+        eval_2_e_dict = dict(pdg1.edge_dict)
         eval_2_e_dict.update({add_edge.named_edge_triple: add_edge})
 
-        edge_set_one = eval.edge_set  # get baseline edge set
+        edge_set_one = set(eval.edge_set)  # get baseline edge set
         edge_set_one.add(del_edge)
-        edge_set_two = eval1.edge_set  # get the changed edge set
+        edge_set_two = set(eval1.edge_set)  # get the changed edge set
         edge_set_two.add(add_edge)
 
         # remove common edges
@@ -613,6 +785,69 @@ class TestUtils(unittest.TestCase):
         match_rnm = match(*[rename_edge], current=og_edge)
         self.assertEqual(2, match_rnm[0])
 
+    def test_match_indexed(self):
+        car = Vertex(name="Car", id="1")
+        engine = Vertex(name="engine", id="2")
+        wheel = Vertex(name="wheel", id="3")
+        hub = Vertex(name="hub", id="5")
+        vehicle = Vertex(
+            name="Vehicle", id="4", original_id="1", original_name="Car"
+        )
+        og_edge = DiEdge(source=car, target=engine, edge_attribute="owner")
+        to_wheel = DiEdge(source=car, target=wheel, edge_attribute="owner")
+        from_wheel = DiEdge(
+            source=wheel, target=engine, edge_attribute="owner"
+        )
+        unrelated = DiEdge(source=wheel, target=hub, edge_attribute="owner")
+        renamed = DiEdge(
+            source=vehicle, target=engine, edge_attribute="owner"
+        )
+
+        def best(edges):
+            edge_index = index_change_edges(edges)
+            return match_indexed(
+                edges, current=og_edge, edge_index=edge_index
+            )
+
+        # the first edge scoring 2 wins outright
+        edges = [to_wheel, unrelated, renamed]
+        self.assertEqual(([renamed], True), best(edges))
+        self.assertEqual(2, max(match(*edges, current=og_edge)))
+        # a single edge scoring 1 over edges scoring 0
+        self.assertEqual(([to_wheel], True), best([unrelated, to_wheel]))
+        # ties keep their order in the list
+        self.assertEqual(
+            ([from_wheel, to_wheel], False),
+            best([from_wheel, unrelated, to_wheel]),
+        )
+        self.assertEqual(
+            ([unrelated, unrelated], False), best([unrelated, unrelated])
+        )
+        self.assertEqual(([unrelated], True), best([unrelated]))
+        self.assertEqual(([], True), best([]))
+
+        # same result as the pairwise scores in match_changes
+        other = DiEdge(source=hub, target=engine, edge_attribute="owner")
+        candidates = [unrelated, to_wheel, from_wheel]
+        change_dict = {
+            "Added": [],
+            "Deleted": [],
+            og_edge: candidates,
+            other: candidates,
+        }
+        matched, unstable = match_changes(change_dict=change_dict)
+        self.assertListEqual([from_wheel], matched[other])
+        self.assertListEqual([to_wheel, from_wheel], unstable[og_edge])
+        self.assertNotIn(og_edge, matched)
+
+        # mixed edge attributes fall back to the pairwise scores
+        typed = DiEdge(source=car, target=engine, edge_attribute="type")
+        matched, unstable = match_changes(
+            change_dict={og_edge: [typed, to_wheel]}
+        )
+        self.assertListEqual([to_wheel], matched[og_edge])
+        self.assertDictEqual({}, unstable)
+
     def test_get_setting_node_name_from_df(self):
         data_dict = {
             "component": ["car", "wheel", "engine"],
@@ -744,6 +979,62 @@ class TestUtils(unittest.TestCase):
         assert [attr_dict, attr_dict_cr] == fil_in
         pass
 
+    def test_operation_key(self):
+        attr_dict = {
+            "id": "_001",
+            "ops": [{"value": ["_002", "_003"], "path": "/m2/path"}],
+        }
+        self.assertTupleEqual(
+            ("_001", "_002", "/m2/path"), operation_key(attr_dict)
+        )
+        attr_dict_cr = {
+            "id": "_001",
+            "ops": [{"name": "new node", "value": {"a": 1}, "path": None}],
+        }
+        self.assertTupleEqual(
+            ("_001", "new node", None),
+            operation_key(attr_dict_cr, create=True),
+        )
+        self.assertTupleEqual(
+            ("_001", "{'a': 1}", None), operation_key(attr_dict_cr)
+        )
+
+    def test_unique_operations(self):
+        create = {
+            "id": "new_0",
+            "ops": [{"op": "create", "name": "Car", "path": None}],
+        }
+        other_create = {
+            "id": "new_0",
+            "ops": [{"op": "create", "name": "Truck", "path": None}],
+        }
+        edge = {
+            "id": "new_0",
+            "ops": [{"op": "replace", "path": "/m2/type", "value": "_1"}],
+        }
+        operations = [
+            ("create", create),
+            ("create", other_create),
+            ("edge delete", edge),
+            ("create", create),
+            ("edge add", edge),
+            ("edge add", dict(edge)),
+        ]
+        self.assertListEqual(
+            [
+                ("create", create),
+                ("create", other_create),
+                ("edge delete", edge),
+                ("edge add", edge),
+            ],
+            list(unique_operations(iter(operations))),
+        )
+
+    def test_to_uml_id(self):
+        self.assertEqual("_18_0_2_876026b_1", to_uml_id("_18_0_2_876026b_1"))
+        new_id = uuid.UUID("6a9b1c2e-3f4d-4e5f-8a7b-9c0d1e2f3a4b")
+        self.assertEqual("new_" + str(new_id), to_uml_id(new_id))
+
     def test_to_uml_json_node(self):
         in_dict = {
             "id": 0,
@@ -880,6 +1171,58 @@ class TestUtils(unittest.TestCase):
                 )
                 assert all(col in cr_df[df_key] for col in expect_columns)
 
+            json_reporter_to_excel(test_data, fh, file_format="csv")
+            for data_key in test_data:
+                csv_df = pd.read_csv(
+                    tmpdir / "Model Reporter 0-{0}.csv".format(data_key)
+                )
+                pd.testing.assert_frame_equal(cr_df[data_key], csv_df)
+
+            # a workbook needs a sheet even when there is nothing to report
+            empty = tmpdir / "Empty Reporter.xlsx"
+            json_reporter_to_excel({"create": [], "edges": []}, empty)
+            self.assertTrue(
+                all(df.empty for df in pd.read_excel(empty, None).values())
+            )
+
+            with self.assertRaises(RuntimeError):
+                json_reporter_to_excel(test_data, fh, file_format="xls")
+
+    def test_reporter_writer(self):
+        create = {
+            "id": "new_0",
+            "ops": [{"op": "create", "name": "Car", "metatype": "Class"}],
+        }
+        edge = {
+            "id": "new_1",
+            "ops": [{"op": "replace", "path": "/m2/type", "value": "new_0"}],
+        }
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fh = Path(tmpdir) / "Model-reporter.xlsx"
+            # categories may arrive interleaved
+            for file_format in ("xlsx", "csv"):
+                with ReporterWriter(fh, file_format=file_format) as reporter:
+                    reporter.write("create", create)
+                    reporter.write("edges", edge)
+                    reporter.write("create", create)
+            sheets = pd.read_excel(fh, sheet_name=None, index_col=0)
+            self.assertListEqual(["create", "edges"], list(sheets))
+            self.assertListEqual(
+                ["new_0", "new_0"], list(sheets["create"]["id"])
+            )
+            self.assertListEqual(
+                ["id", "op", "path", "value"], list(sheets["edges"].columns)
+            )
+            edges_csv = pd.read_csv(
+                Path(tmpdir) / "Model-reporter-edges.csv", index_col=0
+            )
+            pd.testing.assert_frame_equal(sheets["edges"], edges_csv)
+
+            none_fh = Path(tmpdir) / "None-reporter.xlsx"
+            with ReporterWriter(none_fh, file_format="none") as reporter:
+                reporter.write("create", create)
+            self.assertFalse(none_fh.exists())
+
     def tearDown(self):
         pass
 
@@ -0,0 +1,264 @@
+"""
+Copyright (C) 2020 by the Georgia Tech Research Institute (GTRI)
+This software may be modified and distributed under the terms of
+the BSD 3-Clause license. See the LICENSE file for details.
+"""
+
+
+import json
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from model_processing.graph_creation import Evaluator, Manager, MDTranslator
+from model_processing.workbook import (
+    SheetBundle,
+    Workbook,
+    WorkbookCache,
+    classify_sheet,
+    is_sheet_bundle,
+    open_workbook,
+    read_excel_sheets,
+    worksheet_to_dataframe,
+)
+
+from . import DATA_DIRECTORY, PATTERNS
+
+
+class TestWorkbook(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_classify_sheet(self):
+        pattern = "composition"
+        self.assertEqual(
+            "pattern", classify_sheet("Composition", pattern=pattern)
+        )
+        self.assertEqual(
+            "ids", classify_sheet("Composition IDs", pattern=pattern)
+        )
+        self.assertEqual(
+            "renames", classify_sheet("Composition Renames", pattern=pattern)
+        )
+        self.assertEqual(
+            "renames", classify_sheet("Renames", pattern=pattern)
+        )
+        self.assertEqual("ids", classify_sheet("MagicDraw ID"))
+        self.assertIsNone(classify_sheet("Sheet1", pattern=pattern))
+
+    def test_read_excel_sheets(self):
+        excel_file = (
+            DATA_DIRECTORY / "Composition Example 2 Model Changed.xlsx"
+        )
+        excel_sheets = read_excel_sheets(excel_file, pattern="composition")
+        expected_sheets = pd.read_excel(
+            excel_file, sheet_name=None, engine="openpyxl"
+        )
+
+        self.assertListEqual(
+            list(expected_sheets.keys()), list(excel_sheets.keys())
+        )
+        for sheet, df in expected_sheets.items():
+            self.assertTrue(df.equals(excel_sheets[sheet]))
+
+    def test_read_excel_sheets_unrecognized(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            excel_file = Path(tmpdir) / "Scratch.xlsx"
+            df = pd.DataFrame(data={"Component": ["Car"], "Part": ["Wheel"]})
+            with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
+                df.to_excel(writer, sheet_name="Composition", index=False)
+                df.to_excel(writer, sheet_name="Scratch", index=False)
+
+            # the scratch sheet is skipped without being parsed
+            with mock.patch(
+                "model_processing.workbook.worksheet_to_dataframe",
+                wraps=worksheet_to_dataframe,
+            ) as parse:
+                excel_sheets = read_excel_sheets(
+                    excel_file, pattern="composition"
+                )
+            self.assertListEqual(["Composition"], list(excel_sheets))
+            self.assertEqual(1, parse.call_count)
+            self.assertTrue(df.equals(excel_sheets["Composition"]))
+
+    def test_workbook_sheets(self):
+        excel_file = DATA_DIRECTORY / "Composition Example Model Changed.xlsx"
+        with Workbook(excel_file) as wkbk:
+            self.assertListEqual(
+                ["Composition", "Composition IDs", "Renames"],
+                wkbk.sheet_names,
+            )
+            sheets = wkbk.sheets(pattern="composition")
+            # frames belong to the caller and are not kept on the handle
+            sheets["Composition"].dropna(how="all", inplace=True)
+            sheets["Composition"]["Extra"] = 1
+            again = wkbk.sheets(pattern="composition")
+            self.assertNotIn("Extra", again["Composition"].columns)
+            self.assertIsNot(sheets["Composition"], again["Composition"])
+
+            # the pickled handle sent to workers carries no frames
+            state = wkbk.__getstate__()
+            self.assertIsNone(state["_book"])
+            self.assertFalse(
+                any(isinstance(v, pd.DataFrame) for v in state.values())
+            )
+            self.assertListEqual(
+                wkbk.sheet_names, pickle.loads(pickle.dumps(wkbk)).sheet_names
+            )
+
+        # closing the file reopens it when sheets are requested again
+        self.assertIsNone(wkbk._book)
+        self.assertEqual(3, len(wkbk.sheets(pattern="composition")))
+
+    def test_workbook_to_evaluator(self):
+        data = json.loads((PATTERNS / "Composition.json").read_text())
+        excel_file = DATA_DIRECTORY / "Composition Example Model Changed.xlsx"
+        tr = MDTranslator(
+            json_path=(PATTERNS / "Composition.json"), json_data=data
+        )
+        baseline = DATA_DIRECTORY / "Composition Example Model Baseline.xlsx"
+        with Workbook(excel_file) as wkbk:
+            evaluator = Evaluator(excel_file=wkbk, translator=tr)
+        with Workbook(baseline) as wkbk:
+            manager = Manager(
+                excel_path=[wkbk, excel_file],
+                json_path=[PATTERNS / "Composition.json"],
+            )
+        path_evaluator = Evaluator(
+            excel_file=excel_file,
+            translator=MDTranslator(
+                json_path=(PATTERNS / "Composition.json"), json_data=data
+            ),
+        )
+
+        self.assertTrue(evaluator.df.equals(path_evaluator.df))
+        self.assertTrue(evaluator.df_ids.equals(path_evaluator.df_ids))
+        self.assertTrue(
+            evaluator.df_renames.equals(path_evaluator.df_renames)
+        )
+        self.assertEqual(2, len(manager.evaluators))
+        self.assertFalse(manager.evaluators[0].df_ids.empty)
+        self.assertTrue(manager.evaluators[1].has_rename)
+
+    def test_workbook_cache(self):
+        data = json.loads((PATTERNS / "Composition.json").read_text())
+        excel_file = DATA_DIRECTORY / "Composition Example Model Changed.xlsx"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = WorkbookCache(tmpdir)
+            key = cache.key(
+                excel_file=excel_file,
+                pattern_path=PATTERNS / "Composition.json",
+                uml_id={},
+            )
+            self.assertIsNone(cache.get(key))
+
+            evaluator = Evaluator(
+                excel_file=excel_file,
+                translator=MDTranslator(
+                    json_path=(PATTERNS / "Composition.json"), json_data=data
+                ),
+                cache_dir=tmpdir,
+            )
+            self.assertEqual(1, len(list(Path(tmpdir).glob("*.pkl"))))
+            # the entry holds the processed frames and the ids they add
+            df, df_ids, df_renames, new_ids = cache.get(key)
+            self.assertTrue(evaluator.df.equals(df))
+            self.assertTrue(evaluator.df_renames.equals(df_renames))
+            self.assertDictEqual(evaluator.translator.uml_id, new_ids)
+
+            # a hit neither opens the Excel file, not even through the
+            # handle used for pattern detection, nor redoes the renames
+            with mock.patch(
+                "model_processing.workbook.load_workbook",
+                side_effect=AssertionError("workbook parsed"),
+            ), mock.patch.object(
+                Evaluator,
+                "apply_renames",
+                side_effect=AssertionError("renames processed"),
+            ):
+                wkbk = Workbook(excel_file)
+                self.assertListEqual(
+                    ["Composition", "Composition IDs", "Renames"],
+                    wkbk.sheet_names,
+                )
+                cached_evaluator = Evaluator(
+                    excel_file=wkbk,
+                    translator=MDTranslator(
+                        json_path=(PATTERNS / "Composition.json"),
+                        json_data=data,
+                    ),
+                    cache_dir=tmpdir,
+                )
+
+            self.assertTrue(evaluator.df.equals(cached_evaluator.df))
+            self.assertTrue(evaluator.df_ids.equals(cached_evaluator.df_ids))
+            self.assertTrue(
+                evaluator.df_renames.equals(cached_evaluator.df_renames)
+            )
+            self.assertDictEqual(
+                evaluator.translator.uml_id,
+                cached_evaluator.translator.uml_id,
+            )
+
+            other_key = cache.key(
+                excel_file=excel_file,
+                pattern_path=PATTERNS / "SystemParts.json",
+                uml_id={},
+            )
+            self.assertNotEqual(key, other_key)
+            # renames resolve against known ids, e.g. a compare baseline
+            baseline_key = cache.key(
+                excel_file=excel_file,
+                pattern_path=PATTERNS / "Composition.json",
+                uml_id=evaluator.translator.uml_id,
+            )
+            self.assertNotEqual(key, baseline_key)
+
+    def test_sheet_bundle(self):
+        excel_file = DATA_DIRECTORY / "Composition Example Model Changed.xlsx"
+        expected_sheets = read_excel_sheets(excel_file, pattern="composition")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            bundle_dir = Path(tmpdir) / "Composition Example Model Changed"
+            bundle_dir.mkdir()
+            self.assertFalse(is_sheet_bundle(bundle_dir))
+            for sheet, df in expected_sheets.items():
+                df.to_csv(bundle_dir / (sheet + ".csv"), index=False)
+            self.assertTrue(is_sheet_bundle(bundle_dir))
+            self.assertFalse(
+                is_sheet_bundle(bundle_dir, patterns=["systemparts"])
+            )
+
+            bundle = open_workbook(bundle_dir)
+            self.assertIsInstance(bundle, SheetBundle)
+            self.assertListEqual(
+                ["Composition", "Composition IDs", "Renames"],
+                bundle.sheet_names,
+            )
+            bundle_sheets = read_excel_sheets(bundle, pattern="composition")
+            for sheet, df in expected_sheets.items():
+                self.assertTrue(df.equals(bundle_sheets[sheet]))
+
+            data = json.loads((PATTERNS / "Composition.json").read_text())
+            evaluator = Evaluator(
+                excel_file=bundle_dir,
+                translator=MDTranslator(
+                    json_path=(PATTERNS / "Composition.json"), json_data=data
+                ),
+            )
+            self.assertTrue(evaluator.has_rename)
+            self.assertFalse(evaluator.df_ids.empty)
+
+            # files that are not sheets of the pattern rule the bundle out
+            (bundle_dir / "notes.csv").write_text("Note\ndraft\n")
+            self.assertFalse(is_sheet_bundle(bundle_dir))
+            (bundle_dir / "notes.csv").unlink()
+            # as do workbooks next to the sheet files
+            (bundle_dir / "Other.xlsx").write_bytes(excel_file.read_bytes())
+            self.assertFalse(is_sheet_bundle(bundle_dir))
+
+    def tearDown(self):
+        pass
@@ -61,6 +61,15 @@ try {
 
 	create_list = [];
 
+	// give the elements created without an owner the default home, a session must be open
+	house_homeless = {
+		for (homeless_no_more in homeless_elements) {
+			homeless_no_more.setOwner(default_home);
+			execution_status_log.add('Housing homeless element ' + homeless_no_more.getHumanName());
+		}
+		homeless_elements = [];
+	};
+
 
 	// try to make the element picker
 	try {
@@ -158,11 +167,15 @@ try {
 
 		}
 
-		// start the editing session to make changes to the model
+		// a chunked file only lists its chunk files, which are applied in order, each in its own
+		// session. A file without chunks is applied as it is.
 
-		SessionManager.getInstance().createSession('Modify Model from File');
+		chunk_files = [null];
 
-		execution_status_log.add('Model session created.');
+		if (changes_to_make != null && changes_to_make['chunks']) {
+			chunk_files = changes_to_make['chunks'].collect { chunk_name -> new File(read_path, chunk_name) };
+			execution_status_log.add(chunk_files.size().toString() + ' chunk files found.');
+		}
 
 		ele_factory = live_project.getElementsFactory();
 
@@ -172,7 +185,9 @@ try {
 
 		execution_status_log.add('Model element manager acquired.');
 
-		for (model_change in changes_to_make['modification targets']) {
+		// apply one modification target, temp_elements keeps the elements created so far across chunks
+
+		apply_change = { model_change ->
 
 			// start by looking at what model element to modify
 
@@ -1278,6 +1293,36 @@ try {
 
 		}
 
+		chunk_count = 0;
+
+		for (chunk_file in chunk_files) {
+
+			// start the editing session to make changes to the model
+
+			SessionManager.getInstance().createSession('Modify Model from File');
+
+			execution_status_log.add('Model session created.');
+
+			if (chunk_file != null) {
+				changes_to_make = new JsonSlurper().parse(chunk_file);
+				execution_status_log.add('Parsed ' + chunk_file.getName() + ' with ' + changes_to_make['modification targets'].size().toString() + ' modification targets.');
+			}
+
+			for (model_change in changes_to_make['modification targets']) {
+				apply_change(model_change);
+			}
+
+			chunk_count += 1;
+
+			// the last session is closed below once the leftovers are cleaned up
+
+			if (chunk_count < chunk_files.size()) {
+				house_homeless();
+				SessionManager.getInstance().closeSession();
+				execution_status_log.add('Closed modeling session for ' + chunk_file.getName() + '.');
+			}
+		}
+
 	}
 	catch(Exception e){
 		execution_status_log.add('Failed in file parsing stage.');
@@ -1288,10 +1333,7 @@ try {
 
 		//execution_status_log.add('Have ' + ends_to_nuke.size().toString() + ' ends to nuke.');
 
-		for (homeless_no_more in homeless_elements) {
-			homeless_no_more.setOwner(default_home);
-			execution_status_log.add('Housing homeless element ' + homeless_no_more.getHumanName());
-		}
+		house_homeless();
 
 		for (end_ready_to_nuke in ends_to_nuke) {
 			//live_log.log('Should kill memberEnd of ' + end_ready_to_nuke.getOwner().getName());